@@ -17,6 +17,7 @@ from exputils.misc.attrdict import AttrDict
 from exputils.misc.attrdict import AutoAttrDict
 from exputils.misc.attrdict import DefaultAttrDict
 from exputils.misc.attrdict import DefaultFactoryAttrDict
+from exputils.misc.attrdict import LazyAttrDict
 from exputils.misc.attrdict import combine_dicts
 
 from exputils.misc.misc import create_object_from_config
@@ -32,3 +33,4 @@ REPETITION_DIRECTORY_TEMPLATE = 'repetition_{:06d}'
 DEFAULT_DATA_DIRECTORY = 'data'  # name of the data directory under the experiments and repetition folders
 
 REPETITION_DATA_KEY = 'repetition_data'  # key name  for repetition data in the experiment_data dictionary
+STACKED_REPETITION_DATA_KEY = 'stacked_repetition_data'  # key name for the stacked repetition data in the experiment_data dictionary
@@ -13,10 +13,19 @@ from .loading import load_single_experiment_data
 from .loading import load_experiment_python_module
 from .loading import load_experiment_data_single_object
 from .selection import select_experiment_data
+from .selection import SelectionCache
 from .statistics import calc_repetition_statistics
 from .statistics import calc_statistics_over_repetitions
+from .online_statistics import OnlineStatistic
+from .online_statistics import OnlineMeanVar
+from .online_statistics import OnlineMinMax
+from .online_statistics import OnlineQuantiles
+from .online_statistics import OnlineHistogram
 from .utils import get_ordered_experiment_ids_from_descriptions
+from .utils import stack_repetition_data
+from .utils import to_columnar
 from .logger import Logger
+import exputils.data.cache
 import exputils.data.logging
 
 
@@ -0,0 +1,226 @@
+##
+## This file is part of the exputils package.
+##
+## Copyright: INRIA
+## Year: 2022, 2023
+## Contact: chris.reinke@inria.fr
+##
+## exputils is provided under GPL-3.0-or-later
+##
+import os
+import json
+import zipfile
+import numpy as np
+import exputils as eu
+from typing import Optional
+from exputils.misc.attrdict import AttrDict
+
+CACHE_INDEX_FILENAME = 'index.json'
+CACHE_VERSION = 1
+# datasource files are compacted if more than this ratio of their arrays are outdated
+CACHE_MAX_OUTDATED_RATIO = 0.5
+
+
+class DataCache:
+    """
+    Cache that consolidates the data of the data directories of experiments and repetitions.
+
+    The arrays of each datasource of all data directories are packed into a single npz file per
+    datasource (`<cache directory>/<datasource>.npz`).
+    An index file (`index.json`) records for each data directory the modification time and size of
+    its numpy files and under which key its arrays are stored.
+    Data of a directory is only taken from the cache if its files did not change since it was cached.
+    Otherwise it has to be loaded from the directory and is updated in the cache.
+    Updated data is appended under a new key to the datasource files. The outdated arrays stay in
+    the files until more than half of their arrays are outdated, then the files are compacted.
+
+    Data directories that have other data than numpy arrays and scalars, for example npz files
+    besides the `logging.npz` file, are not cached.
+
+    Parameters:
+        directory (str): Directory of the cache.
+        allow_pickle (bool): Indicates if loading of pickled objects from the cache is allowed.
+            Defaults to True. <br>
+            :warning: This could allow arbitrary code execution. Only load files you trust!
+    """
+
+    def __init__(self, directory: str, allow_pickle: bool = True):
+        self.directory = directory
+        self.allow_pickle = allow_pickle
+
+        self._entries = dict()  # index entry per data directory
+        self._next_key_idx = 0
+        self._new_data = dict()  # data per data directory that has to be added to the cache
+        self._file_stats = dict()  # file stats per data directory before its data was loaded
+
+        index_path = os.path.join(self.directory, CACHE_INDEX_FILENAME)
+        if os.path.isfile(index_path):
+            with open(index_path, 'r') as fh:
+                index = json.load(fh)
+            if index.get('version') == CACHE_VERSION:
+                self._entries = index['entries']
+                self._next_key_idx = index['next_key_idx']
+
+
+    def _get_entry_name(self, data_directory):
+        return os.path.relpath(os.path.abspath(data_directory), os.path.abspath(self.directory))
+
+
+    def is_valid(self, data_directory: str) -> bool:
+        """Returns True if the data of the data directory is cached and its files did not change since."""
+        # remember the stats, so that data that is loaded afterwards is not marked as valid if its files change meanwhile
+        file_stats = self._file_stats[data_directory] = _get_numpy_file_stats(data_directory)
+        entry = self._entries.get(self._get_entry_name(data_directory))
+        return entry is not None and entry['files'] == file_stats
+
+
+    def load(self,
+             data_directories: list,
+             allowed_data_filter: Optional[list] = None,
+             denied_data_filter: Optional[list] = None) -> dict:
+        """
+        Loads the cached data of several data directories.
+
+        Each datasource file of the cache is read once for all data directories.
+
+        Parameters:
+            data_directories (list): Data directories for which the data is loaded.
+                Their data has to be valid in the cache, see `is_valid`.
+            allowed_data_filter (list): Names of the datasources that are loaded.
+                Defaults to None, which loads all datasources.
+            denied_data_filter (list): Names of the datasources that are not loaded.
+                Defaults to None.
+
+        Returns:
+            data (dict): Data per data directory as an AttrDict.
+        """
+
+        entries = {directory: self._entries[self._get_entry_name(directory)] for directory in data_directories}
+        data = {directory: AttrDict() for directory in data_directories}
+
+        directories_per_datasource = dict()
+        for directory, entry in entries.items():
+            for datasource in entry['datasources']:
+                if eu.misc.is_allowed(datasource, allowed_list=allowed_data_filter, denied_list=denied_data_filter):
+                    directories_per_datasource.setdefault(datasource, []).append(directory)
+
+        for datasource, directories in directories_per_datasource.items():
+            with np.load(self._get_datasource_path(datasource), allow_pickle=self.allow_pickle) as datasource_file:
+                for directory in directories:
+                    value = datasource_file[entries[directory]['key']]
+                    if len(value.shape) == 0:
+                        value = value.dtype.type(value)
+                    data[directory][datasource] = value
+
+        # keep the order of the datasources as they were loaded from the directories
+        for directory, entry in entries.items():
+            data[directory] = AttrDict((k, data[directory][k]) for k in entry['datasources'] if k in data[directory])
+
+        return data
+
+
+    def add(self, data_directory: str, data: dict):
+        """
+        Adds the data of a data directory to the cache.
+        The cache files are written by `save`.
+        The modification times of its files are taken from the last call of `is_valid` for the
+        directory, which should be before the data was loaded.
+
+        Parameters:
+            data_directory (str): The data directory.
+            data (dict): The data that was loaded from the directory.
+        """
+        if all(isinstance(value, (np.ndarray, np.generic, int, float, bool)) for value in data.values()):
+            self._new_data[data_directory] = dict(data)
+
+
+    def save(self):
+        """Writes the data that was added to the cache files and updates the index."""
+
+        if not self._new_data:
+            return
+
+        eu.io.makedirs(self.directory)
+
+        new_values_per_datasource = dict()
+        for data_directory, data in self._new_data.items():
+            entry_name = self._get_entry_name(data_directory)
+            old_entry = self._entries.get(entry_name)
+
+            key = 'd{}'.format(self._next_key_idx)
+            self._next_key_idx += 1
+
+            if old_entry is not None:
+                for datasource in old_entry['datasources']:
+                    new_values_per_datasource.setdefault(datasource, dict())
+
+            for datasource, value in data.items():
+                new_values_per_datasource.setdefault(datasource, dict())[key] = value
+
+            self._entries[entry_name] = dict(
+                key=key,
+                files=self._file_stats.get(data_directory),
+                datasources=list(data.keys()))
+
+        # keys of the arrays of each datasource that are used by the index
+        used_keys_per_datasource = dict()
+        for entry in self._entries.values():
+            for datasource in entry['datasources']:
+                used_keys_per_datasource.setdefault(datasource, set()).add(entry['key'])
+
+        for datasource, new_values in new_values_per_datasource.items():
+            path = self._get_datasource_path(datasource)
+            used_keys = used_keys_per_datasource.get(datasource, set())
+
+            existing_keys = set()
+            if os.path.isfile(path):
+                with zipfile.ZipFile(path) as datasource_file:
+                    existing_keys = {name[:-len('.npy')] for name in datasource_file.namelist()}
+
+            n_keys = len(existing_keys | set(new_values))
+            n_outdated_keys = len(existing_keys - used_keys)
+            if n_outdated_keys > CACHE_MAX_OUTDATED_RATIO * n_keys or not existing_keys.isdisjoint(new_values):
+                # compact the file by rewriting it without the outdated values
+                values = dict()
+                if existing_keys:
+                    with np.load(path, allow_pickle=self.allow_pickle) as datasource_file:
+                        values = {key: datasource_file[key] for key in datasource_file.files if key in used_keys}
+                values.update(new_values)
+
+                tmp_path = path + '.tmp.npz'
+                np.savez(tmp_path, **values)
+                os.replace(tmp_path, path)
+            elif new_values:
+                # append the new values to the file, in the same format as np.savez
+                with zipfile.ZipFile(path, mode='a', allowZip64=True) as datasource_file:
+                    for key, value in new_values.items():
+                        with datasource_file.open(key + '.npy', mode='w', force_zip64=True) as fh:
+                            np.lib.format.write_array(fh, np.asanyarray(value), allow_pickle=True)
+
+        index_path = os.path.join(self.directory, CACHE_INDEX_FILENAME)
+        tmp_index_path = index_path + '.tmp'
+        with open(tmp_index_path, 'w') as fh:
+            json.dump(dict(version=CACHE_VERSION, next_key_idx=self._next_key_idx, entries=self._entries), fh)
+        os.replace(tmp_index_path, index_path)
+
+        self._new_data = dict()
+
+
+    def _get_datasource_path(self, datasource):
+        return os.path.join(self.directory, datasource + '.npz')
+
+
+def _get_numpy_file_stats(data_directory):
+    """Returns the modification time and size of each numpy file in a directory, or None if it does not exist."""
+    try:
+        entries = os.scandir(data_directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    stats = dict()
+    with entries:
+        for entry in entries:
+            if entry.name.endswith(('.npy', '.npz')) and entry.is_file():
+                stat = entry.stat()
+                stats[entry.name] = [stat.st_mtime_ns, stat.st_size]
+    return stats
@@ -24,6 +24,8 @@ from types import ModuleType
 
 # TODO: Feature - allow to load data from several campaigns
 
+DEFAULT_CACHE_DIRECTORY = '.exputils_cache'  # name of the cache directory under the experiments directory
+
 def load_experiment_descriptions(experiments_directory: Optional[str] = None,
                                  allowed_experiments_id_list: Optional[list] = None,
                                  denied_experiments_id_list: Optional[list] = None,
@@ -131,7 +133,14 @@ def load_experiment_data(experiment_descriptions: Optional[AttrDict]=None,
                          post_denied_data_filter: Optional[list]=None,
                          on_experiment_data_loaded: Optional[list]=None,
                          on_repetition_data_loaded: Optional[list]=None,
-                         allow_pickle: bool = True) -> tuple[AttrDict, AttrDict]:
+                         allow_pickle: bool = True,
+                         mmap_mode: Optional[str] = None,
+                         is_lazy: bool = False,
+                         n_workers: Optional[int] = None,
+                         executor_type: str = 'thread',
+                         is_use_cache: bool = False,
+                         cache_directory: Optional[str] = None,
+                         is_stack_repetition_data: bool = False) -> tuple[AttrDict, AttrDict]:
     """
     Loads logged data from experiments and their repetitions in form of nested dictionaries and numpy arrays.
 
@@ -197,6 +206,57 @@ def load_experiment_data(experiment_descriptions: Optional[AttrDict]=None,
             Indicates if loading of pickled objects is allowed.
             Defaults to True. <br>
             :warning: This could allow arbitrary code execution. Only load files you trust!
+        mmap_mode (str):
+            If set, numpy arrays of .npy files are memory-mapped with the given mode (`'r'`, `'r+'`,
+            `'w+'`, or `'c'`, see `numpy.load`) instead of being read into memory.
+            Their data is then only read from disk when it is accessed, which allows to load large
+            campaigns of which only parts are analyzed.
+            Arrays of objects and data of .npz files are always loaded into memory.
+            Defaults to None, which loads all data into memory.
+        is_lazy (bool):
+            If True, the data files are not read during loading.
+            The data of experiments and repetitions are then [LazyAttrDict][exputils.misc.attrdict.LazyAttrDict]s
+            with placeholders that read a file when its datasource is accessed for the first time.
+            For example, `select_experiment_data(data, 'rep.reward')` only reads the `reward.npy` files.
+            Read data is kept in a cache of bounded size
+            (see [set_lazy_numpy_cache_size][exputils.io.numpy.set_lazy_numpy_cache_size]).
+            Callback functions (see `on_experiment_data_loaded` and `on_repetition_data_loaded`)
+            read the data that they access.
+            Defaults to False.
+        n_workers (int):
+            Number of workers that read the data of experiments and repetitions in parallel.
+            This speeds up loading if it is limited by the latency of the filesystem, for example
+            for network filesystems.
+            Callback functions are called and warnings are issued in the calling process in the
+            same order as for sequential loading.
+            Defaults to None, which loads the data sequentially.
+        executor_type (str):
+            Type of the workers if `n_workers` is set: `'thread'` or `'process'`.
+            Threads are suited for loading that is limited by the filesystem.
+            Processes have to transfer the loaded data to the calling process, which copies
+            memory-mapped arrays into memory.
+            Defaults to `'thread'`.
+        is_use_cache (bool):
+            If True, the loaded data is consolidated in a cache with a single file per datasource
+            (see [DataCache][exputils.data.cache.DataCache]).
+            Loading the data again then reads these files instead of the files of each repetition.
+            Data of directories whose numpy files were changed, added, or removed since they were
+            cached, is loaded from the directories and updated in the cache.
+            Can not be used together with `mmap_mode` and `is_lazy`.
+            Defaults to False.
+        cache_directory (str):
+            Directory of the cache if `is_use_cache` is True.
+            Defaults to `'.exputils_cache'` under the experiments directory.
+        is_stack_repetition_data (bool):
+            If True, the data of each datasource is stacked over the repetitions of an experiment
+            into a single array padded with nan and a mask of existing elements
+            (see [stack_repetition_data][exputils.data.utils.stack_repetition_data]).
+            They are stored under `'stacked_repetition_data'` in the experiment data.
+            [select_experiment_data][exputils.data.selection.select_experiment_data] then returns
+            the stacked arrays for these datasources instead of creating them for each selection.
+            The stacked arrays are created after the callback functions and post data filters
+            were applied.
+            Defaults to False.
 
     Returns:
         data (AttrDict):
@@ -233,73 +293,154 @@ def load_experiment_data(experiment_descriptions: Optional[AttrDict]=None,
     # load experiments according to the order in the experiment_descriptions
     sorted_experiment_ids = eu.data.get_ordered_experiment_ids_from_descriptions(experiment_descriptions)
 
-    data = collections.OrderedDict()
+    load_kwargs = dict(
+        data_directory=data_directory,
+        allowed_data_filter=pre_allowed_data_filter,
+        denied_data_filter=pre_denied_data_filter,
+        allow_pickle=allow_pickle,
+        mmap_mode=mmap_mode,
+        is_lazy=is_lazy)
+
+    load_directories = []
     for exp_id in sorted_experiment_ids:
         exp_descr = experiment_descriptions[exp_id]
-
         if 'is_load_data' not in exp_descr or exp_descr['is_load_data']:
-            try:
-                data[exp_id] = load_single_experiment_data(
-                    exp_descr['directory'],
-                    data_directory=data_directory,
-                    allowed_data_filter=pre_allowed_data_filter,
-                    denied_data_filter=pre_denied_data_filter,
-                    allow_pickle=allow_pickle)
-
-                for callback_function in on_experiment_data_loaded:
-                    callback_function(exp_id, data[exp_id])
-
-                _filter_data(data[exp_id], post_allowed_data_filter, post_denied_data_filter)
-
-            except FileNotFoundError:
-                if not exp_descr.repetition_ids or not is_load_repetition_data:
-                    warnings.warn('Could find data for experiment {!r} ({!r}). Skipped ...'.format(exp_id, exp_descr['directory']))
-
-            except Exception as e:
-                raise Exception('Exception during loading of data for experiment {!r} ({!r})!'.format(exp_id, exp_descr['directory'])) from e
-
-            # load data of each repetition
-            if is_load_repetition_data:
-                if eu.REPETITION_DATA_KEY in data:
-                    warnings.warn('A statistic called {!r} was loaded for experiment data. Can not store repetition data under the same data source name. Skip to load repetition data. Please rename this statistic.'.format(eu.REPETITION_DATA_KEY))
-                else:
-                    cur_rep_statistics_dict = dict()
-                    for rep_id in exp_descr.repetition_ids:
-                        cur_rep_directory = os.path.join(exp_descr['directory'], eu.REPETITION_DIRECTORY_TEMPLATE.format(rep_id))
-                        try:
-                            cur_rep_statistics_dict[rep_id] = load_single_experiment_data(
-                                cur_rep_directory,
-                                data_directory=data_directory,
-                                allowed_data_filter=pre_allowed_data_filter,
-                                denied_data_filter=pre_denied_data_filter,
-                                allow_pickle=allow_pickle)
-
-                            for callback_function in on_repetition_data_loaded:
-                                callback_function(exp_id, rep_id, cur_rep_statistics_dict[rep_id])
-
-                            _filter_data(cur_rep_statistics_dict[rep_id], post_allowed_data_filter, post_denied_data_filter)
-
-                        except FileNotFoundError:
-                            warnings.warn('Could not find data for repetition {} of experiment {!r} ({!r}). Skipped ...'.format(rep_id, exp_id, exp_descr['directory']))
-
-                        except Exception as e:
-                            raise Exception('Exception during loading of data for repetition {} of experiment {!r} ({!r})!'.format(rep_id, exp_id, exp_descr['directory'])) from e
-
-                    if cur_rep_statistics_dict:
-                        # in case no experimental level data exists
-                        if exp_id not in data:
-                            data[exp_id] = AttrDict()
-
-                        data[exp_id][eu.REPETITION_DATA_KEY] = cur_rep_statistics_dict
+            load_directories.extend(_get_data_load_directories(exp_descr, is_load_repetition_data))
+
+    cache = None
+    cached_data = dict()
+    if is_use_cache:
+        if mmap_mode is not None or is_lazy:
+            raise ValueError('The cache can not be used together with mmap_mode or is_lazy!')
+
+        if cache_directory is None:
+            if experiments_directory is None and experiment_descriptions:
+                experiments_directory = os.path.commonpath([os.path.dirname(os.path.abspath(exp_descr['directory'])) for exp_descr in experiment_descriptions.values()])
+            elif experiments_directory is None:
+                experiments_directory = os.path.join('..', eu.DEFAULT_EXPERIMENTS_DIRECTORY)
+            cache_directory = os.path.join(experiments_directory, DEFAULT_CACHE_DIRECTORY)
+
+        cache = eu.data.cache.DataCache(cache_directory, allow_pickle=allow_pickle)
+
+        data_directories = {directory: os.path.join(directory, data_directory or eu.DEFAULT_DATA_DIRECTORY) for directory in load_directories}
+        valid_directories = [directory for directory in load_directories if cache.is_valid(data_directories[directory])]
+        loaded_cached_data = cache.load(
+            [data_directories[directory] for directory in valid_directories],
+            allowed_data_filter=pre_allowed_data_filter,
+            denied_data_filter=pre_denied_data_filter)
+        cached_data = {directory: loaded_cached_data[data_directories[directory]] for directory in valid_directories}
+
+        # all data of directories that are not cached is loaded to add it to the cache
+        load_kwargs.update(allowed_data_filter=None, denied_data_filter=None)
+
+    executor = None
+    if n_workers is not None and n_workers > 1:
+        # read the data of all experiments and repetitions in parallel
+        # the results are processed in the same order as they are sequentially loaded, so that callbacks
+        # and warnings are called in the main process in the same order
+        executor = eu.misc.create_executor(executor_type, n_workers)
+        futures = dict()
+        for directory in load_directories:
+            if directory not in cached_data:
+                futures[directory] = executor.submit(load_single_experiment_data, directory, **load_kwargs)
+
+        def read_data(directory):
+            return futures.pop(directory).result()
+    else:
+        def read_data(directory):
+            return load_single_experiment_data(directory, **load_kwargs)
+
+    if cache is None:
+        load_data = read_data
+    else:
+        def load_data(directory):
+            if directory in cached_data:
+                directory_data = cached_data.pop(directory)
+            else:
+                directory_data = read_data(directory)
+                cache.add(data_directories[directory], directory_data)
+                directory_data = AttrDict(directory_data)
+            _filter_loaded_data(directory_data, pre_allowed_data_filter, pre_denied_data_filter)
+            return directory_data
+
+    try:
+        data = collections.OrderedDict()
+        for exp_id in sorted_experiment_ids:
+            exp_descr = experiment_descriptions[exp_id]
+
+            if 'is_load_data' not in exp_descr or exp_descr['is_load_data']:
+                try:
+                    data[exp_id] = load_data(exp_descr['directory'])
+
+                    for callback_function in on_experiment_data_loaded:
+                        callback_function(exp_id, data[exp_id])
+
+                    _filter_data(data[exp_id], post_allowed_data_filter, post_denied_data_filter)
+
+                except FileNotFoundError:
+                    if not exp_descr.repetition_ids or not is_load_repetition_data:
+                        warnings.warn('Could find data for experiment {!r} ({!r}). Skipped ...'.format(exp_id, exp_descr['directory']))
+
+                except Exception as e:
+                    raise Exception('Exception during loading of data for experiment {!r} ({!r})!'.format(exp_id, exp_descr['directory'])) from e
+
+                # load data of each repetition
+                if is_load_repetition_data:
+                    if eu.REPETITION_DATA_KEY in data:
+                        warnings.warn('A statistic called {!r} was loaded for experiment data. Can not store repetition data under the same data source name. Skip to load repetition data. Please rename this statistic.'.format(eu.REPETITION_DATA_KEY))
+                    else:
+                        cur_rep_statistics_dict = dict()
+                        for rep_id in exp_descr.repetition_ids:
+                            cur_rep_directory = os.path.join(exp_descr['directory'], eu.REPETITION_DIRECTORY_TEMPLATE.format(rep_id))
+                            try:
+                                cur_rep_statistics_dict[rep_id] = load_data(cur_rep_directory)
+
+                                for callback_function in on_repetition_data_loaded:
+                                    callback_function(exp_id, rep_id, cur_rep_statistics_dict[rep_id])
+
+                                _filter_data(cur_rep_statistics_dict[rep_id], post_allowed_data_filter, post_denied_data_filter)
+
+                            except FileNotFoundError:
+                                warnings.warn('Could not find data for repetition {} of experiment {!r} ({!r}). Skipped ...'.format(rep_id, exp_id, exp_descr['directory']))
+
+                            except Exception as e:
+                                raise Exception('Exception during loading of data for repetition {} of experiment {!r} ({!r})!'.format(rep_id, exp_id, exp_descr['directory'])) from e
+
+                        if cur_rep_statistics_dict:
+                            # in case no experimental level data exists
+                            if exp_id not in data:
+                                data[exp_id] = AttrDict()
+
+                            data[exp_id][eu.REPETITION_DATA_KEY] = cur_rep_statistics_dict
+
+                            if is_stack_repetition_data:
+                                data[exp_id][eu.STACKED_REPETITION_DATA_KEY] = eu.data.stack_repetition_data(cur_rep_statistics_dict)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    if cache is not None:
+        cache.save()
 
     return data, experiment_descriptions
 
 
+def _get_data_load_directories(exp_descr, is_load_repetition_data):
+    """Returns the directories of an experiment and its repetitions from which data is loaded."""
+    directories = [exp_descr['directory']]
+    if is_load_repetition_data:
+        for rep_id in exp_descr.repetition_ids:
+            directories.append(os.path.join(exp_descr['directory'], eu.REPETITION_DIRECTORY_TEMPLATE.format(rep_id)))
+    return directories
+
+
 def load_single_experiment_data(experiment_directory: str,
                                 data_directory: Optional[str] = None,
                                 allowed_data_filter: Optional[list] = None,
                                 denied_data_filter: Optional[list] = None,
-                                allow_pickle: bool = True) -> AttrDict:
+                                allow_pickle: bool = True,
+                                mmap_mode: Optional[str] = None,
+                                is_lazy: bool = False) -> AttrDict:
     """
     Loads data for a single experiment which includes all its repetition data.
 
@@ -319,6 +460,16 @@ def load_single_experiment_data(experiment_directory: str,
             Indicates if loading of pickled objects is allowed.
             Defaults to True. <br>
             :warning: This could allow arbitrary code execution. Only load files you trust!
+        mmap_mode (str):
+            If set, numpy arrays of .npy files are memory-mapped with the given mode (`'r'`, `'r+'`,
+            `'w+'`, or `'c'`, see `numpy.load`) instead of being read into memory.
+            Arrays of objects and data of .npz files are always loaded into memory.
+            Defaults to None, which loads all data into memory.
+        is_lazy (bool):
+            If True, the data files are not read during loading.
+            Instead a [LazyAttrDict][exputils.misc.attrdict.LazyAttrDict] is returned with
+            placeholders that read a file when its datasource is accessed for the first time.
+            Defaults to False.
 
     Returns:
         data (AttrDict):
@@ -330,22 +481,34 @@ def load_single_experiment_data(experiment_directory: str,
 
     # need to allow also logging to be able to load data that is in logging.npz files
     if allowed_data_filter is not None:
-        allowed_data_filter.append('logging')
+        allowed_data_filter = list(allowed_data_filter) + ['logging']
 
     data = eu.io.load_numpy_files(
         os.path.join(experiment_directory, data_directory),
         allowed_data_filter=allowed_data_filter,
         denied_data_filter=denied_data_filter,
-        allow_pickle=allow_pickle)
+        allow_pickle=allow_pickle,
+        mmap_mode=mmap_mode,
+        is_lazy=is_lazy)
 
     # TODO: Refactor - make loading of npz files without the 'logging' sub-directory as a general cases
     if 'logging' in data:
-        data.update(data['logging'])
+        # take the stored items, so that placeholders of lazy data are not loaded
+        data.update(dict.items(data['logging']))
         del data['logging']
 
     return data
 
 
+def _filter_loaded_data(data, allowed_data_filter, denied_data_filter):
+    """Filters loaded data in the same way as the data filters of load_numpy_files, including the data of npz files."""
+    for key in list(data.keys()):
+        if not eu.misc.is_allowed(key, allowed_list=allowed_data_filter, denied_list=denied_data_filter):
+            del data[key]
+        elif isinstance(data[key], dict):
+            _filter_data(data[key], allowed_data_filter, denied_data_filter)
+
+
 def _filter_data(data, allowed_data_list, denied_data_list):
     # get the data_elements that should be deleted
     delete_keys = [k for k in data.keys() if not eu.misc.is_allowed(k, allowed_list=allowed_data_list, denied_list=denied_data_list)]
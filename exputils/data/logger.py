@@ -12,9 +12,16 @@ import exputils as eu
 import numpy as np
 import os
 import copy
+import collections
+import shutil
 import warnings
 from datetime import datetime
 import re
+import time
+import threading
+import atexit
+import signal
+import weakref
 
 # try to import tensorboard
 try:
@@ -29,6 +36,305 @@ def _get_safe_name(name):
     return name.replace('/', '_')
 
 
+class _ValueBuffer:
+    """
+    Holds the values of a log entry.
+
+    New values are collected in a small list of pending values which is flushed in bulk into a typed
+    numpy array every FLUSH_SIZE values or when the values are accessed. The dtype and shape of the
+    array are detected from the first flushed values. The array grows by amortized doubling. Ragged
+    values or values that are not numeric (strings, objects, ...) are stored in a list.
+    """
+
+    __slots__ = ('_array', '_length', '_list', '_pending')
+
+    FLUSH_SIZE = 512
+
+    _INITIAL_CAPACITY = 16
+
+
+    def __init__(self):
+        self._array = None
+        self._length = 0
+        self._list = None
+        self._pending = []  # values that are not yet flushed into the array or list
+
+
+    @classmethod
+    def from_values(cls, values):
+        """Creates a buffer that holds the given values (numpy array or list)."""
+        buffer = cls()
+        if isinstance(values, np.ndarray) and values.ndim > 0 and values.dtype.kind in 'biufc':
+            buffer._array = values
+            buffer._length = len(values)
+        else:
+            buffer._list = list(values) if isinstance(values, (list, tuple, np.ndarray)) else [values]
+        return buffer
+
+
+    def __len__(self):
+        if self._list is not None:
+            return len(self._list) + len(self._pending)
+        return self._length + len(self._pending)
+
+
+    @property
+    def is_typed(self):
+        """True if the values are stored in a typed numpy array, otherwise False."""
+        self.flush()
+        return self._list is None
+
+
+    @property
+    def values(self):
+        """Values either as numpy array (view on the buffer) or as a list."""
+        self.flush()
+        return self._get_values()
+
+
+    def _get_values(self):
+        if self._list is not None:
+            return self._list
+        if self._array is None:
+            return []
+        return self._array[:self._length]
+
+
+    def append(self, val):
+        pending = self._pending
+        pending.append(val)
+        if len(pending) >= self.FLUSH_SIZE:
+            self.flush()
+
+
+    def flush(self):
+        """Moves the pending values in bulk into the typed array or the list."""
+        if self._pending:
+            self._extend(self._pending)
+            self._pending.clear()
+
+
+    def extend(self, values):
+        """Appends several values at once. The first dimension of the given values is over the values."""
+        self.flush()
+        self._extend(values)
+
+
+    def _extend(self, values):
+
+        if self._list is not None:
+            self._list.extend(values)
+            return
+
+        try:
+            values_array = np.asarray(values)
+        except ValueError:
+            # ragged values
+            values_array = None
+
+        if values_array is None or values_array.ndim == 0 or values_array.dtype.kind not in 'biufc' \
+                or (self._array is not None and values_array.shape[1:] != self._array.shape[1:]):
+            self._to_list()
+            self._list.extend(values)
+            return
+
+        if self._array is None:
+            self._array = np.empty((self._INITIAL_CAPACITY,) + values_array.shape[1:], dtype=values_array.dtype)
+        elif values_array.dtype != self._array.dtype:
+            dtype = np.result_type(self._array.dtype, values_array.dtype)
+            if dtype != self._array.dtype:
+                self._array = self._array.astype(dtype)
+
+        n_values = len(values_array)
+        self._reserve(self._length + n_values)
+
+        self._array[self._length:self._length + n_values] = values_array
+        self._length += n_values
+
+
+    def _reserve(self, n_values):
+        """Grows the typed array by doubling its capacity until it can hold the given number of values."""
+
+        capacity = len(self._array)
+        if n_values > capacity:
+            while capacity < n_values:
+                capacity = max(2 * capacity, self._INITIAL_CAPACITY)
+
+            new_array = np.empty((capacity,) + self._array.shape[1:], dtype=self._array.dtype)
+            new_array[:self._length] = self._array[:self._length]
+            self._array = new_array
+
+
+    def _to_list(self):
+        """Switches to store the values in a list."""
+        if self._list is None:
+            self._list = list(self._get_values())
+            self._array = None
+            self._length = 0
+
+
+    def to_array(self, start=0):
+        """Returns the values, optionally from a start index on, as a numpy array. Ragged values are returned as an object array."""
+        self.flush()
+
+        if self._list is None:
+            return np.asarray(self._get_values()[start:])
+
+        values = self._list[start:]
+        try:
+            return np.asarray(values)
+        except ValueError:
+            # ragged data
+            array = np.empty(len(values), dtype=object)
+            for idx, val in enumerate(values):
+                array[idx] = val
+            return array
+
+
+    def clear(self):
+        """Removes all values but keeps the allocated memory of the typed array."""
+        if self._list is not None:
+            self._list.clear()
+        self._pending.clear()
+        self._length = 0
+
+
+class _TensorboardForwarder:
+    """
+    Forwards values to a tensorboard writer in a background thread.
+
+    Values are appended to a buffer and a background thread drains them in batches to the writer.
+    If the buffer is full, new values are either dropped or the logging process is blocked until
+    the background thread made space for them.
+    """
+
+    def __init__(self, writer, buffer_size=100000, full_buffer_policy='drop', poll_interval=0.05):
+
+        if full_buffer_policy not in ['drop', 'block']:
+            raise ValueError('Unknown full buffer policy {!r}! Only \'drop\' and \'block\' are allowed.'.format(full_buffer_policy))
+
+        self.writer = writer
+        self.buffer_size = buffer_size
+        self.full_buffer_policy = full_buffer_policy
+        self.poll_interval = poll_interval
+
+        # appending and popping from a deque are atomic operations, so producer and consumer need no lock
+        self._buffer = collections.deque()
+        self._n_added = 0
+        self._n_processed = 0
+        self.n_dropped = 0
+
+        self._processed_condition = threading.Condition()
+        self._wake_event = threading.Event()
+        self._is_stopped = False
+
+        self._thread = threading.Thread(target=self._run, name='TensorboardForwarder', daemon=True)
+        self._thread.start()
+
+        # forward the remaining values when the process exits, as the daemon thread would be stopped
+        atexit.register(_close_tensorboard_forwarder_at_exit, weakref.ref(self))
+
+
+    def add_scalar(self, tag, scalar_value, global_step=None, walltime=None):
+        self._add(('add_scalar', tag, scalar_value, global_step, time.time() if walltime is None else walltime))
+
+
+    def add_histogram(self, tag, values, global_step=None, walltime=None):
+        self._add(('add_histogram', tag, values, global_step, time.time() if walltime is None else walltime))
+
+
+    def _add(self, item):
+
+        if len(self._buffer) >= self.buffer_size:
+            if self.full_buffer_policy == 'drop':
+                if self.n_dropped == 0:
+                    warnings.warn('Tensorboard buffer is full. Values are dropped until the background thread made space for them.')
+                self.n_dropped += 1
+                return
+
+            with self._processed_condition:
+                self._wake_event.set()
+                while len(self._buffer) >= self.buffer_size and self._thread.is_alive():
+                    self._processed_condition.wait(self.poll_interval)
+
+        self._buffer.append(item)
+        self._n_added += 1
+
+
+    def _run(self):
+        buffer = self._buffer
+        while True:
+            n_processed = 0
+            while buffer:
+                method_name, tag, value, global_step, walltime = buffer.popleft()
+                try:
+                    getattr(self.writer, method_name)(tag, value, global_step=global_step, walltime=walltime)
+                except Exception as err:
+                    warnings.warn('Could not forward value for {!r} to tensorboard: {}'.format(tag, err))
+                n_processed += 1
+
+            if n_processed:
+                with self._processed_condition:
+                    self._n_processed += n_processed
+                    self._processed_condition.notify_all()
+
+            if self._is_stopped and not buffer:
+                return
+
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+
+
+    def flush(self):
+        """Waits until all values that were added are forwarded and flushes the writer."""
+        n_added = self._n_added
+        with self._processed_condition:
+            self._wake_event.set()
+            while self._n_processed < n_added and self._thread.is_alive():
+                self._processed_condition.wait(self.poll_interval)
+        self.writer.flush()
+
+
+    def close(self):
+        """Forwards all remaining values and stops the background thread."""
+        self._is_stopped = True
+        self._wake_event.set()
+        self._thread.join()
+        self.writer.flush()
+
+
+def _close_tensorboard_forwarder_at_exit(forwarder_ref):
+    """Forwards the remaining values of the referenced tensorboard forwarder if it still exists."""
+    forwarder = forwarder_ref()
+    if forwarder is not None and not forwarder._is_stopped:
+        forwarder.close()
+
+
+def _remove_file_if_existing(file_path):
+    if os.path.isfile(file_path):
+        os.remove(file_path)
+
+
+def _save_logger_at_exit(logger_ref):
+    """Saves the referenced logger if it still exists. Used as atexit handler."""
+    logger = logger_ref()
+    if logger is not None and logger.config.autosave.at_exit:
+        logger._save_at_exit()
+
+
+def _save_logger_at_signal(logger_ref, previous_handler, signum, frame):
+    """Saves the referenced logger if the process is terminated and then calls the previous signal handler."""
+
+    _save_logger_at_exit(logger_ref)
+
+    if callable(previous_handler):
+        previous_handler(signum, frame)
+    elif previous_handler != signal.SIG_IGN:
+        # terminate the process with the default handler
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+
 class Logger:
     """
         Configuration:
@@ -36,8 +342,44 @@ class Logger:
                 'npy': each property is loggend in an individual npy file
                 'npz': all properties are combined in a npz file
                 'cnpz': all properties are combined in a compressed npz file
+                'stream': each property is logged in an individual npy file to which its values are
+                          appended in chunks while logging, only the last chunk is held in memory
 
             numpy_npz_filename: Name of the npz file if numpy data should be saved in a npz or compressed npz.
+
+            numpy_npz_max_segments: Maximum number of segments of a npz file. If the log is saved
+                several times, then the values that were added since the last save are written to a
+                new segment file next to the npz file. After this number of segments, the npz file is
+                rewritten as a whole.
+
+            numpy_stream_buffer_size: Number of values of a property that are held in memory before
+                they are appended to its npy file if the 'stream' mode is used.
+
+            object_copy_mode: String that defines how objects are added to the log.
+                'deepcopy': a deep copy of the object is held in memory until the log is saved
+                'none': the object itself is held in memory, later changes of it are saved
+                'serialize-now': the object is directly serialized and appended to a dillstream
+                                 file of its entry, it is not held in memory
+
+            tensorboard_async: Forwarding of values to tensorboard in a background thread, so that the
+                logging process does not wait for tensorboard.
+                is_active: Forward values in the background. (default=False)
+                buffer_size: Maximum number of values that wait to be forwarded. (default=100000)
+                full_buffer_policy: What happens with new values if the buffer is full: 'drop' them,
+                                    or 'block' the logging process until there is space. (default='drop')
+
+            autosave: Policy to save the log automatically.
+                n_values: Save after this number of values were added to the log. (default=None, inactive)
+                interval: Save if this number of seconds passed since the last save when values are
+                          added to the log. (default=None, inactive)
+                at_exit: Save when the process exits or is terminated by a SIGTERM signal. (default=False)
+                is_background: Write the changed entries in a background thread to not block the
+                               logging process. In the 'stream' numpy log mode, the values in memory
+                               are still appended to their files in the logging process. (default=True)
+
+        Changes of the config take effect directly if the config is assigned, e.g. with
+        `logger.config = config` or `exputils.data.logging.set_config`. Changes of single settings
+        in place, e.g. `logger.config.autosave.n_values = 100`, take effect with the next save.
     """
 
     def default_config(self):
@@ -45,6 +387,22 @@ class Logger:
             directory = None,
             numpy_log_mode = 'npy',
             numpy_npz_filename = 'logging.npz',
+            numpy_npz_max_segments = 100,
+            numpy_stream_buffer_size = 1000,
+            object_copy_mode = 'deepcopy',
+
+            tensorboard_async = AttrDict(
+                is_active = False,
+                buffer_size = 100000,
+                full_buffer_policy = 'drop',
+            ),
+
+            autosave = AttrDict(
+                n_values = None,
+                interval = None,
+                at_exit = False,
+                is_background = True,
+            ),
 
             tensorboard = AttrDict(
                 log_dir = None,
@@ -63,10 +421,58 @@ class Logger:
         self.numpy_data = dict()
         self.object_data = dict()
 
+        # state of numpy data that is streamed to disk
+        self._numpy_stream_directory = None
+        self._numpy_stream_lengths = dict()  # number of values per entry that were appended to its file
+        self._numpy_unstreamable_names = set()
+
+        # state of entries whose objects are streamed to disk
+        self._object_stream_paths = dict()  # path of the dillstream file per entry
+
+        # state to save only entries and values that changed since the last save
+        self._dirty_names = set()
+        self._last_save_target = None
+        self._numpy_saved_lengths = dict()  # number of values per entry and if they were typed at the last save
+        self._n_numpy_segments = 0
+
+        # state of the autosave
+        self._n_values_since_save = 0
+        self._last_save_time = time.monotonic()
+        self._autosave_thread = None
+        self._failed_autosave_names = None  # entries of an autosave whose background write failed
+
         self._tensorboard_writer = None
+        self._tensorboard_forwarder = None
         self._is_tensorboard_active = False
 
 
+    @property
+    def config(self):
+        return self._config
+
+
+    @config.setter
+    def config(self, value):
+        self._config = value
+        self._apply_config()
+
+
+    def _apply_config(self):
+        """
+        Caches the settings of the config that are needed for each logged value.
+        Called if the config is assigned and at each save, so that in place changes of the config
+        take effect at the latest with the next save.
+        """
+        config = self._config
+        self._is_numpy_streaming = config.numpy_log_mode.lower() == 'stream'
+        self._numpy_stream_buffer_size = config.numpy_stream_buffer_size
+        self._is_autosave = config.autosave.n_values is not None or config.autosave.interval is not None
+        self._is_tensorboard_async = config.tensorboard_async.is_active
+
+        if config.autosave.at_exit:
+            self._register_exit_handlers()
+
+
     @property
     def directory(self):
         directory = self.config.directory
@@ -84,9 +490,11 @@ class Logger:
         key = _get_safe_name(key)
 
         if key in self.numpy_data:
-            return self.numpy_data[key]
+            return self._get_numpy_values(key)
         elif key in self.object_data:
             return self.object_data[key]
+        elif key in self._object_stream_paths:
+            return eu.io.load_dill_stream(self._object_stream_paths[key])
         else:
             return None
 
@@ -94,11 +502,13 @@ class Logger:
     def __contains__(self, item):
         item = _get_safe_name(item)
 
-        return (item in self.numpy_data) or (item in self.object_data)
+        return (item in self.numpy_data) or (item in self.object_data) or (item in self._object_stream_paths)
 
 
     def items(self):
-        return list(self.numpy_data.items()) + list(self.object_data.items())
+        return ([(name, self._get_numpy_values(name)) for name in self.numpy_data]
+                + list(self.object_data.items())
+                + [(name, eu.io.load_dill_stream(path)) for name, path in self._object_stream_paths.items()])
 
 
     def clear(self, name=None):
@@ -114,34 +524,133 @@ class Logger:
         if name is None:
             self.numpy_data.clear()
             self.object_data.clear()
+
+            self._numpy_stream_directory = None
+            self._numpy_stream_lengths.clear()
+            self._numpy_unstreamable_names.clear()
+
+            # streamed objects are removed, otherwise they would be loaded with the log
+            for stream_path in self._object_stream_paths.values():
+                _remove_file_if_existing(stream_path)
+            self._object_stream_paths.clear()
+
+            self._dirty_names.clear()
+            self._last_save_target = None
+            self._numpy_saved_lengths.clear()
+            self._n_numpy_segments = 0
         else:
             if name not in self:
                 raise ValueError('Unknown data element with name {!r}!'.format(name))
 
             if name in self.numpy_data:
                 del self.numpy_data[name]
+                self._numpy_stream_lengths.pop(name, None)
+                self._numpy_unstreamable_names.discard(name)
+                # the saved values of the entry have to be overwritten
+                self._numpy_saved_lengths[name] = (0, None)
+
+            self._dirty_names.discard(name)
 
             if name in self.object_data:
-                del self.numpy_data[name]
+                del self.object_data[name]
+
+            stream_path = self._object_stream_paths.pop(name, None)
+            if stream_path is not None:
+                _remove_file_if_existing(stream_path)
 
 
     def add_value(self, name, val, log_to_tb=None, tb_global_step=None, tb_walltime=None):
 
         safe_name = _get_safe_name(name)
 
-        if safe_name not in self.numpy_data:
-            self.numpy_data[safe_name] = []
+        values = self.numpy_data.get(safe_name)
+        if values is None:
+            values = self.numpy_data[safe_name] = _ValueBuffer()
+
+        # inlined _ValueBuffer.append, as this is the hot path of the logger
+        pending = values._pending
+        pending.append(val)
+        if len(pending) >= _ValueBuffer.FLUSH_SIZE:
+            values.flush()
+        self._dirty_names.add(safe_name)
 
-        self.numpy_data[safe_name].append(val)
+        if self._is_numpy_streaming and len(values) >= self._numpy_stream_buffer_size:
+            self._stream_numpy_values(safe_name)
+
+        if self._is_autosave:
+            self._autosave_if_needed(1)
 
         if log_to_tb is True or (self._is_tensorboard_active and log_to_tb is not False):
             # identify if the value is a scalar, if yes, then add it to tensorboard
             if not isinstance(val, (list, tuple, np.ndarray)):
-                self.tensorboard.add_scalar(name, val, tb_global_step, tb_walltime)
+                self._tensorboard_target.add_scalar(name, val, tb_global_step, tb_walltime)
             else:
                 warnings.warn('Can not log value for "{}" to tensorboard as it is not a scalar. Value: {}'.format(name, val))
 
 
+    def add_values(self, name, values, log_to_tb=None, tb_global_step=None, tb_walltime=None):
+        """
+        Adds several values at once to a log entry.
+
+        :param name: Name of the log entry.
+        :param values: Array or list of values. Its first dimension is over the values.
+        :param log_to_tb: Should the values be logged to tensorboard. (default=None, i.e. if tensorboard is active)
+        :param tb_global_step: Either the global step of the first value, which is then increased by one
+                               for each following value, or a list with a global step for each value.
+        :param tb_walltime: Optional walltime for all values in tensorboard.
+        """
+
+        safe_name = _get_safe_name(name)
+
+        buffer = self.numpy_data.get(safe_name)
+        if buffer is None:
+            buffer = self.numpy_data[safe_name] = _ValueBuffer()
+
+        n_values = len(buffer)
+        buffer.extend(values)
+        self._dirty_names.add(safe_name)
+
+        if self._is_numpy_streaming and len(buffer) >= self._numpy_stream_buffer_size:
+            self._stream_numpy_values(safe_name)
+
+        if self._is_autosave:
+            self._autosave_if_needed(len(buffer) - n_values)
+
+        if log_to_tb is True or (self._is_tensorboard_active and log_to_tb is not False):
+            values = np.asarray(values)
+
+            if values.ndim != 1 or values.dtype.kind not in 'biuf':
+                warnings.warn('Can not log values for "{}" to tensorboard as they are not scalars.'.format(name))
+                return
+
+            if tb_global_step is None:
+                tb_global_steps = [None] * len(values)
+            elif np.ndim(tb_global_step) == 0:
+                tb_global_steps = range(tb_global_step, tb_global_step + len(values))
+            else:
+                tb_global_steps = tb_global_step
+
+            writer = self._tensorboard_target
+            for value, global_step in zip(values.tolist(), tb_global_steps):
+                writer.add_scalar(name, value, global_step, tb_walltime)
+
+
+    def add_row(self, values, log_to_tb=None, tb_global_step=None, tb_walltime=None):
+        """
+        Adds a single value to each of several log entries.
+
+        :param values: Dictionary with the names of the log entries as keys and the values to add as values.
+        :param log_to_tb: Should the values be logged to tensorboard. (default=None, i.e. if tensorboard is active)
+        :param tb_global_step: Global step of the values in tensorboard.
+        :param tb_walltime: Optional walltime of the values in tensorboard.
+        """
+
+        is_log_to_tb = log_to_tb is True or (self._is_tensorboard_active and log_to_tb is not False)
+
+        for name, val in values.items():
+            self.add_value(name, val, log_to_tb=is_log_to_tb, tb_global_step=tb_global_step, tb_walltime=tb_walltime)
+
+
     def add_scalar(self, name, scalar, log_to_tb=None, tb_global_step=None, tb_walltime=None):
         # same functionality as add_value, but is more consistent with the naming of tensorboard API
         self.add_value(name, scalar, log_to_tb=log_to_tb, tb_global_step=tb_global_step, tb_walltime=tb_walltime)
@@ -152,30 +661,52 @@ class Logger:
         safe_name = _get_safe_name(name)
 
         if safe_name not in self.numpy_data:
-            self.numpy_data[safe_name] = []
+            self.numpy_data[safe_name] = _ValueBuffer()
 
         self.numpy_data[safe_name].append(values)
+        self._dirty_names.add(safe_name)
+
+        if self._is_numpy_streaming and len(self.numpy_data[safe_name]) >= self._numpy_stream_buffer_size:
+            self._stream_numpy_values(safe_name)
+
+        if self._is_autosave:
+            self._autosave_if_needed(1)
 
         if log_to_tb is True or (self._is_tensorboard_active and log_to_tb is not False):
             # values must be a numpy array
             values = np.array(values)
-            self.tensorboard.add_histogram(name, values, global_step=tb_global_step, walltime=tb_walltime)
+            self._tensorboard_target.add_histogram(name, values, global_step=tb_global_step, walltime=tb_walltime)
 
 
-    def add_object(self, name, obj):
+    def add_object(self, name, obj, copy_mode=None):
         """
         Adds an object to the log that will be saved in a dill file when the log is saved.
 
-        :param name:
-        :param obj:
-        :return:
+        :param name: Name of the log entry.
+        :param obj: Object that is added.
+        :param copy_mode: How the object is added: 'deepcopy', 'none', or 'serialize-now'.
+                          See the object_copy_mode configuration. (default=None, uses the configuration)
         """
         name = _get_safe_name(name)
 
-        if name not in self.object_data:
-            self.object_data[name] = []
+        if copy_mode is None:
+            copy_mode = self.config.object_copy_mode
+
+        if copy_mode == 'serialize-now' or name in self._object_stream_paths:
+            # objects of an entry that is streamed are always appended to its file
+            self._stream_object(name, obj)
+        elif copy_mode in ['deepcopy', 'none']:
+            objs = self.object_data.get(name)
+            if objs is None:
+                objs = self.object_data[name] = []
+            objs.append(copy.deepcopy(obj) if copy_mode == 'deepcopy' else obj)
+        else:
+            raise ValueError('Unknown object copy mode {!r}! Only \'deepcopy\', \'none\' and \'serialize-now\' are allowed.'.format(copy_mode))
+
+        self._dirty_names.add(name)
 
-        self.object_data[name].append(copy.deepcopy(obj))
+        if self._is_autosave:
+            self._autosave_if_needed(1)
 
 
     def add_single_object(self, name, obj, directory=None):
@@ -211,25 +742,16 @@ class Logger:
         if directory is None:
             raise ValueError('A directory in which the log will be saved must be provided!')
 
-        # make sure the dsirectory exists
-        eu.io.makedirs(directory)
-
-        # numpy data
-
-        if self.config.numpy_log_mode.lower() == 'npy':
-            path = directory
-        else:
-            path = os.path.join(directory, self.config.numpy_npz_filename)
-
-        eu.io.save_dict_to_numpy_files(self.numpy_data, path, self.config.numpy_log_mode)
+        # finish a running autosave before the same files are written again
+        self._wait_for_autosave()
 
-        # object data
-        for obj_name, obj in self.object_data.items():
-            file_path = os.path.join(directory, obj_name)
-            eu.io.save_dill(obj, file_path)
+        save_data = self._get_save_data(directory)
+        self._write_save_data(save_data)
 
         # save also tensorboard if one exists
-        if self._tensorboard_writer is not None:
+        if self._tensorboard_forwarder is not None:
+            self._tensorboard_forwarder.flush()
+        elif self._tensorboard_writer is not None:
             self._tensorboard_writer.flush()
 
 
@@ -239,6 +761,8 @@ class Logger:
         if directory is None:
             raise ValueError('A directory in which the log will be saved must be provided!')
 
+        self._wait_for_autosave()
+
         self.numpy_data = eu.io.load_numpy_files(directory)
 
         # in the case that all data was logged into a npz file
@@ -246,7 +770,18 @@ class Logger:
             self.numpy_data = self.numpy_data['logging']
 
         for key, item in self.numpy_data.items():
-            self.numpy_data[key] = item.tolist()
+            self.numpy_data[key] = _ValueBuffer.from_values(item)
+
+        self._numpy_stream_directory = None
+        self._numpy_stream_lengths = dict()
+        self._numpy_unstreamable_names = set()
+
+        self._object_stream_paths = dict()
+
+        self._dirty_names = set()
+        self._last_save_target = None
+        self._numpy_saved_lengths = dict()
+        self._n_numpy_segments = 0
 
         if load_objects:
             self.object_data = eu.io.load_dill_files(directory)
@@ -254,6 +789,341 @@ class Logger:
             self.object_data = dict()
 
 
+    def _get_save_data(self, directory, is_copy=False):
+        """
+        Collects the data that has to be written to save the log.
+
+        If the log was already saved to the same directory, then only entries that changed since
+        then are collected. For these, only the values that were added since then are collected if
+        they can be appended to the existing files.
+        """
+
+        # apply changes of the config that were done in place
+        self._apply_config()
+
+        numpy_log_mode = self.config.numpy_log_mode.lower()
+
+        save_target = (os.path.abspath(directory), numpy_log_mode)
+        if save_target == self._last_save_target:
+            names = self._dirty_names
+        else:
+            names = set(self.numpy_data.keys()) | set(self.object_data.keys()) | set(self._object_stream_paths.keys())
+            self._numpy_saved_lengths = dict()
+            self._n_numpy_segments = 0
+
+        # numpy data
+
+        numpy_names = [name for name in names if name in self.numpy_data]
+
+        if self._is_numpy_streaming or self._numpy_stream_lengths:
+            # append all values that are still in memory to their files
+            # entries that can not be streamed are saved as a whole
+            for name in numpy_names:
+                self._stream_numpy_values(name, directory=directory)
+
+            numpy_names = [name for name in numpy_names if name not in self._numpy_stream_lengths]
+
+        is_numpy_container = numpy_log_mode in ['npz', 'cnpz']
+
+        if is_numpy_container:
+            # all entries are combined in a container file
+            # append a segment with the new values to it, or rewrite it if this is not possible
+            is_numpy_segment = (
+                save_target == self._last_save_target
+                and self._n_numpy_segments < self.config.numpy_npz_max_segments
+                and all(self._is_numpy_values_appendable(name, is_new_appendable=True) for name in numpy_names)
+                and all(is_typed is not None for _, is_typed in self._numpy_saved_lengths.values()))
+
+            if not is_numpy_segment:
+                numpy_names = list(self.numpy_data.keys())
+                self._numpy_saved_lengths = dict()
+                self._n_numpy_segments = 0
+            elif numpy_names:
+                self._n_numpy_segments += 1
+        else:
+            is_numpy_segment = False
+
+        numpy_data = dict()
+        numpy_appended_names = set()
+        for name in numpy_names:
+            values = self.numpy_data[name]
+
+            if is_numpy_segment or (values.is_typed and self._is_numpy_values_appendable(name)):
+                values_array = values.to_array(start=self._numpy_saved_lengths.get(name, (0,))[0])
+                numpy_appended_names.add(name)
+            else:
+                values_array = values.to_array()
+
+            numpy_data[name] = values_array.copy() if is_copy else values_array
+            self._numpy_saved_lengths[name] = (len(values), values.is_typed)
+
+        if is_numpy_container:
+            path = os.path.join(directory, self.config.numpy_npz_filename)
+            if is_numpy_segment:
+                path = eu.io.numpy.get_numpy_segment_file_path(path, self._n_numpy_segments)
+            is_write_numpy_data = bool(numpy_data) or not is_numpy_segment
+        else:
+            path = directory
+            is_write_numpy_data = bool(numpy_data)
+
+        # object data
+
+        object_data = {name: list(self.object_data[name]) for name in names if name in self.object_data}
+
+        # streamed objects are copied if the log is saved to another directory than their stream
+        object_stream_copies = dict()
+        for name in names:
+            stream_path = self._object_stream_paths.get(name)
+            if stream_path is not None:
+                file_path = os.path.join(directory, os.path.basename(stream_path))
+                if os.path.abspath(file_path) != os.path.abspath(stream_path):
+                    object_stream_copies[stream_path] = file_path
+
+        names = set(names)
+        self._dirty_names = set()
+        self._last_save_target = save_target
+        self._n_values_since_save = 0
+        self._last_save_time = time.monotonic()
+
+        return AttrDict(
+            names=names,
+            directory=directory,
+            numpy_log_mode=numpy_log_mode,
+            numpy_path=path,
+            numpy_data=numpy_data,
+            numpy_appended_names=numpy_appended_names,
+            is_numpy_segment=is_numpy_segment,
+            is_write_numpy_data=is_write_numpy_data,
+            object_data=object_data,
+            object_stream_copies=object_stream_copies)
+
+
+    def _is_numpy_values_appendable(self, name, is_new_appendable=False):
+        """
+        True if the values of an entry that were added since the last save can be appended to its saved values.
+        Ragged or non numeric values are never appendable, as their new values might not have a
+        shape that can be concatenated with the saved ones.
+        """
+        values = self.numpy_data[name]
+        if not values.is_typed:
+            return False
+        if name not in self._numpy_saved_lengths:
+            return is_new_appendable
+        n_saved_values, is_saved_typed = self._numpy_saved_lengths[name]
+        return is_saved_typed and n_saved_values <= len(values)
+
+
+    def _write_save_data(self, save_data):
+        """Writes the data that was collected to save the log."""
+
+        # make sure the directory exists
+        eu.io.makedirs(save_data.directory)
+
+        # numpy data
+        if save_data.is_write_numpy_data:
+            if save_data.numpy_log_mode in ['npy', 'stream']:
+                for name, values in save_data.numpy_data.items():
+                    file_path = os.path.join(save_data.directory, name + eu.io.numpy.NUMPY_FILE_EXTENSION)
+                    if values.dtype.hasobject:
+                        np.save(file_path, values)
+                    else:
+                        # write typed values in a format to which the next values can be appended
+                        eu.io.append_to_numpy_file(
+                            file_path,
+                            values,
+                            is_overwrite=name not in save_data.numpy_appended_names)
+            else:
+                eu.io.save_dict_to_numpy_files(save_data.numpy_data, save_data.numpy_path, save_data.numpy_log_mode)
+
+                if not save_data.is_numpy_segment:
+                    # remove segments of a previous container
+                    for segment_file_path in eu.io.numpy.get_numpy_segment_file_paths(save_data.numpy_path):
+                        os.remove(segment_file_path)
+
+        # object data
+        for obj_name, obj in save_data.object_data.items():
+            file_path = os.path.join(save_data.directory, obj_name)
+            eu.io.save_dill(obj, file_path)
+            # a stream file of the entry is outdated and would be loaded instead of the saved objects
+            _remove_file_if_existing(file_path + '.' + eu.io.dill.DILL_STREAM_FILE_EXTENSION)
+
+        for stream_path, file_path in save_data.object_stream_copies.items():
+            shutil.copyfile(stream_path, file_path)
+
+
+    def _autosave_if_needed(self, n_added_values):
+        """Saves the log if the autosave policy requires it."""
+
+        self._n_values_since_save += n_added_values
+
+        autosave_config = self._config.autosave
+
+        is_save = (autosave_config.n_values is not None and self._n_values_since_save >= autosave_config.n_values) \
+                  or (autosave_config.interval is not None and time.monotonic() - self._last_save_time >= autosave_config.interval)
+
+        if is_save:
+            self.autosave()
+
+
+    def autosave(self):
+        """
+        Saves all entries that changed since the last save to the log directory.
+        If configured, the entries are written in a background thread.
+        Values of the 'stream' numpy log mode are still appended to their files in the logging thread.
+        If the background write fails, a warning is given and the entries are saved again by the next save.
+        """
+
+        if not self._config.autosave.is_background:
+            self.save()
+            return
+
+        if self._autosave_thread is not None and self._autosave_thread.is_alive():
+            # the previous autosave is still writing, changed entries are saved by the next autosave
+            return
+
+        self._handle_failed_autosave()
+
+        # collect the data in the logging thread and only write it in the background
+        save_data = self._get_save_data(self.directory, is_copy=True)
+
+        self._autosave_thread = threading.Thread(
+            target=self._write_autosave_data,
+            args=(save_data,),
+            daemon=True)
+        self._autosave_thread.start()
+
+
+    def _write_autosave_data(self, save_data):
+        try:
+            self._write_save_data(save_data)
+        except Exception as e:
+            warnings.warn('Autosave of the log to {!r} failed: {}'.format(save_data.directory, e))
+            self._failed_autosave_names = save_data.names
+
+
+    def _wait_for_autosave(self):
+        """Waits until a running autosave has finished writing."""
+        if self._autosave_thread is not None:
+            self._autosave_thread.join()
+            self._autosave_thread = None
+        self._handle_failed_autosave()
+
+
+    def _handle_failed_autosave(self):
+        """Marks the entries of a failed autosave as changed, so that they are saved as a whole by the next save."""
+        if self._failed_autosave_names is not None:
+            self._dirty_names.update(self._failed_autosave_names)
+            # the files might be partially written, thus all entries are rewritten instead of appended
+            self._last_save_target = None
+            self._failed_autosave_names = None
+
+
+    def _register_exit_handlers(self):
+        """Registers handlers that save the log when the process exits or is terminated."""
+
+        if getattr(self, '_is_exit_handlers_registered', False):
+            return
+        self._is_exit_handlers_registered = True
+
+        logger_ref = weakref.ref(self)
+        atexit.register(_save_logger_at_exit, logger_ref)
+
+        try:
+            previous_handler = signal.getsignal(signal.SIGTERM)
+            signal.signal(signal.SIGTERM, lambda signum, frame: _save_logger_at_signal(logger_ref, previous_handler, signum, frame))
+        except ValueError:
+            # signal handlers can only be set in the main thread
+            warnings.warn('Could not register a handler to save the log if the process is terminated. It is only saved at a normal exit.')
+
+
+    def _save_at_exit(self):
+        """Saves the log if entries changed since the last save."""
+        self._wait_for_autosave()
+        if self._dirty_names:
+            self.save()
+
+
+    def _get_numpy_values(self, name):
+        """
+        Returns all values of a numpy data entry including the ones that were already streamed to disk.
+        Numeric values are returned as a copy of the buffer, as the buffer is reused for the following values.
+        """
+
+        values = self.numpy_data[name]
+
+        if name in self._numpy_stream_lengths:
+            file_path = os.path.join(self._numpy_stream_directory, name + eu.io.numpy.NUMPY_FILE_EXTENSION)
+            streamed_values = np.load(file_path, allow_pickle=False)
+            if len(values) > 0:
+                streamed_values = np.concatenate([streamed_values, values.values])
+            return streamed_values
+
+        if values.is_typed:
+            return values.values.copy()
+        return values.values
+
+
+    def _stream_numpy_values(self, name, directory=None):
+        """Appends the values of a numpy data entry that are in memory to its npy file and removes them from memory."""
+
+        values = self.numpy_data[name]
+
+        if len(values) == 0 or name in self._numpy_unstreamable_names:
+            return
+
+        if directory is None:
+            directory = self.directory
+
+        if self._numpy_stream_directory is None:
+            self._numpy_stream_directory = directory
+        elif os.path.abspath(directory) != os.path.abspath(self._numpy_stream_directory):
+            raise ValueError('Log entries were already streamed to the directory {!r}. Can not stream them to a different directory {!r}!'.format(
+                self._numpy_stream_directory, directory))
+
+        file_path = os.path.join(self._numpy_stream_directory, name + eu.io.numpy.NUMPY_FILE_EXTENSION)
+
+        try:
+            if not values.is_typed:
+                raise ValueError('Values of log entry {!r} are ragged or not numeric!'.format(name))
+
+            eu.io.append_to_numpy_file(
+                file_path,
+                values.values,
+                is_overwrite=name not in self._numpy_stream_lengths)
+        except ValueError:
+            # ragged data or objects can not be appended to a file, hold them in memory until the log is saved
+            warnings.warn('Values of log entry {!r} can not be streamed to disk. They are held in memory until the log is saved.'.format(name))
+
+            if name in self._numpy_stream_lengths:
+                self.numpy_data[name] = _ValueBuffer.from_values(list(np.load(file_path, allow_pickle=False)) + list(values.values))
+                del self._numpy_stream_lengths[name]
+
+            self._numpy_unstreamable_names.add(name)
+            return
+
+        self._numpy_stream_lengths[name] = self._numpy_stream_lengths.get(name, 0) + len(values)
+        values.clear()
+
+
+    def _stream_object(self, name, obj):
+        """Serializes an object and appends it to the dillstream file of its entry."""
+
+        stream_path = self._object_stream_paths.get(name)
+
+        if stream_path is None:
+            stream_path = os.path.join(self.directory, name + '.' + eu.io.dill.DILL_STREAM_FILE_EXTENSION)
+
+            # objects of the entry that are in memory start the stream
+            objs = self.object_data.pop(name, []) + [obj]
+            eu.io.append_to_dill_stream(objs[0], stream_path, is_overwrite=True)
+            for stream_obj in objs[1:]:
+                eu.io.append_to_dill_stream(stream_obj, stream_path)
+
+            self._object_stream_paths[name] = stream_path
+        else:
+            eu.io.append_to_dill_stream(obj, stream_path)
+
+
     @property
     def is_tensorboard_active(self):
         """Return True if a tensorboard is active and can be used, otherwise False."""
@@ -270,6 +1140,26 @@ class Logger:
         return self._tensorboard_writer
 
 
+    @property
+    def _tensorboard_target(self):
+        """Object to which values for tensorboard are given. Either the writer or a forwarder to it."""
+
+        if self._is_tensorboard_async:
+            if self._tensorboard_forwarder is None:
+                self._tensorboard_forwarder = _TensorboardForwarder(
+                    self.tensorboard,
+                    buffer_size=self.config.tensorboard_async.buffer_size,
+                    full_buffer_policy=self.config.tensorboard_async.full_buffer_policy)
+            return self._tensorboard_forwarder
+
+        if self._tensorboard_forwarder is not None:
+            # forward the remaining values if the asynchronous mode was deactivated
+            self._tensorboard_forwarder.close()
+            self._tensorboard_forwarder = None
+
+        return self.tensorboard
+
+
     def create_tensorboard(self, config=None, **kwargs):
         """Creates a tensorboard"""
 
@@ -310,6 +1200,11 @@ class Logger:
         dt = datetime.now()
         self.config.tensorboard.log_dir = os.path.join(self.config.tensorboard.log_dir, dt.strftime('%y.%m.%d_%H.%M'))
 
+        if self._tensorboard_forwarder is not None:
+            # forward the remaining values to the old writer
+            self._tensorboard_forwarder.close()
+            self._tensorboard_forwarder = None
+
         if self._tensorboard_writer is not None:
             self._tensorboard_writer.flush()
             warnings.warn('Tensorboard SummaryWriter existed already. Creating a new one ...')
@@ -335,4 +1230,7 @@ class Logger:
         """Deactivates the tensorboard to automatically also log values that are given to the log."""
         if self._is_tensorboard_active:
             self._is_tensorboard_active = False
-            self._tensorboard_writer.flush()
+            if self._tensorboard_forwarder is not None:
+                self._tensorboard_forwarder.flush()
+            else:
+                self._tensorboard_writer.flush()
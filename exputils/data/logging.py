@@ -9,7 +9,7 @@
 ##
 import exputils as eu
 from exputils.data.logger import Logger
-from typing import Optional
+from typing import Optional, Union
 
 # holds the global logger object
 log = Logger()
@@ -102,7 +102,9 @@ def get_item(name: str) -> object:
             Name of the log entry.
 
     Returns:
-        Logged data. Usually in form of a numpy array.
+        Logged data. Numeric values are returned as a numpy array that is a copy of the log entry.
+        Ragged or non numeric values, for example strings, are returned as a list.
+        Note: Previous versions returned all values as a list.
     """
     return log[name]
 
@@ -136,6 +138,71 @@ def add_value(name: str,
     log.add_value(name, value, log_to_tb, tb_global_step, tb_walltime)
 
 
+def add_values(name: str,
+               values,
+               log_to_tb: Optional[bool] = None,
+               tb_global_step: Optional[Union[int, list]] = None,
+               tb_walltime: Optional[float] = None):
+    """
+    Adds several values at once to a log entry with optional parallel TensorBoard logging.
+
+    Faster than adding each value with [add_value][exputils.data.logging.add_value], for example
+    to log the rewards of several environments or the losses of a whole epoch.
+
+    Parameters:
+        name (str):
+            The name of the entry where the values are added.
+        values (Any):
+            Array or list of values to be added. Its first dimension is over the values.
+        log_to_tb (bool):
+            Defines of the values should be logged to TensorBoard in parallel to the standard log.
+            If True, log the values to TensorBoard.
+            If False, do not log the values to TensorBoard.
+            If not specified, then they get logged if TensorBoard is globally activated.
+            See [activate_tensorboard][exputils.data.logging.activate_tensorboard] for more details.
+            Only scalar values can be logged to TensorBoard.
+        tb_global_step (int, list):
+            If logging to TensorBoard is active, then this is either the global step of the first
+            value, which is increased by one for each following value, or a list with the global
+            step of each value.
+        tb_walltime (float):
+            If logging to TensorBoard is active, then this is an optional override for the walltime
+            in TensorBoard.
+    """
+    log.add_values(name, values, log_to_tb, tb_global_step, tb_walltime)
+
+
+def add_row(values: dict,
+            log_to_tb: Optional[bool] = None,
+            tb_global_step: Optional[int] = None,
+            tb_walltime: Optional[float] = None):
+    """
+    Adds a single value to each of several log entries.
+
+    Example:
+        ```python
+        log.add_row({'loss': loss, 'reward': reward}, tb_global_step=step)
+        ```
+
+    Parameters:
+        values (dict):
+            Dictionary with the names of the log entries as keys and the values to be added as values.
+        log_to_tb (bool):
+            Defines of the values should be logged to TensorBoard in parallel to the standard log.
+            If True, log the values to TensorBoard.
+            If False, do not log the values to TensorBoard.
+            If not specified, then they get logged if TensorBoard is globally activated.
+            See [activate_tensorboard][exputils.data.logging.activate_tensorboard] for more details.
+        tb_global_step (int):
+            If logging to TensorBoard is active, then this is the global step value to record with
+            the values in TensorBoard.
+        tb_walltime (float):
+            If logging to TensorBoard is active, then this is an optional override for the walltime
+            in TensorBoard.
+    """
+    log.add_row(values, log_to_tb, tb_global_step, tb_walltime)
+
+
 def add_scalar(name: str,
               scalar,
               log_to_tb: Optional[bool] = None,
@@ -212,13 +279,16 @@ def get_values(name: str):
             Name of the log entry.
 
     Returns:
-        Logged data. Usually in form of a numpy array.
+        Logged data. Numeric values are returned as a numpy array that is a copy of the log entry.
+        Ragged or non numeric values, for example strings, are returned as a list.
+        Note: Previous versions returned all values as a list.
     """
     return log[name]
 
 
 def add_object(name: str,
-               obj: object):
+               obj: object,
+               copy_mode: Optional[str] = None):
     """
     Adds an object to a log entry. Objects are stored in a list and saved as dill files.
 
@@ -227,8 +297,16 @@ def add_object(name: str,
             The name of the log entry where the object is added.
         obj (object):
             The object to be added to the log.
-    """
-    log.add_object(name, obj)
+        copy_mode (str):
+            How the object is added to the log.
+            `'deepcopy'` holds a deep copy of the object in memory until the log is saved.
+            `'none'` holds the object itself without copying it.
+            `'serialize-now'` directly serializes the object and appends it to a dillstream file of
+            the entry so that it is not held in memory.
+            Default is None, which uses the `object_copy_mode` configuration of the log
+            (`'deepcopy'` if not changed).
+    """
+    log.add_object(name, obj, copy_mode=copy_mode)
 
 
 def get_objects(name: str) -> list:
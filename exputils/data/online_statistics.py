@@ -0,0 +1,261 @@
+##
+## This file is part of the exputils package.
+##
+## Copyright: INRIA
+## Year: 2022, 2023
+## Contact: chris.reinke@inria.fr
+##
+## exputils is provided under GPL-3.0-or-later
+##
+import numpy as np
+import exputils as eu
+from typing import Optional
+
+
+class OnlineStatistic:
+    """
+    Base class for statistics that are calculated over the repetitions of an experiment by
+    consuming the data of one repetition at a time.
+
+    Online statistics are used with the `'online'` statistic type of
+    [calc_statistics_over_repetitions][exputils.data.statistics.calc_statistics_over_repetitions]:
+    `('reward_mean', eu.data.OnlineMeanVar('reward'), 'online')`.
+    For each experiment a copy of the given statistic object is created, to which the data of each
+    repetition is added with `add`. Afterwards `result` returns the statistic.
+
+    The data of the datasource can be a scalar or a numpy array per repetition.
+    Arrays of different repetitions can have different lengths.
+    Nan values are handled as missing values.
+    Repetitions that do not have data for the datasource are skipped and counted in `n_missing`.
+
+    Parameters:
+        datasource (str): Datasource in the repetition data, for example `'reward'` or `'sub.reward[:, 0]'`.
+    """
+
+    def __init__(self, datasource: str):
+        self.datasource = datasource
+        self.n_missing = 0
+
+
+    def add(self, repetition_data: dict):
+        """Adds the data of a repetition. Repetitions without data for the datasource are skipped."""
+        try:
+            value = eu.misc.get_dict_variable(repetition_data, self.datasource)
+        except (KeyError, IndexError):
+            self.n_missing += 1
+            return
+        self._add_value(np.asarray(value, dtype=float))
+
+
+    def _add_value(self, value: np.ndarray):
+        raise NotImplementedError()
+
+
+    def result(self) -> dict:
+        """Returns the statistic as a dictionary of numpy arrays."""
+        raise NotImplementedError()
+
+
+    def _get_params(self) -> dict:
+        return dict(datasource=self.datasource)
+
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(k, v) for k, v in self._get_params().items()))
+
+
+class OnlineMeanVar(OnlineStatistic):
+    """
+    Elementwise mean, variance and standard deviation over repetitions using Welford's algorithm.
+
+    The result has the entries `mean`, `var`, `std` and `n`, which is the number of repetitions
+    that had a value for each element.
+
+    Parameters:
+        datasource (str): Datasource in the repetition data.
+        ddof (int): Delta degrees of freedom of the variance. Defaults to 0.
+    """
+
+    def __init__(self, datasource: str, ddof: int = 0):
+        super().__init__(datasource)
+        self.ddof = ddof
+        self._n = np.zeros(0, dtype=int)
+        self._mean = np.zeros(0)
+        self._m2 = np.zeros(0)
+
+
+    def _add_value(self, value):
+        self._n, self._mean, self._m2 = _grow_to_shape([self._n, self._mean, self._m2], value.shape, [0, 0.0, 0.0])
+        slices = _get_slices(value.shape)
+
+        is_valid = ~np.isnan(value)
+        value = np.where(is_valid, value, 0.0)
+
+        n = self._n[slices] + is_valid
+        delta = np.where(is_valid, value - self._mean[slices], 0.0)
+        mean = self._mean[slices] + delta / np.maximum(n, 1)
+        self._m2[slices] = self._m2[slices] + delta * (value - mean) * is_valid
+        self._mean[slices] = mean
+        self._n[slices] = n
+
+
+    def result(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(self._n > 0, self._mean, np.nan)
+            var = np.where(self._n > self.ddof, self._m2 / (self._n - self.ddof), np.nan)
+        return dict(mean=mean, var=var, std=np.sqrt(var), n=self._n.copy())
+
+
+    def _get_params(self):
+        return dict(datasource=self.datasource, ddof=self.ddof)
+
+
+class OnlineMinMax(OnlineStatistic):
+    """
+    Elementwise minimum and maximum over repetitions.
+
+    The result has the entries `min` and `max`.
+
+    Parameters:
+        datasource (str): Datasource in the repetition data.
+    """
+
+    def __init__(self, datasource: str):
+        super().__init__(datasource)
+        self._min = np.zeros(0)
+        self._max = np.zeros(0)
+
+
+    def _add_value(self, value):
+        self._min, self._max = _grow_to_shape([self._min, self._max], value.shape, [np.nan, np.nan])
+        slices = _get_slices(value.shape)
+        self._min[slices] = np.fmin(self._min[slices], value)
+        self._max[slices] = np.fmax(self._max[slices], value)
+
+
+    def result(self):
+        return dict(min=self._min.copy(), max=self._max.copy())
+
+
+class OnlineQuantiles(OnlineStatistic):
+    """
+    Elementwise quantiles over repetitions that are estimated from a uniform random sample of the
+    values of each element (reservoir sampling).
+    The quantiles are exact as long as the number of repetitions is not larger than the sample size.
+
+    The result has the entries `quantiles`, whose first dimension is over the quantiles `q`, and `q`.
+
+    Parameters:
+        datasource (str): Datasource in the repetition data.
+        q (list): Quantiles that are calculated, between 0 and 1. Defaults to `[0.25, 0.5, 0.75]`.
+        sample_size (int): Number of values that are kept per element. Defaults to 1000.
+        seed (int): Seed of the random sampling. Defaults to None.
+    """
+
+    def __init__(self, datasource: str, q: Optional[list] = None, sample_size: int = 1000, seed: Optional[int] = None):
+        super().__init__(datasource)
+        self.q = [0.25, 0.5, 0.75] if q is None else list(q)
+        self.sample_size = sample_size
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._n = np.zeros(0, dtype=int)
+        self._sample = np.zeros((sample_size, 0))
+
+
+    def _add_value(self, value):
+        self._n, = _grow_to_shape([self._n], value.shape, [0])
+        self._sample, = _grow_to_shape([self._sample], (self.sample_size,) + value.shape, [np.nan])
+        slices = _get_slices(value.shape)
+
+        is_valid = ~np.isnan(value)
+        n = self._n[slices]
+
+        # the first values of each element fill the sample, afterwards the n-th value replaces
+        # a random value in the sample with probability sample_size / n
+        sample_inds = np.where(n < self.sample_size, n, self._rng.integers(0, n + 1))
+        is_sampled = is_valid & (sample_inds < self.sample_size)
+
+        if value.ndim == 0:
+            if is_sampled:
+                self._sample[sample_inds] = value
+        else:
+            element_inds = np.nonzero(is_sampled)
+            self._sample[(sample_inds[element_inds],) + element_inds] = value[element_inds]
+
+        self._n[slices] = n + is_valid
+
+
+    def result(self):
+        if self._sample.shape[0] == 0 or np.all(np.isnan(self._sample)):
+            quantiles = np.full((len(self.q),) + self._sample.shape[1:], np.nan)
+        else:
+            with np.errstate(invalid='ignore'):
+                quantiles = np.nanquantile(self._sample, self.q, axis=0)
+        return dict(quantiles=quantiles, q=np.array(self.q))
+
+
+    def _get_params(self):
+        return dict(datasource=self.datasource, q=self.q, sample_size=self.sample_size, seed=self.seed)
+
+
+class OnlineHistogram(OnlineStatistic):
+    """
+    Histogram of all values of all repetitions.
+
+    The result has the entries `counts` and `bin_edges`.
+
+    Parameters:
+        datasource (str): Datasource in the repetition data.
+        bins (int, list): Number of equal-width bins in the given range, or a list with the bin edges.
+            Defaults to 10.
+        range (tuple): Lower and upper range of the bins if `bins` is an integer.
+            Has to be given if `bins` is an integer, as the range can not be known before all
+            repetitions are seen.
+    """
+
+    def __init__(self, datasource: str, bins=10, range: Optional[tuple] = None):
+        super().__init__(datasource)
+        if np.ndim(bins) == 0 and range is None:
+            raise ValueError('The range of the histogram has to be given if the number of bins is given!')
+        self.bins = bins
+        self.range = range
+        self._bin_edges = np.histogram_bin_edges([], bins=bins, range=range)
+        self._counts = np.zeros(len(self._bin_edges) - 1, dtype=int)
+
+
+    def _add_value(self, value):
+        value = value[~np.isnan(value)]
+        self._counts += np.histogram(value, bins=self._bin_edges)[0]
+
+
+    def result(self):
+        return dict(counts=self._counts.copy(), bin_edges=self._bin_edges.copy())
+
+
+    def _get_params(self):
+        return dict(datasource=self.datasource, bins=self.bins, range=self.range)
+
+
+def _get_slices(shape):
+    return tuple(slice(0, d) for d in shape)
+
+
+def _grow_to_shape(arrays, shape, fill_values):
+    """Enlarges the arrays so that they have at least the given shape. New elements are set to the fill values."""
+
+    if arrays[0].ndim != len(shape):
+        if arrays[0].size != 0:
+            raise ValueError('The data of all repetitions must have the same number of dimensions!')
+        # first data defines the number of dimensions
+        return [np.full(shape, fill_value, dtype=array.dtype) for array, fill_value in zip(arrays, fill_values)]
+
+    new_shape = np.maximum(arrays[0].shape, shape)
+    if np.array_equal(new_shape, arrays[0].shape):
+        return arrays
+
+    grown_arrays = []
+    for array, fill_value in zip(arrays, fill_values):
+        grown_array = np.full(new_shape, fill_value, dtype=array.dtype)
+        grown_array[_get_slices(array.shape)] = array
+        grown_arrays.append(grown_array)
+    return grown_arrays
@@ -10,10 +10,10 @@
 import exputils as eu
 import warnings
 import numpy as np
+import copy
+from collections import OrderedDict
 
 # TODO: Feature - output_formats
-# TODO: Feature - data_filter
-# TODO: Feature - data_filter_inds
 
 def select_experiment_data(experiment_data, datasources, experiment_ids='all', repetition_ids='all', output_format=('S', 'E', 'D'), data_filter=None, data_filter_inds=None, experiment_descriptions=None, config=None, **kwargs):
     '''
@@ -30,6 +30,13 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
     :param experiment_ids: Experiment id, List of experiment ids, or 'all'. (Default: 'all')
     :param repetition_ids: Repetition id, List of repetition ids, or 'all', or 'none'. (Default: 'all')
                            'none' means that the data is not over repetitions.
+    :param data_filter: Filter condition over the repetition data of each experiment in the format of
+                        eu.misc.do_subdict_boolean_filtering, for example ('max_reward', '>', 10).
+                        Only repetitions for which it is True are selected. (Default: None)
+    :param data_filter_inds: Dictionary with boolean indices over the repetitions for each experiment id.
+                             The indices are over the loaded repetitions sorted by their ids, which can have
+                             gaps if repetitions were not loaded.
+                             Only repetitions for which they are True are selected. (Default: None)
     '''
 
     S, E, D = 'S', 'E', 'D'
@@ -67,18 +74,10 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
     elif not isinstance(repetition_ids, list):
         repetition_ids = [repetition_ids]
 
-
-    # if data_filter is not None and data_filter:
-    #     # go over all experiments and apply the filter to each of them individually
-    #     experiment_filter_inds = dict()
-    #
-    #     for exp_id in experiment_ids:
-    #
-    #     # filter data according data_filter the given filter
-    #         data_filter_inds = filter_single_experiment_data(rep_data, data_filter)
-    #
-    #         experiment_filter_inds[exp_id] = ...
-
+    # evaluate the filters once per experiment, the selected repetitions are then used for all datasources
+    filtered_repetition_ids = None
+    if data_filter or data_filter_inds is not None:
+        filtered_repetition_ids = _get_filtered_repetition_ids(experiment_data, experiment_ids, data_filter, data_filter_inds)
 
     # collect the data for each datasource and experiment
     collected_data = []
@@ -90,6 +89,9 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
             datasource = datasource[:-1]
             is_transpose = True
 
+        # parse the datasource only once for all experiments and repetitions
+        get_datasource_value = eu.misc.compile_dict_variable(datasource)
+
         # identify the type of data
         # 3 types exist:
         #   - exp_data: data directly for an experiment, does not contain single dataitems for repetitions
@@ -107,7 +109,7 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
             # first check if the data is in experiment data
             try:
                 # try if the data can be loaded from the experiment data (check for first experiment)
-                eu.misc.get_dict_variable(experiment_data[experiment_ids[0]], datasource)
+                get_datasource_value(experiment_data[experiment_ids[0]])
                 # yes --> experiment data
                 if repetition_ids == ['none']:
                     data_type = 'exp_data'
@@ -138,7 +140,7 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
                 if data_type == 'exp_data':
                     rep_ids = []
                     try:
-                        cur_data = eu.misc.get_dict_variable(experiment_data[experiment_id], datasource)
+                        cur_data = get_datasource_value(experiment_data[experiment_id])
                     except (KeyError, IndexError):
                         # data does not exists
                         warnings.warn('Data {!r} for experiment {!r} does not exist! Data is set to None.'.format(datasource,
@@ -152,9 +154,10 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
                     rep_ids = repetition_ids.copy()
                     if rep_ids == ['all']:
                         rep_ids = slice(None)
+                    rep_ids = _filter_repetition_ids(rep_ids, filtered_repetition_ids, experiment_id)
 
                     try:
-                        cur_data = eu.misc.get_dict_variable(experiment_data[experiment_id], datasource)
+                        cur_data = get_datasource_value(experiment_data[experiment_id])
                         cur_data = cur_data[rep_ids]
                     except (KeyError, IndexError):
                         # data does not exists
@@ -173,78 +176,98 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
 
                     rep_ids = repetition_ids.copy()
                     if rep_ids == ['all']:
-                        n_loaded_repetitions = len(cur_repetition_data)
-                        rep_ids = list(range(n_loaded_repetitions))
-
-                    # go over each repetition and store data in a list
-                    cur_data_per_rep = []
-                    is_numpy_array_type = True
-                    final_np_array_shape = []
-                    is_data_exist_inds = []
-                    for rep_id in rep_ids:
-
-                        try:
-                            cur_rep_data = eu.misc.get_dict_variable(cur_repetition_data[rep_id], datasource)
-                            is_data_exist_inds.append(True)
-                        except (KeyError, IndexError):
-                            # data does not exists in this repetition
-                            warnings.warn('Data {!r} for repetition {!r} of experiment {!r} does not exist.'.format(datasource, rep_id, experiment_id))
-                            cur_rep_data = None
-                            is_data_exist_inds.append(False)
-
-                        cur_data_per_rep.append(cur_rep_data)
-
-                        # detetct if the data can be put into an numpy array,
-                        # and detect the maximum shape of the array
-                        if is_numpy_array_type and is_data_exist_inds[-1]:
-
-                            cur_np_array_shape = None
-                            if np.isscalar(cur_rep_data):
-                                cur_np_array_shape = [1]
-                            elif isinstance(cur_rep_data, np.ndarray):
-                                cur_np_array_shape = cur_rep_data.shape
-                            else:
-                                is_numpy_array_type = False
-
-                            if cur_np_array_shape is not None:
-                                # check if all data have same number of dimensions
-                                if not final_np_array_shape:
-                                    final_np_array_shape = cur_np_array_shape
-                                elif len(final_np_array_shape) == len(cur_np_array_shape):
-                                    final_np_array_shape = np.maximum(final_np_array_shape, cur_np_array_shape)
+                        # all repetitions that are selected by the filters, otherwise all loaded repetitions
+                        rep_ids = _filter_repetition_ids(slice(None), filtered_repetition_ids, experiment_id)
+                        if isinstance(rep_ids, slice):
+                            n_loaded_repetitions = len(cur_repetition_data)
+                            rep_ids = list(range(n_loaded_repetitions))
+                    else:
+                        rep_ids = _filter_repetition_ids(rep_ids, filtered_repetition_ids, experiment_id)
+
+                    stacked_data = _get_stacked_repetition_data(experiment_data[experiment_id], datasource, len(cur_repetition_data))
+
+                    if stacked_data is not None and rep_ids and all(isinstance(rep_id, (int, np.integer)) and 0 <= rep_id < len(stacked_data.data) for rep_id in rep_ids):
+                        # use the data that was stacked over repetitions during loading
+                        if list(rep_ids) == list(range(len(stacked_data.data))):
+                            cur_data = stacked_data.data
+                        else:
+                            # remove the padding that is not needed for the selected repetitions
+                            mask = stacked_data.mask[rep_ids]
+                            slices = [slice(None)]
+                            for axis in range(1, mask.ndim):
+                                is_used = np.any(mask, axis=tuple(a for a in range(mask.ndim) if a != axis))
+                                slices.append(slice(0, np.flatnonzero(is_used)[-1] + 1 if np.any(is_used) else 0))
+                            cur_data = stacked_data.data[rep_ids][tuple(slices)]
+                    else:
+                        # go over each repetition and store data in a list
+                        cur_data_per_rep = []
+                        is_numpy_array_type = True
+                        final_np_array_shape = []
+                        is_data_exist_inds = []
+                        for rep_id in rep_ids:
+
+                            try:
+                                cur_rep_data = get_datasource_value(cur_repetition_data[rep_id])
+                                is_data_exist_inds.append(True)
+                            except (KeyError, IndexError):
+                                # data does not exists in this repetition
+                                warnings.warn('Data {!r} for repetition {!r} of experiment {!r} does not exist.'.format(datasource, rep_id, experiment_id))
+                                cur_rep_data = None
+                                is_data_exist_inds.append(False)
+
+                            cur_data_per_rep.append(cur_rep_data)
+
+                            # detetct if the data can be put into an numpy array,
+                            # and detect the maximum shape of the array
+                            if is_numpy_array_type and is_data_exist_inds[-1]:
+
+                                cur_np_array_shape = None
+                                if np.isscalar(cur_rep_data):
+                                    cur_np_array_shape = [1]
+                                elif isinstance(cur_rep_data, np.ndarray):
+                                    cur_np_array_shape = cur_rep_data.shape
                                 else:
                                     is_numpy_array_type = False
 
-                    if is_numpy_array_type:
-                        # if the data can be transformed into a numpy array
-                        if len(final_np_array_shape) == 1 and final_np_array_shape[0] == 1:
-                            # if the data per repetition is only a scalar, then do not create
-                            # create an extra dimensions for it, this replicates the default beahvior of numpy
-                            data_shape = [len(cur_data_per_rep)]
-                        else:
-                            data_shape = [len(cur_data_per_rep)] + list(final_np_array_shape)
+                                if cur_np_array_shape is not None:
+                                    # check if all data have same number of dimensions
+                                    if not final_np_array_shape:
+                                        final_np_array_shape = cur_np_array_shape
+                                    elif len(final_np_array_shape) == len(cur_np_array_shape):
+                                        final_np_array_shape = np.maximum(final_np_array_shape, cur_np_array_shape)
+                                    else:
+                                        is_numpy_array_type = False
+
+                        if is_numpy_array_type:
+                            # if the data can be transformed into a numpy array
+                            if len(final_np_array_shape) == 1 and final_np_array_shape[0] == 1:
+                                # if the data per repetition is only a scalar, then do not create
+                                # create an extra dimensions for it, this replicates the default beahvior of numpy
+                                data_shape = [len(cur_data_per_rep)]
+                            else:
+                                data_shape = [len(cur_data_per_rep)] + list(final_np_array_shape)
 
-                        cur_data = np.full(data_shape, np.nan)
-                        for rep_idx, rep_data in enumerate(cur_data_per_rep):
+                            cur_data = np.full(data_shape, np.nan)
+                            for rep_idx, rep_data in enumerate(cur_data_per_rep):
 
-                            # only set values if data exisited for the repetition
-                            if is_data_exist_inds[rep_idx]:
+                                # only set values if data exisited for the repetition
+                                if is_data_exist_inds[rep_idx]:
 
-                                # create the correct slicing to add the rep_data into the whole array
-                                rep_data_shape = np.shape(rep_data)
-                                if len(data_shape) == 1:
-                                    slices = rep_idx
-                                else:
-                                    slices = tuple([rep_idx] + [slice(0, d) for d in rep_data_shape])
+                                    # create the correct slicing to add the rep_data into the whole array
+                                    rep_data_shape = np.shape(rep_data)
+                                    if len(data_shape) == 1:
+                                        slices = rep_idx
+                                    else:
+                                        slices = tuple([rep_idx] + [slice(0, d) for d in rep_data_shape])
 
-                                cur_data[slices] = rep_data
-                    else:
-                        # otherwise keep data in list form over repetitions
-                        cur_data = cur_data_per_rep
+                                    cur_data[slices] = rep_data
+                        else:
+                            # otherwise keep data in list form over repetitions
+                            cur_data = cur_data_per_rep
 
-                    # set data to None if no repetition had some data
-                    if not np.any(is_data_exist_inds):
-                        cur_data = None
+                        # set data to None if no repetition had some data
+                        if not np.any(is_data_exist_inds):
+                            cur_data = None
 
             if is_transpose:
                 cur_data = np.transpose(cur_data)
@@ -432,3 +455,141 @@ def select_experiment_data(experiment_data, datasources, experiment_ids='all', r
 #
 #
 #     return reformated_data
+
+
+def _get_stacked_repetition_data(experiment_data, datasource, n_repetitions):
+    """Returns the stacked data and mask of a datasource over the repetitions of an experiment, or None if it does not exist."""
+    stacked_repetition_data = experiment_data.get(eu.STACKED_REPETITION_DATA_KEY)
+    if not stacked_repetition_data or datasource not in stacked_repetition_data:
+        return None
+
+    stacked_data = stacked_repetition_data[datasource]
+
+    # the repetition data could have been changed after it was stacked
+    if len(stacked_data.data) != n_repetitions:
+        return None
+
+    return stacked_data
+
+
+def _get_filtered_repetition_ids(experiment_data, experiment_ids, data_filter, data_filter_inds):
+    """Returns for each experiment the ids of the repetitions that are selected by the data filter and the filter indices."""
+
+    if data_filter:
+        data_filter = eu.misc.compile_subdict_boolean_filter(data_filter)
+
+    filtered_repetition_ids = dict()
+    for experiment_id in experiment_ids:
+        if experiment_id not in experiment_data:
+            continue
+
+        cur_repetition_data = experiment_data[experiment_id].get(eu.REPETITION_DATA_KEY, [])
+        # repetitions that were not loaded, for example because their data is missing, are gaps in the ids
+        if isinstance(cur_repetition_data, dict):
+            cur_repetition_ids = sorted(cur_repetition_data.keys())
+        else:
+            cur_repetition_ids = list(range(len(cur_repetition_data)))
+        inds = None
+
+        if data_filter:
+            if len(cur_repetition_ids) > 0:
+                inds = data_filter([cur_repetition_data[rep_id] for rep_id in cur_repetition_ids])
+                inds = np.broadcast_to(np.asarray(inds, dtype=bool), (len(cur_repetition_ids),))
+            else:
+                inds = np.zeros(0, dtype=bool)
+
+        if data_filter_inds is not None and experiment_id in data_filter_inds:
+            cur_filter_inds = np.asarray(data_filter_inds[experiment_id], dtype=bool)
+            if inds is None:
+                inds = cur_filter_inds
+            elif len(cur_filter_inds) != len(inds):
+                raise ValueError('The data_filter_inds of experiment {!r} have {} elements, but the experiment has {} repetitions!'.format(experiment_id, len(cur_filter_inds), len(inds)))
+            else:
+                inds = inds & cur_filter_inds
+
+        if inds is not None:
+            # the indices are over the sorted ids of the loaded repetitions
+            filtered_repetition_ids[experiment_id] = [cur_repetition_ids[idx] for idx in np.flatnonzero(inds)]
+
+    return filtered_repetition_ids
+
+
+def _filter_repetition_ids(rep_ids, filtered_repetition_ids, experiment_id):
+    """Removes the repetitions from the selected repetition ids that are not selected by the filters."""
+    if filtered_repetition_ids is None or experiment_id not in filtered_repetition_ids:
+        return rep_ids
+
+    if isinstance(rep_ids, slice):
+        return list(filtered_repetition_ids[experiment_id])
+
+    allowed_rep_ids = set(filtered_repetition_ids[experiment_id])
+    return [rep_id for rep_id in rep_ids if rep_id in allowed_rep_ids]
+
+
+class SelectionCache:
+    """
+    Memoizes the results of select_experiment_data, so that repeated selections, for example to
+    replot the same data with a different styling, do not have to collect the data again.
+
+    Results are identified by the experiment data object, the selection function and all arguments of
+    the selection. The selection function can be changed via the `select_experiment_data_func` attribute.
+    Each call returns a copy of the cached result, so that changes of it do not affect later calls.
+    If the experiment data is changed in place, for example because new data was loaded into it,
+    then the cache has to be cleared with `clear`.
+
+    >>> selection_cache = SelectionCache()
+    >>> data, labels = selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'])
+
+    :param select_experiment_data_func: Function that selects the data. (Default: eu.data.select_experiment_data)
+    :param max_size: Maximum number of selections that are cached. (Default: 10)
+    """
+
+    def __init__(self, select_experiment_data_func=None, max_size=10):
+        self.select_experiment_data_func = select_experiment_data_func or select_experiment_data
+        self.max_size = max_size
+        self._results = OrderedDict()
+
+
+    def __call__(self, experiment_data, datasources, **kwargs):
+
+        try:
+            key = (self.select_experiment_data_func,
+                   id(experiment_data), id(kwargs.get('experiment_descriptions')), _to_hashable(datasources),
+                   _to_hashable({k: v for k, v in kwargs.items() if k != 'experiment_descriptions'}))
+            hash(key)
+        except TypeError:
+            # arguments that can not be compared are not cached
+            return self.select_experiment_data_func(experiment_data, datasources, **kwargs)
+
+        if key in self._results:
+            self._results.move_to_end(key)
+            return copy.deepcopy(self._results[key][-1])
+
+        result = self.select_experiment_data_func(experiment_data, datasources, **kwargs)
+
+        # keep references to the identified objects, so that their ids are not reused while they are cached
+        self._results[key] = (experiment_data, kwargs.get('experiment_descriptions'), result)
+        while len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+
+        return copy.deepcopy(result)
+
+
+    def clear(self):
+        """Removes all cached results."""
+        self._results.clear()
+
+
+    def __len__(self):
+        return len(self._results)
+
+
+def _to_hashable(obj):
+    """Converts the arguments of a selection into a hashable object that identifies them."""
+    if isinstance(obj, dict):
+        return ('dict', tuple((key, _to_hashable(value)) for key, value in obj.items()))
+    elif isinstance(obj, (list, tuple)):
+        return (type(obj).__name__, tuple(_to_hashable(item) for item in obj))
+    elif isinstance(obj, np.ndarray):
+        return ('ndarray', obj.dtype.str, obj.shape, obj.tobytes())
+    return obj
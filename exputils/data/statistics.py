@@ -11,12 +11,19 @@ import numpy as np
 import os
 import glob
 import zipfile
+import copy
 import exputils
 import re
+import warnings
+import json
+import hashlib
+import inspect
+
+STATISTICS_FINGERPRINTS_FILENAME = 'statistics_fingerprints.json'
 
 def calc_repetition_statistics(statistics, load_experiment_data_func,  *args, statistics_directory=None,
                                recalculate_statistics=False, verbose=False, repetition_directory_template=None,
-                               experiment_directory_template=None):
+                               experiment_directory_template=None, n_workers=None, executor_type='process'):
     '''
     Calculates statistics of a single repetition of an experiment.
 
@@ -24,7 +31,21 @@ def calc_repetition_statistics(statistics, load_experiment_data_func,  *args, st
     :param args: Directoryies in which the experiments are for which the statistics should be computed.
     :param results_directory:
     :param statistics_directory:
-    :return:
+    :param recalculate_statistics: True to recalculate all statistics, False to calculate only statistics that do not exist,
+                                   or 'changed' to also recalculate statistics whose input files or statistic function
+                                   changed since they were calculated. For this, the modification time and size of the files
+                                   in the folder and a hash of the code of the function are recorded for each calculated
+                                   statistic in the 'statistics_fingerprints.json' file of the statistics directory.
+                                   Statistics that were calculated without this mode are recalculated once.
+                                   (Default: False)
+    :param n_workers: Number of workers that calculate the statistics of several repetition folders in parallel.
+                      Errors are then captured per folder, so that a failing folder does not stop the
+                      calculation for the other folders. A warning is given for each failed folder.
+                      With processes the statistic functions and load_experiment_data_func have to be picklable,
+                      i.e. defined at the top level of a module.
+                      (Default: None, which calculates the statistics sequentially)
+    :param executor_type: Type of the workers if n_workers is set: 'process' or 'thread'. (Default: 'process')
+    :return: Dictionary with the exception for each folder for which the calculation failed in parallel mode.
     '''
 
     if len(args) == 0:
@@ -42,12 +63,6 @@ def calc_repetition_statistics(statistics, load_experiment_data_func,  *args, st
 
     if statistics_directory is None: statistics_directory = exputils.DEFAULT_DATA_DIRECTORY
 
-    def get_data(data, experiment_folder):
-        '''Loads the data if the data is not already loaded'''
-        if data is None:
-            data = load_experiment_data_func(experiment_folder)
-        return data
-
     # identify the experiment folders
     experiment_folders = []
     for folder in experiments:
@@ -86,89 +101,252 @@ def calc_repetition_statistics(statistics, load_experiment_data_func,  *args, st
 
         experiment_folders.extend(found_folders)
 
-    # calc statistic if it does not exist already
-    for experiment_folder in sorted(experiment_folders):
+    errors = dict()
 
-        data = None
+    if n_workers is not None and n_workers > 1:
 
-        directory = os.path.join(experiment_folder, statistics_directory)
+        # only give folders to the workers for which statistics have to be calculated
+        experiment_folders = [experiment_folder for experiment_folder in sorted(experiment_folders)
+                              if _get_statistics_to_calculate(statistics, [experiment_folder], experiment_folder, os.path.join(experiment_folder, statistics_directory), recalculate_statistics)[0]]
 
-        if not os.path.isdir(directory):
-            os.makedirs(directory)
+        with exputils.misc.create_executor(executor_type, n_workers) as executor:
+            futures = dict()
+            for experiment_folder in experiment_folders:
+                futures[experiment_folder] = executor.submit(
+                    _calc_single_repetition_statistics,
+                    statistics, load_experiment_data_func, experiment_folder,
+                    statistics_directory=statistics_directory,
+                    recalculate_statistics=recalculate_statistics,
+                    verbose=verbose)
 
-        if verbose:
-            print('Calculate statistics for {!r}:'.format(experiment_folder))
-
-        for statistic_definition in statistics:
-
-            if isinstance(statistic_definition, tuple):
-                statistic_name = statistic_definition[0]
-                statistic_func = statistic_definition[1]
-                statistic_type = statistic_definition[2] if len(statistic_definition) > 2 else 'numpy'
-            elif isinstance(statistic_definition, dict):
-                statistic_name = statistic_definition['name']
-                statistic_func = statistic_definition['function']
-                statistic_type = statistic_definition['type'] if 'type' in statistic_definition else 'numpy'
-            else:
-                raise ValueError('Unknown format for statistic definition {!r}!'.format(statistic_definition))
+            for experiment_folder, future in futures.items():
+                try:
+                    future.result()
+                except Exception as err:
+                    warnings.warn('Could not calculate statistics for {!r}: {!r}'.format(experiment_folder, err))
+                    errors[experiment_folder] = err
 
-            # calculate statistics if they do not exist
-            filepath_npy = os.path.join(directory, '{}.npy'.format(statistic_name))
-            filepath_npz = os.path.join(directory, '{}.npz'.format(statistic_name))
-            filepath_zip = os.path.join(directory, '{}.zip'.format(statistic_name))
-            directory_path = os.path.join(directory, statistic_name)
+    else:
+        # calc statistic if it does not exist already
+        for experiment_folder in sorted(experiment_folders):
+            _calc_single_repetition_statistics(
+                statistics, load_experiment_data_func, experiment_folder,
+                statistics_directory=statistics_directory,
+                recalculate_statistics=recalculate_statistics,
+                verbose=verbose)
+
+    return errors
+
+
+def _get_statistic_definition(statistic_definition):
+    """Returns the name, function and type of a statistic definition."""
+    if isinstance(statistic_definition, tuple):
+        statistic_name = statistic_definition[0]
+        statistic_func = statistic_definition[1]
+        statistic_type = statistic_definition[2] if len(statistic_definition) > 2 else 'numpy'
+    elif isinstance(statistic_definition, dict):
+        statistic_name = statistic_definition['name']
+        statistic_func = statistic_definition['function']
+        statistic_type = statistic_definition['type'] if 'type' in statistic_definition else 'numpy'
+    else:
+        raise ValueError('Unknown format for statistic definition {!r}!'.format(statistic_definition))
+    return statistic_name, statistic_func, statistic_type
+
+
+def _is_statistic_existing(directory, statistic_name):
+    """Checks if a statistic was already calculated, i.e. if one of its possible files exists in the directory."""
+    return (os.path.isfile(os.path.join(directory, '{}.npy'.format(statistic_name)))
+            or os.path.isfile(os.path.join(directory, '{}.npz'.format(statistic_name)))
+            or os.path.isfile(os.path.join(directory, '{}.zip'.format(statistic_name)))
+            or os.path.isdir(os.path.join(directory, statistic_name)))
+
+
+def _get_statistic_output_paths(directory, statistic_name):
+    """Returns the paths of the possible files and the directory of a statistic."""
+    return [os.path.join(directory, '{}.npy'.format(statistic_name)),
+            os.path.join(directory, '{}.npz'.format(statistic_name)),
+            os.path.join(directory, '{}.zip'.format(statistic_name)),
+            os.path.join(directory, statistic_name)]
+
+
+def _get_function_fingerprint(func):
+    """Returns a hash of the code of a function, or None if it has no accessible code."""
+    try:
+        if isinstance(func, exputils.data.OnlineStatistic):
+            # online statistics are identified by their class and parameters
+            source = inspect.getsource(type(func)) + repr(func)
+        else:
+            source = inspect.getsource(func)
+    except (TypeError, OSError):
+        code = getattr(func, '__code__', None)
+        if code is None:
+            return None
+        source = repr((code.co_code, code.co_consts, code.co_names))
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def _get_files_fingerprint(directories, base_directory, excluded_paths):
+    """Returns the modification time and size of each file in the directories and their subdirectories."""
+    excluded_paths = set(os.path.abspath(path) for path in excluded_paths)
+
+    fingerprint = dict()
+    for directory in sorted(directories):
+        for root, dir_names, file_names in os.walk(directory):
+            # the outputs of statistics are not inputs
+            dir_names[:] = sorted(dir_name for dir_name in dir_names if os.path.abspath(os.path.join(root, dir_name)) not in excluded_paths)
+            for file_name in sorted(file_names):
+                path = os.path.join(root, file_name)
+                if os.path.abspath(path) not in excluded_paths:
+                    stat = os.stat(path)
+                    fingerprint[os.path.relpath(path, base_directory)] = [stat.st_mtime_ns, stat.st_size]
+    return fingerprint
+
+
+def _load_statistics_fingerprints(directory):
+    path = os.path.join(directory, STATISTICS_FINGERPRINTS_FILENAME)
+    if not os.path.isfile(path):
+        return dict()
+    with open(path, 'r') as fh:
+        return json.load(fh)
+
+
+def _save_statistics_fingerprints(directory, fingerprints):
+    path = os.path.join(directory, STATISTICS_FINGERPRINTS_FILENAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(fingerprints, fh)
+    os.replace(tmp_path, path)
+
+
+def _get_statistics_to_calculate(statistics, input_directories, base_directory, statistics_directory, recalculate_statistics):
+    """
+    Identifies the statistics that have to be calculated.
+    Returns the statistics as a list of (name, function, type) tuples, the fingerprints of the existing statistics
+    and the fingerprint of the input files.
+    """
+    statistic_definitions = [_get_statistic_definition(statistic_definition) for statistic_definition in statistics]
+
+    if recalculate_statistics == 'changed':
+        fingerprints = _load_statistics_fingerprints(statistics_directory)
+
+        excluded_paths = [os.path.join(statistics_directory, STATISTICS_FINGERPRINTS_FILENAME),
+                          os.path.join(statistics_directory, STATISTICS_FINGERPRINTS_FILENAME + '.tmp')]
+        # outputs of the statistics of this and of previous calls are not inputs, otherwise calls with
+        # different statistics would invalidate each other
+        statistic_names = set(fingerprints.keys()) | set(statistic_name for statistic_name, _, _ in statistic_definitions)
+        for statistic_name in sorted(statistic_names):
+            excluded_paths.extend(_get_statistic_output_paths(statistics_directory, statistic_name))
+        input_fingerprint = _get_files_fingerprint(input_directories, base_directory, excluded_paths)
+
+        statistics_to_calculate = []
+        for statistic_name, statistic_func, statistic_type in statistic_definitions:
+            fingerprint = dict(code=_get_function_fingerprint(statistic_func), inputs=input_fingerprint)
+            if (not _is_statistic_existing(statistics_directory, statistic_name)
+                    or fingerprint['code'] is None
+                    or fingerprints.get(statistic_name) != fingerprint):
+                statistics_to_calculate.append((statistic_name, statistic_func, statistic_type))
+
+        return statistics_to_calculate, fingerprints, input_fingerprint
+
+    statistics_to_calculate = [(statistic_name, statistic_func, statistic_type)
+                               for statistic_name, statistic_func, statistic_type in statistic_definitions
+                               if recalculate_statistics or not _is_statistic_existing(statistics_directory, statistic_name)]
+    return statistics_to_calculate, None, None
+
+
+def _calc_single_repetition_statistics(statistics, load_experiment_data_func, experiment_folder, statistics_directory,
+                                       recalculate_statistics=False, verbose=False):
+    """Calculates the statistics for a single experiment or repetition folder that do not exist already."""
+
+    data = None
+
+    directory = os.path.join(experiment_folder, statistics_directory)
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    if verbose:
+        print('Calculate statistics for {!r}:'.format(experiment_folder))
+
+    statistics_to_calculate, fingerprints, input_fingerprint = _get_statistics_to_calculate(
+        statistics, [experiment_folder], experiment_folder, directory, recalculate_statistics)
+
+    for statistic_name, statistic_func, statistic_type in statistics_to_calculate:
+
+        filepath_npy = os.path.join(directory, '{}.npy'.format(statistic_name))
+        filepath_npz = os.path.join(directory, '{}.npz'.format(statistic_name))
+        filepath_zip = os.path.join(directory, '{}.zip'.format(statistic_name))
+        directory_path = os.path.join(directory, statistic_name)
 
-            if (not os.path.isfile(filepath_npy) and not os.path.isfile(filepath_npz) and not os.path.isfile(filepath_zip) and not os.path.isdir(directory_path)) or recalculate_statistics:
+        if verbose:
+            print('\t{} ...'.format(statistic_name))
 
-                if verbose:
-                    print('\t{} ...'.format(statistic_name))
+        # load the data only if it is not already loaded
+        if data is None:
+            data = load_experiment_data_func(experiment_folder)
 
-                data = get_data(data, experiment_folder)
+        if statistic_type == 'numpy':
+            stat = statistic_func(statistic_name, data)
 
-                if statistic_type == 'numpy':
-                    stat = statistic_func(statistic_name, data)
+            if isinstance(stat, dict):
+                np.savez(filepath_npz, **stat)
+            else:
+                np.save(filepath_npy, stat)
 
-                    if isinstance(stat, dict):
-                        np.savez(filepath_npz, **stat)
-                    else:
-                        np.save(filepath_npy, stat)
+        elif statistic_type == 'zip':
 
-                elif statistic_type == 'zip':
+            stat = statistic_func(statistic_name, data)
 
-                    stat = statistic_func(statistic_name, data)
+            if not isinstance(stat, dict):
+                raise ValueError('Only dictionaries are accepted as data type for zip statistics!')
 
-                    if not isinstance(stat, dict):
-                        raise ValueError('Only dictionaries are accepted as data type for zip statistics!')
+            zf = zipfile.ZipFile(filepath_zip,
+                                 mode='w',
+                                 compression=zipfile.ZIP_DEFLATED,
+                                 )
+            try:
+                for sub_stat_name, sub_stat in stat.items():
+                    zf.writestr(sub_stat_name, sub_stat)
 
-                    zf = zipfile.ZipFile(filepath_zip,
-                                         mode='w',
-                                         compression=zipfile.ZIP_DEFLATED,
-                                         )
-                    try:
-                        for sub_stat_name, sub_stat in stat.items():
-                            zf.writestr(sub_stat_name, sub_stat)
+            finally:
+                zf.close()
 
-                    finally:
-                        zf.close()
+        elif statistic_type == 'directory':
+            if not os.path.isdir(directory_path):
+                os.mkdir(directory_path)
+            statistic_func(statistic_name, data, directory_path)
 
-                elif statistic_type == 'directory':
-                    if not os.path.isdir(directory_path):
-                        os.mkdir(directory_path)
-                    statistic_func(statistic_name, data, directory_path)
+        else:
+            ValueError('Unknown statistic type {!r}!'.format(statistic_type))
 
-                else:
-                    ValueError('Unknown statistic type {!r}!'.format(statistic_type))
+        if fingerprints is not None:
+            # remember from which inputs and code the statistic was calculated
+            fingerprints[statistic_name] = dict(code=_get_function_fingerprint(statistic_func), inputs=input_fingerprint)
+            _save_statistics_fingerprints(directory, fingerprints)
 
 
 
-def calc_statistics_over_repetitions(statistics, *args, load_data_func=None, recalculate_statistics=False, verbose=False, repetition_directory_template=None, statistics_directory=None):
+def calc_statistics_over_repetitions(statistics, *args, load_data_func=None, recalculate_statistics=False, verbose=False, repetition_directory_template=None, statistics_directory=None,
+                                     load_repetition_data_func=None):
     '''
     Calculates the statistics over several repetitions of an experiments.
 
-    :param statistics: List with tuples of the form: (statistic name, statistic function)
+    Statistics of the type 'online' are given as (statistic name, online statistic, 'online'), for example
+    ('reward', eu.data.OnlineMeanVar('reward'), 'online'), see eu.data.OnlineStatistic.
+    They consume the data of one repetition at a time, so that only the data of a single repetition is in memory.
+    All online statistics of an experiment are calculated in a single pass over its repetitions.
+
+    :param statistics: List with tuples of the form: (statistic name, statistic function) or
+                       (statistic name, online statistic, 'online')
     :param args: Directories in which the experiments are for which the statistics should be computed.
     :param results_directory:
     :param statistics_directory:
+    :param recalculate_statistics: True to recalculate all statistics, False to calculate only statistics that do not exist,
+                                   or 'changed' to also recalculate statistics whose input files, i.e. the files in the
+                                   repetition directories, or statistic function changed since they were calculated,
+                                   for example because new repetitions were added. (Default: False)
+    :param load_repetition_data_func: Function that loads the data of a single repetition directory for online statistics.
+                                      (Default: eu.data.statistics.load_data_from_repetition)
     :return:
     '''
 
@@ -180,6 +358,7 @@ def calc_statistics_over_repetitions(statistics, *args, load_data_func=None, rec
         experiments = list(args)
 
     if load_data_func is None: load_data_func = load_data_from_repetitions
+    if load_repetition_data_func is None: load_repetition_data_func = load_data_from_repetition
 
     if repetition_directory_template is None: repetition_directory_template = exputils.REPETITION_DIRECTORY_TEMPLATE
     repetition_directory_template = re.sub('\{.*\}', '*', repetition_directory_template)
@@ -223,16 +402,41 @@ def calc_statistics_over_repetitions(statistics, *args, load_data_func=None, rec
         if verbose:
             print('Calculate statistics for {!r}:'.format(experiment_directory))
 
-        for statistic_name, statistic_func in statistics:
+        # calculate statistics if they do not exist, or if their inputs changed
+        statistics_to_calculate, fingerprints, input_fingerprint = _get_statistics_to_calculate(
+            statistics, repetition_directories, experiment_directory, trg_directory, recalculate_statistics)
+
+        # calculate all online statistics in a single pass over the repetitions
+        online_statistics = dict()
+        for statistic_name, statistic_func, statistic_type in statistics_to_calculate:
+            if statistic_type == 'online':
+                if verbose:
+                    print('\t{} ...'.format(statistic_name))
+                online_statistics[statistic_name] = copy.deepcopy(statistic_func)
+
+        if online_statistics:
+            for repetition_directory in sorted(repetition_directories):
+                repetition_data = load_repetition_data_func(repetition_directory)
+                for online_statistic in online_statistics.values():
+                    online_statistic.add(repetition_data)
+                del repetition_data
+
+            for statistic_name, online_statistic in online_statistics.items():
+                if online_statistic.n_missing > 0:
+                    warnings.warn('{} of {} repetitions of {!r} have no data for the statistic {!r}!'.format(
+                        online_statistic.n_missing, len(repetition_directories), experiment_directory, statistic_name))
+
+        for statistic_name, statistic_func, statistic_type in statistics_to_calculate:
 
-            # calculate statistics if they do not exist
             filename_npy = '{}.npy'.format(statistic_name)
             filename_npz = '{}.npz'.format(statistic_name)
 
             filepath_npy = os.path.join(trg_directory, filename_npy)
             filepath_npz = os.path.join(trg_directory, filename_npz)
-            if (not os.path.isfile(filepath_npy) and not os.path.isfile(filepath_npz)) or recalculate_statistics:
 
+            if statistic_type == 'online':
+                stat = online_statistics[statistic_name].result()
+            else:
                 if verbose:
                     print('\t{} ...'.format(statistic_name))
 
@@ -240,10 +444,14 @@ def calc_statistics_over_repetitions(statistics, *args, load_data_func=None, rec
 
                 stat = statistic_func(statistic_name, data)
 
-                if isinstance(stat, dict):
-                    np.savez(filepath_npz, **stat)
-                else:
-                    np.save(filepath_npy, stat)
+            if isinstance(stat, dict):
+                np.savez(filepath_npz, **stat)
+            else:
+                np.save(filepath_npy, stat)
+
+            if fingerprints is not None:
+                fingerprints[statistic_name] = dict(code=_get_function_fingerprint(statistic_func), inputs=input_fingerprint)
+                _save_statistics_fingerprints(trg_directory, fingerprints)
 
 
 def load_data_from_repetitions(repetition_directories, data_subdirectory=None):
@@ -260,6 +468,15 @@ def load_data_from_repetitions(repetition_directories, data_subdirectory=None):
         numbers_in_string = [int(s) for s in os.path.basename(repetition_directory).split('_') if s.isdigit()]
         repetition_id = numbers_in_string[0]
 
-        data[repetition_id] = exputils.io.load_numpy_files(os.path.join(repetition_directory, data_subdirectory))
+        data[repetition_id] = load_data_from_repetition(repetition_directory, data_subdirectory=data_subdirectory)
 
     return data
+
+
+def load_data_from_repetition(repetition_directory, data_subdirectory=None):
+    '''Loads the data from the data subdirectory of a single repetition directory.'''
+
+    # use default logs directory to define where the data is
+    if data_subdirectory is None: data_subdirectory = exputils.DEFAULT_DATA_DIRECTORY
+
+    return exputils.io.load_numpy_files(os.path.join(repetition_directory, data_subdirectory))
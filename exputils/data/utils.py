@@ -8,6 +8,7 @@
 ## exputils is provided under GPL-3.0-or-later
 ##
 import numpy as np
+from exputils.misc.attrdict import AttrDict
 
 
 def get_ordered_experiment_ids_from_descriptions(experiment_descriptions):
@@ -18,4 +19,161 @@ def get_ordered_experiment_ids_from_descriptions(experiment_descriptions):
     experiment_descriptions_values = list(experiment_descriptions.values())
     order = [descr['order'] for descr in experiment_descriptions_values]
     sorted_experiment_ids = [experiment_descriptions_values[idx]['id'] for idx in np.argsort(order)]
-    return sorted_experiment_ids
\ No newline at end of file
+    return sorted_experiment_ids
+
+
+def stack_repetition_data(repetition_data: dict) -> AttrDict:
+    """
+    Stacks the data of each datasource over all repetitions of an experiment into a single array.
+
+    The data of a datasource is stacked if it exists for all repetitions and consists of numeric
+    scalars or of numeric numpy arrays with the same number of dimensions.
+    The stacked array has the same form as the array that
+    [select_experiment_data][exputils.data.selection.select_experiment_data] creates for the datasource:
+    its first dimension is over the repetitions and arrays of repetitions with fewer elements are
+    padded with nan.
+    Datasources are only stacked if the repetition ids are 0 to n-1.
+
+    Parameters:
+        repetition_data (dict): Data of each repetition of an experiment with the repetition ids as keys,
+            or a list with the data of each repetition.
+
+    Returns:
+        stacked_data (AttrDict): Dictionary with an entry for each stacked datasource that has:
+
+            - data: Array with the stacked data of all repetitions.
+            - mask: Boolean array of the same shape that is True for elements that exist in the
+                    data of the repetitions and False for padded elements.
+    """
+
+    stacked_data = AttrDict()
+
+    n_repetitions = len(repetition_data)
+    if n_repetitions == 0:
+        return stacked_data
+    if isinstance(repetition_data, dict) and sorted(repetition_data.keys()) != list(range(n_repetitions)):
+        return stacked_data
+
+    for datasource in repetition_data[0].keys():
+
+        rep_values = []
+        for rep_id in range(n_repetitions):
+            cur_rep_data = repetition_data[rep_id]
+            if datasource not in cur_rep_data:
+                break
+            rep_values.append(cur_rep_data[datasource])
+        else:
+            data_shape = _get_stacked_data_shape(rep_values)
+            if data_shape is None:
+                continue
+
+            data = np.full(data_shape, np.nan)
+            mask = np.zeros(data_shape, dtype=bool)
+            for rep_idx, value in enumerate(rep_values):
+                slices = tuple([rep_idx] + [slice(0, d) for d in np.shape(value)])
+                data[slices] = value
+                mask[slices] = True
+
+            stacked_data[datasource] = AttrDict(data=data, mask=mask)
+
+    return stacked_data
+
+
+def _get_stacked_data_shape(values):
+    """Returns the shape of an array in which the values can be stacked, or None if they can not be stacked."""
+
+    if all(isinstance(value, (int, float, np.integer, np.floating, np.bool_)) for value in values):
+        return [len(values)]
+
+    if not all(isinstance(value, np.ndarray) and value.dtype.kind in 'biuf' for value in values):
+        return None
+
+    n_dims = values[0].ndim
+    if n_dims == 0 or any(value.ndim != n_dims for value in values):
+        return None
+
+    max_shape = np.max([value.shape for value in values], axis=0)
+    if n_dims == 1 and max_shape[0] == 1:
+        # such arrays are handled as scalars by the selection
+        return None
+
+    return [len(values)] + list(max_shape)
+
+
+def to_columnar(data: list, labels: list = None, is_drop_nan: bool = True) -> AttrDict:
+    """
+    Converts data that was selected by
+    [select_experiment_data][exputils.data.selection.select_experiment_data] into a long format
+    with a flat numpy array per column.
+
+    Each element of the selected data becomes a row with the columns:
+
+    - datasource_idx: Index of the datasource in the selection.
+    - experiment_idx: Index of the experiment in the selection of the datasource.
+    - repetition_idx: Index of the repetition in the selection of the experiment.
+    - step: Index of the element in the data of the repetition. Data with several dimensions per
+            repetition is flattened in C order.
+    - value: Value of the element.
+
+    The data per experiment has to be a numeric array with the repetitions as first dimension,
+    which is the default output of the selection for scalars and arrays.
+    Experiments without data are skipped.
+
+    Parameters:
+        data (list): Data in the ('S','E','D') output format of the selection.
+        labels (list): Labels of the selection. If given, then the labels of the datasources
+            (`datasource_labels`) and of the experiments per datasource (`experiment_labels`) are
+            added to the result, so that the indices can be translated.
+            Defaults to None.
+        is_drop_nan (bool): Should rows with nan values be removed, for example the padding of
+            repetitions with fewer elements. Defaults to True.
+
+    Returns:
+        columns (AttrDict): Dictionary with the columns.
+    """
+
+    datasource_inds = []
+    experiment_inds = []
+    repetition_inds = []
+    steps = []
+    values = []
+
+    for datasource_idx, datasource_data in enumerate(data):
+        for experiment_idx, experiment_data in enumerate(datasource_data):
+
+            if experiment_data is None:
+                continue
+
+            experiment_data = np.asarray(experiment_data)
+            if experiment_data.dtype.kind not in 'biuf' or experiment_data.ndim == 0:
+                raise ValueError('Data of experiment {} for datasource {} can not be converted into columns, because it is not a numeric array over repetitions!'.format(experiment_idx, datasource_idx))
+
+            n_repetitions = experiment_data.shape[0]
+            n_steps = int(np.prod(experiment_data.shape[1:], dtype=int))
+
+            values.append(experiment_data.reshape(-1))
+            repetition_inds.append(np.repeat(np.arange(n_repetitions), n_steps))
+            steps.append(np.tile(np.arange(n_steps), n_repetitions))
+            datasource_inds.append(np.full(n_repetitions * n_steps, datasource_idx))
+            experiment_inds.append(np.full(n_repetitions * n_steps, experiment_idx))
+
+    columns = AttrDict(
+        datasource_idx=np.concatenate(datasource_inds) if datasource_inds else np.zeros(0, dtype=int),
+        experiment_idx=np.concatenate(experiment_inds) if experiment_inds else np.zeros(0, dtype=int),
+        repetition_idx=np.concatenate(repetition_inds) if repetition_inds else np.zeros(0, dtype=int),
+        step=np.concatenate(steps) if steps else np.zeros(0, dtype=int),
+        value=np.concatenate(values).astype(float) if values else np.zeros(0))
+
+    if is_drop_nan:
+        is_value = ~np.isnan(columns.value)
+        if not np.all(is_value):
+            for name in columns.keys():
+                columns[name] = columns[name][is_value]
+
+    if labels is not None:
+        columns.datasource_labels = [datasource_labels[0] for datasource_labels in labels]
+        columns.experiment_labels = [
+            [exp_label[0] if isinstance(exp_label, tuple) else exp_label for exp_label in datasource_labels[1]]
+            for datasource_labels in labels]
+
+    return columns
@@ -128,6 +128,8 @@ class ExperimentDataSelectionWidget(BaseWidget, ipywidgets.VBox):
 
         # config for collecting the data
         dc.select_experiment_data_func = eu.data.select_experiment_data  # function to get the data
+        dc.is_selection_cache = True  # reuse the data of previous selections, e.g. if only the plot config changed
+        dc.selection_cache = eu.AttrDict(max_size=10)
 
         return dc
 
@@ -157,6 +159,10 @@ class ExperimentDataSelectionWidget(BaseWidget, ipywidgets.VBox):
         self._selected_data = None
         self._selected_data_labels = None
 
+        self._selection_cache = eu.data.SelectionCache(
+            self.config.select_experiment_data_func,
+            **self.config.selection_cache)
+
         # self._on_selection_changed_event_handlers = []
         self._on_data_collected_event_handlers = []
 
@@ -257,6 +263,7 @@ class ExperimentDataSelectionWidget(BaseWidget, ipywidgets.VBox):
     def set_experiment_data(self, experiment_data, experiment_descriptions=None):
         self._experiment_data = experiment_data
         self._experiment_descriptions = experiment_descriptions
+        self._selection_cache.clear()
         self._update_selections_to_new_experiment_data()
 
 
@@ -412,7 +419,14 @@ class ExperimentDataSelectionWidget(BaseWidget, ipywidgets.VBox):
 
     def select_experiment_data(self):
 
-        data = self.config.select_experiment_data_func(
+        if self.config.is_selection_cache:
+            # the selection function of the config might have changed since the cache was created
+            self._selection_cache.select_experiment_data_func = self.config.select_experiment_data_func
+            select_experiment_data_func = self._selection_cache
+        else:
+            select_experiment_data_func = self.config.select_experiment_data_func
+
+        data = select_experiment_data_func(
             self.experiment_data,
             self.datasources,
             experiment_ids=self.experiment_ids,
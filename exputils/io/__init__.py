@@ -9,6 +9,7 @@
 ##
 from .numpy import load_numpy_files
 from .numpy import save_dict_to_numpy_files
+from .numpy import append_to_numpy_file
 
 from .general import makedirs
 from .general import makedirs_for_file
@@ -24,3 +25,5 @@ from .json import convert_json_dict_keys_to_ints
 from .dill import load_dill
 from .dill import save_dill
 from .dill import load_dill_files
+from .dill import append_to_dill_stream
+from .dill import load_dill_stream
@@ -13,6 +13,7 @@ import os
 from glob import glob
 
 DILL_FILE_EXTENSION = 'dill'
+DILL_STREAM_FILE_EXTENSION = 'dillstream'
 
 def save_dill(obj,
               file_path: str):
@@ -67,6 +68,72 @@ def load_dill(file_path: str) -> object:
     return obj
 
 
+def append_to_dill_stream(obj,
+                          file_path: str,
+                          is_overwrite: bool = False):
+    """
+    Serializes a Python object with the [dill](https://pypi.org/project/dill/) library and appends
+    it to a stream file that holds a sequence of objects.
+
+    Parameters:
+        obj (Any):
+            The Python object to be serialized.
+        file_path (str):
+            The path to the stream file.
+            The file extension (.dillstream) is added if not already present.
+        is_overwrite (bool):
+            If True, an existing file is overwritten, otherwise the object is appended to it.
+            Default is False.
+
+    <h4>Notes:</h4>
+
+    - The necessary directories for the file path will be created if they do not exist.
+    - The objects of a stream file are loaded as a list by
+      [load_dill_stream][exputils.io.dill.load_dill_stream].
+    """
+    if not file_path.endswith('.' + DILL_STREAM_FILE_EXTENSION):
+        file_path += '.' + DILL_STREAM_FILE_EXTENSION
+
+    eu.io.makedirs_for_file(file_path)
+    with open(file_path, 'wb' if is_overwrite else 'ab') as fh:
+        dill.dump(obj, fh)
+
+
+def load_dill_stream(file_path: str) -> list:
+    """
+    Loads all objects of a stream file that was written by
+    [append_to_dill_stream][exputils.io.dill.append_to_dill_stream].
+
+    Parameters:
+        file_path (str):
+            The path to the stream file.
+            The file extension is optionally added if not already present.
+
+    Returns:
+        objs (list): The objects of the stream in the order in which they were appended.
+
+    <h4>Notes:</h4>
+
+    - An incomplete object at the end of the file, for example if the writing process crashed,
+      is ignored.
+    - :warning: This could allow arbitrary code execution. Only load files you trust!
+    """
+    if not os.path.exists(file_path):
+        if not file_path.endswith('.' + DILL_STREAM_FILE_EXTENSION):
+            file_path += '.' + DILL_STREAM_FILE_EXTENSION
+
+    objs = []
+    with open(file_path, 'rb') as fh:
+        file_size = os.fstat(fh.fileno()).st_size
+        while fh.tell() < file_size:
+            try:
+                objs.append(dill.load(fh))
+            except (EOFError, dill.UnpicklingError):
+                # incomplete last object
+                break
+    return objs
+
+
 def load_dill_files(directory: str):
     """
     Loads all serialized objects from a directory using the [dill](https://pypi.org/project/dill/)
@@ -83,6 +150,7 @@ def load_dill_files(directory: str):
         data (AttrDict):
             An attribute dictionary where keys are the file names (without extensions) and
             values are the deserialized objects.
+            The objects of stream files (.dillstream) are loaded as lists.
 
     <h4>Notes:</h4>
 
@@ -101,4 +169,8 @@ def load_dill_files(directory: str):
         data = load_dill(file)
         data_dict[data_name] = data
 
+    for file in glob(os.path.join(directory, '*.' + DILL_STREAM_FILE_EXTENSION)):
+        data_name = os.path.splitext(os.path.basename(file))[0]
+        data_dict[data_name] = load_dill_stream(file)
+
     return data_dict
\ No newline at end of file
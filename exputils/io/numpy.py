@@ -11,8 +11,21 @@ from typing import Optional
 import exputils as eu
 import numpy as np
 import os
-from glob import glob
-from exputils.misc.attrdict import AttrDict
+import re
+from glob import glob, escape as glob_escape
+from exputils.misc.attrdict import AttrDict, LazyAttrDict, LazyValue
+from collections import OrderedDict
+import threading
+
+NUMPY_FILE_EXTENSION = '.npy'
+
+NUMPY_CONTAINER_FILE_EXTENSION = '.npz'
+
+# segments of a npz container file are named <container name>.<6 digit segment number>.npz
+_NUMPY_SEGMENT_FILE_REGEX = re.compile(r'^(.+)\.(\d{6})\.npz$')
+
+# number of characters reserved in the header of appendable numpy files for the growing first dimension
+_APPEND_HEADER_SHAPE_RESERVE = 20
 
 
 def save_dict_to_numpy_files(data: dict,
@@ -53,10 +66,353 @@ def save_dict_to_numpy_files(data: dict,
         raise ValueError('Unknown numpy logging mode {!r}! Only \'npy\', \'npz\' and \'cnpz\' are allowed.'.format(mode))
 
 
+def append_to_numpy_file(file_path: str,
+                         values,
+                         is_overwrite: bool = False):
+    """Appends values along the first dimension to a numpy (.npy) file.
+
+    The file is created if it does not exist.
+    Its header reserves space for the growing first dimension so that new values can be appended
+    without rewriting the existing data.
+    The values are written before the header is updated.
+    If a process crashes while appending, the file still holds a valid array with the previously
+    appended values.
+    The file stays a standard .npy file that can be loaded with `numpy.load` or
+    [load_numpy_files][exputils.io.numpy.load_numpy_files].
+
+    Parameters:
+        file_path (str):
+            Path to the numpy file.
+            The `'.npy'` extension is added if it is not part of the path.
+        values (Any):
+            Array of values that are appended.
+            Its first dimension is the number of appended values.
+            The other dimensions must match the dimensions of the values already in the file.
+        is_overwrite (bool):
+            If True, an existing file is overwritten instead of appended to.
+            Default is False.
+
+    Raises:
+        ValueError:
+            If the values hold Python objects, or if their shape does not fit the
+            values already in the file.
+    """
+
+    if not file_path.endswith(NUMPY_FILE_EXTENSION):
+        file_path += NUMPY_FILE_EXTENSION
+
+    values = np.asarray(values)
+
+    if values.ndim == 0:
+        raise ValueError('Values must have at least one dimension over which they are appended!')
+
+    if values.dtype.hasobject:
+        raise ValueError('Values that hold Python objects can not be appended to a numpy file!')
+
+    if is_overwrite or not os.path.isfile(file_path):
+        eu.io.makedirs_for_file(file_path)
+        with open(file_path, 'wb') as fh:
+            _write_appendable_numpy_header(fh, values.dtype, values.shape)
+            np.ascontiguousarray(values).tofile(fh)
+        return
+
+    with open(file_path, 'r+b') as fh:
+        version = np.lib.format.read_magic(fh)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+        header_length = fh.tell()
+
+        if len(shape) == 0 or values.shape[1:] != shape[1:]:
+            raise ValueError('Shape {} of the values can not be appended to the shape {} of the data in file {!r}!'.format(
+                values.shape, shape, file_path))
+
+        new_shape = (shape[0] + values.shape[0],) + shape[1:]
+
+        is_appendable = (
+            version == (1, 0)
+            and not fortran_order
+            and not dtype.hasobject
+            and np.can_cast(values.dtype, dtype, casting='safe')
+            and len(_get_numpy_header_str(dtype, new_shape)) + 11 <= header_length
+        )
+
+        if is_appendable:
+            # write the data behind the existing values, this ignores data of a previously interrupted append
+            fh.seek(header_length + int(np.prod(shape)) * dtype.itemsize)
+            np.ascontiguousarray(values, dtype=dtype).tofile(fh)
+            fh.truncate()
+            fh.flush()
+
+            # update the shape in the header after the data was written
+            fh.seek(0)
+            _write_appendable_numpy_header(fh, dtype, new_shape, header_length=header_length)
+            return
+
+    # files written by other means (numpy.save, other dtype, ...) can not be directly appended and are rewritten
+    existing_values = np.load(file_path, allow_pickle=False)
+    dtype = np.result_type(existing_values.dtype, values.dtype)
+    append_to_numpy_file(
+        file_path,
+        np.concatenate([existing_values.astype(dtype, copy=False), values.astype(dtype, copy=False)]),
+        is_overwrite=True)
+
+
+def _get_numpy_header_str(dtype, shape):
+    """Returns the header dictionary string of a .npy file in the same format as numpy."""
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': tuple(shape)}
+    return '{' + ''.join('{!r}: {!r}, '.format(key, value) for key, value in sorted(header.items())) + '}'
+
+
+def _write_appendable_numpy_header(fh, dtype, shape, header_length=None):
+    """Writes a version 1.0 .npy header that has space reserved for a growing first dimension."""
+
+    header_str = _get_numpy_header_str(dtype, shape)
+
+    if header_length is None:
+        # magic string (6 bytes), version (2 bytes), header length (2 bytes), header and final newline
+        header_length = 11 + len(header_str) + _APPEND_HEADER_SHAPE_RESERVE
+        header_length += -header_length % np.lib.format.ARRAY_ALIGN
+
+    header_str = header_str.ljust(header_length - 11) + '\n'
+
+    fh.write(np.lib.format.magic(1, 0))
+    fh.write(np.uint16(len(header_str)).astype('<u2').tobytes())
+    fh.write(header_str.encode('latin1'))
+
+
+def get_numpy_segment_file_path(container_path: str,
+                                segment_idx: int) -> str:
+    """Returns the path of a segment file of a npz container file.
+
+    Segments hold values that were added to the entries of a container after it was written.
+    They are named `<container name>.<segment number>.npz`, for example `logging.000001.npz`.
+    [load_numpy_files][exputils.io.numpy.load_numpy_files] appends the values of the segments to
+    the values of their container in the order of the segment numbers.
+
+    Parameters:
+        container_path (str):
+            Path to the npz container file.
+            The `'.npz'` extension is optional.
+        segment_idx (int):
+            Number of the segment.
+
+    Returns:
+        path (str): Path to the segment file.
+    """
+    if container_path.endswith(NUMPY_CONTAINER_FILE_EXTENSION):
+        container_path = container_path[:-len(NUMPY_CONTAINER_FILE_EXTENSION)]
+    return '{}.{:06d}{}'.format(container_path, segment_idx, NUMPY_CONTAINER_FILE_EXTENSION)
+
+
+def get_numpy_segment_file_paths(container_path: str) -> list:
+    """Returns the paths of all existing segment files of a npz container file sorted by their segment number.
+
+    Parameters:
+        container_path (str):
+            Path to the npz container file.
+            The `'.npz'` extension is optional.
+
+    Returns:
+        paths (list): Paths to the segment files.
+    """
+    if container_path.endswith(NUMPY_CONTAINER_FILE_EXTENSION):
+        container_path = container_path[:-len(NUMPY_CONTAINER_FILE_EXTENSION)]
+
+    container_name = os.path.basename(container_path)
+    paths = []
+    for file in glob(glob_escape(container_path) + '.*' + NUMPY_CONTAINER_FILE_EXTENSION):
+        match = _NUMPY_SEGMENT_FILE_REGEX.match(os.path.basename(file))
+        if match is not None and match.group(1) == container_name:
+            paths.append(file)
+    return sorted(paths)
+
+
+def _concatenate_numpy_segments(segments: list) -> dict:
+    """Combines the entries of a npz container and its segments by appending the values of each entry along the first dimension."""
+    values_per_name = dict()
+    for segment in segments:
+        for name, values in segment.items():
+            values_per_name.setdefault(name, []).append(values)
+
+    data = dict()
+    for name, values_list in values_per_name.items():
+        if len(values_list) == 1 or any(len(values.shape) == 0 for values in values_list):
+            data[name] = values_list[-1]
+        else:
+            data[name] = np.concatenate(values_list)
+    return data
+
+
+def _load_numpy_file(file_path, allow_pickle=True, mmap_mode=None):
+    """Loads a .npy file, optionally memory-mapped if its array does not consist of objects."""
+    if mmap_mode is not None:
+        try:
+            return np.load(file_path, mmap_mode=mmap_mode, allow_pickle=allow_pickle)
+        except ValueError:
+            # arrays of objects can not be memory-mapped
+            pass
+    return np.load(file_path, allow_pickle=allow_pickle)
+
+
+def _get_numpy_value(array):
+    """Numpy encapsulates scalars as arrays with an empty shape. Returns them with their original type."""
+    if len(array.shape) == 0:
+        return array.dtype.type(array)
+    return array
+
+
+class _LRUCache:
+    """Cache of loaded arrays that removes the least recently used ones if its size is exceeded."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                return item[0]
+        return None
+
+
+    def add(self, key, value, size):
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+
+            # values that are larger than the cache are not stored
+            if size > self.max_size:
+                return
+
+            self._items[key] = (value, size)
+            self.size += size
+            self._remove_exceeding_items()
+
+
+    def set_max_size(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self._remove_exceeding_items()
+
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+    def _remove_exceeding_items(self):
+        while self.size > self.max_size:
+            _, (_, size) = self._items.popitem(last=False)
+            self.size -= size
+
+
+# cache for arrays of lazily loaded numpy files, by default up to 1 GB
+_lazy_numpy_cache = _LRUCache(max_size=2**30)
+
+
+def set_lazy_numpy_cache_size(max_n_bytes: int):
+    """Sets the maximum size of the cache that keeps arrays of lazily loaded numpy files in memory.
+
+    If the arrays in the cache exceed the size, then the least recently used arrays are removed
+    from it and are read again from their files when they are accessed the next time.
+    Memory-mapped arrays do not count towards the size of the cache.
+
+    Parameters:
+        max_n_bytes (int):
+            Maximum size of the cache in bytes.
+            Default of the cache is 1 GB.
+    """
+    _lazy_numpy_cache.set_max_size(max_n_bytes)
+
+
+def clear_lazy_numpy_cache():
+    """Removes all arrays of lazily loaded numpy files from the cache."""
+    _lazy_numpy_cache.clear()
+
+
+class LazyNumpyFile(LazyValue):
+    """
+    Placeholder for the array of a numpy file that is read when it is accessed in a
+    [LazyAttrDict][exputils.misc.attrdict.LazyAttrDict].
+    See [load_numpy_files][exputils.io.numpy.load_numpy_files].
+
+    The array is kept in a cache of bounded size shared by all placeholders
+    (see [set_lazy_numpy_cache_size][exputils.io.numpy.set_lazy_numpy_cache_size]).
+    If it was removed from the cache, then it is read again from the file.
+
+    Parameters:
+        file_paths (list):
+            Paths to the .npy file, or to a .npz container and its segments.
+        key (str):
+            Name of the array in .npz files.
+            Default is None for .npy files.
+        allow_pickle (bool):
+            Whether to allow loading pickled (serialized) objects.
+        mmap_mode (str):
+            Mode to memory-map .npy files.
+            Default is None.
+    """
+
+    __slots__ = ('file_paths', 'key', 'allow_pickle', 'mmap_mode')
+
+    def __init__(self, file_paths, key=None, allow_pickle=True, mmap_mode=None):
+        self.file_paths = tuple(file_paths)
+        self.key = key
+        self.allow_pickle = allow_pickle
+        self.mmap_mode = mmap_mode
+
+
+    def load(self):
+        # files that were rewritten since their array was cached are read again
+        try:
+            file_stats = tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, self.file_paths))
+        except FileNotFoundError:
+            file_stats = None
+        cache_key = (self.file_paths, self.key, self.mmap_mode, file_stats)
+
+        value = _lazy_numpy_cache.get(cache_key)
+        if value is None:
+            try:
+                if self.key is None:
+                    array = _load_numpy_file(self.file_paths[0], allow_pickle=self.allow_pickle, mmap_mode=self.mmap_mode)
+                else:
+                    segments = []
+                    for file in self.file_paths:
+                        with np.load(file, allow_pickle=self.allow_pickle) as npz_file:
+                            segments.append({self.key: npz_file[self.key]})
+                    array = _concatenate_numpy_segments(segments)[self.key]
+            except FileNotFoundError:
+                raise
+            except Exception as e:
+                raise Exception('Exception during loading of file {!r}!'.format(self.file_paths[0])) from e
+
+            value = _get_numpy_value(array)
+            size = 0 if isinstance(array, np.memmap) else array.nbytes
+            _lazy_numpy_cache.add(cache_key, value, size)
+
+        return value
+
+
+    def __repr__(self):
+        if self.key is None:
+            return '{}({!r})'.format(type(self).__name__, self.file_paths[0])
+        return '{}({!r}, key={!r})'.format(type(self).__name__, self.file_paths[0], self.key)
+
+
 def load_numpy_files(directory: str,
                     allowed_data_filter: Optional[list] = None,
                     denied_data_filter: Optional[list] = None,
-                    allow_pickle: bool = True) -> AttrDict:
+                    allow_pickle: bool = True,
+                    mmap_mode: Optional[str] = None,
+                    is_lazy: bool = False) -> AttrDict:
     """Loads numpy files from a specified directory into an AttrDict.
 
     Parameters:
@@ -72,6 +428,21 @@ def load_numpy_files(directory: str,
             Whether to allow loading pickled (serialized) objects.
             Default is True. <br>
             :warning: This could allow arbitrary code execution. Only load files you trust!
+        mmap_mode (str, optional):
+            If set, the arrays of .npy files are memory-mapped with the given mode
+            (`'r'`, `'r+'`, `'w+'`, or `'c'`, see `numpy.load`) instead of being read into memory.
+            Their data is then only read from disk when it is accessed.
+            Arrays of objects and the content of .npz files can not be memory-mapped and are loaded
+            into memory.
+            Default is None, which loads all arrays into memory.
+        is_lazy (bool):
+            If True, the files are not read.
+            Instead, the returned dictionary is a [LazyAttrDict][exputils.misc.attrdict.LazyAttrDict]
+            with placeholders ([LazyNumpyFile][exputils.io.numpy.LazyNumpyFile]) that read their
+            array when it is accessed for the first time.
+            Loaded arrays are kept in a cache of bounded size
+            (see [set_lazy_numpy_cache_size][exputils.io.numpy.set_lazy_numpy_cache_size]).
+            Default is False.
 
     Raises:
         ValueError:
@@ -93,44 +464,70 @@ def load_numpy_files(directory: str,
     if not os.path.isdir(directory):
         raise FileNotFoundError('Directory {!r} does not exist!'.format(directory))
 
-    data = AttrDict()
+    data = LazyAttrDict() if is_lazy else AttrDict()
 
     for file in glob(os.path.join(directory, '*.npy')):
         stat_name = os.path.splitext(os.path.basename(file))[0]
 
         if eu.misc.is_allowed(stat_name, allowed_list=allowed_data_filter, denied_list=denied_data_filter):
+            if is_lazy:
+                data[stat_name] = LazyNumpyFile([file], allow_pickle=allow_pickle, mmap_mode=mmap_mode)
+                continue
+
             try:
-                stat_val = np.load(file, allow_pickle=allow_pickle)
+                stat_val = _load_numpy_file(file, allow_pickle=allow_pickle, mmap_mode=mmap_mode)
             except FileNotFoundError:
                 raise
             except Exception as e:
                 raise Exception('Exception during loading of file {!r}!'.format(file)) from e
 
-            if len(stat_val.shape) == 0:
-                stat_val = stat_val.dtype.type(stat_val)
+            data[stat_name] = _get_numpy_value(stat_val)
 
-            data[stat_name] = stat_val
+    # group npz containers with their segments
+    container_files = dict()
+    for file in sorted(glob(os.path.join(directory, '*.npz'))):
+        match = _NUMPY_SEGMENT_FILE_REGEX.match(os.path.basename(file))
+        if match is not None:
+            stat_name = match.group(1)
+        else:
+            stat_name = os.path.splitext(os.path.basename(file))[0]
+        container_files.setdefault(stat_name, []).append(file)
 
-    for file in glob(os.path.join(directory, '*.npz')):
-        stat_name = os.path.splitext(os.path.basename(file))[0]
+    for stat_name, files in container_files.items():
         if eu.misc.is_allowed(stat_name, allowed_list=allowed_data_filter, denied_list=denied_data_filter):
-            try:
-                stat_vals = AttrDict(np.load(file, allow_pickle=allow_pickle))
-            except FileNotFoundError:
-                raise
-            except Exception as e:
-                raise Exception('Exception during loading of file {!r}!'.format(file)) from e
+            # the container itself comes first, followed by its segments in the order of their number
+            files = sorted(files, key=lambda f: _NUMPY_SEGMENT_FILE_REGEX.match(os.path.basename(f)) is not None)
+
+            segments = []
+            for file in files:
+                try:
+                    with np.load(file, allow_pickle=allow_pickle) as npz_file:
+                        # only the names of the arrays are read if the data is loaded lazily
+                        segments.append(dict.fromkeys(npz_file.files, file) if is_lazy else dict(npz_file))
+                except FileNotFoundError:
+                    raise
+                except Exception as e:
+                    raise Exception('Exception during loading of file {!r}!'.format(file)) from e
+
+            if is_lazy:
+                files_per_key = dict()
+                for segment in segments:
+                    for key, file in segment.items():
+                        files_per_key.setdefault(key, []).append(file)
+                stat_vals = LazyAttrDict({
+                    key: LazyNumpyFile(key_files, key=key, allow_pickle=allow_pickle)
+                    for key, key_files in files_per_key.items()})
+            else:
+                stat_vals = AttrDict(_concatenate_numpy_segments(segments))
 
             # remove data that should not be loaded
-            keys = [k for k, v in stat_vals.items() if not eu.misc.is_allowed(k, allowed_list=allowed_data_filter, denied_list=denied_data_filter)]
+            keys = [k for k in stat_vals.keys() if not eu.misc.is_allowed(k, allowed_list=allowed_data_filter, denied_list=denied_data_filter)]
             for x in keys:
                 del stat_vals[x]
 
-            # numpy encapsulates scalars as darrays with an empty shape
-            # recover the original type
-            for substat_name, substat_val in stat_vals.items():
-                if len(substat_val.shape) == 0:
-                    stat_vals[substat_name] = substat_val.dtype.type(substat_val)
+            if not is_lazy:
+                for substat_name, substat_val in stat_vals.items():
+                    stat_vals[substat_name] = _get_numpy_value(substat_val)
 
             data[stat_name] = stat_vals
 
@@ -9,11 +9,13 @@
 ##
 from exputils.manage.experimentgenerator import generate_experiment_files
 from exputils.manage.experimentstarter import start_experiments
+from exputils.manage.experimentstarter import async_start_experiments
 from exputils.manage.experimentstarter import start_slurm_experiments
 from exputils.manage.experimentstarter import start_torque_experiments
 from exputils.manage.experimentstarter import get_scripts
 from exputils.manage.experimentstarter import get_number_of_scripts_to_execute
 from exputils.manage.experimentstarter import get_number_of_scripts
+from exputils.manage.experimentstarter import get_experiments_progress
 
 
 
@@ -7,18 +7,33 @@
 ##
 ## exputils is provided under GPL-3.0-or-later
 ##
+import asyncio
+import contextlib
 import glob
+import json
 import os
+import queue
+import re
 import subprocess
+import sys
+import threading
 import time
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 
 import exputils
 import numpy as np
 from datetime import datetime
 import fasteners
 
+try:
+    import resource
+except ImportError:
+    # not available on windows, where the resource usage of processes is not recorded (see os.wait4)
+    resource = None
+
 STATUS_FILE_EXTENSION = '.status'
+RESOURCES_FILE_EXTENSION = '.resources'
+RUNTIME_FILE_EXTENSION = '.runtime'
 
 
 def start_slurm_experiments(directory=None, start_scripts='*.slurm', is_parallel=True, verbose=False, post_start_wait_time=0):
@@ -54,7 +69,10 @@ def start_experiments(directory: Optional[str] = None,
                       is_chdir: bool = True,
                       verbose: bool = False,
                       post_start_wait_time: float = 0.,
-                      write_status_files_automatically: bool = True):
+                      write_status_files_automatically: bool = True,
+                      resources: Optional[Union[str, dict]] = None,
+                      is_pin_cpus: bool = False,
+                      ordering: Union[str, Callable] = 'alphabetical'):
     """
     Searches all the start scripts of experiments and/or repetitions in the experiments folder
     and executes them either in parallel or sequentially.
@@ -86,12 +104,598 @@ def start_experiments(directory: Optional[str] = None,
             Should status files that document if scripts were started and executed be
             written by the manager. These are important to identify if an experiment or repetition
             did run already.
+        resources (str, dict):
+            Resources of the machine on which the scripts are packed according to the resources
+            they need (see [get_script_resources][exputils.manage.experimentstarter.get_script_resources]).
+            A dictionary with the number of cores (`n_cpus`) and the memory in bytes or as a string
+            such as `'16G'` (`memory`), or `'auto'` to use the cores of the process and the currently
+            available memory of the machine.
+            Scripts are started in their order if their resources are free. Otherwise, later scripts
+            that fit into the free resources are started first.
+            A script that needs more than the machine has is started when no other script runs.
+            Default is `None`, which treats every script as using a single slot of `parallel`.
+        is_pin_cpus (bool):
+            Should each started process be pinned to the cores that it was given
+            (see `os.sched_setaffinity`). Only used if `resources` are given.
+            Default is `False`.
+        ordering (str, callable):
+            Order in which the scripts are started if not all can run at once:
+
+            - `'alphabetical'`: Order of their paths.
+            - `'longest_first'`: Scripts with the longest duration of their last run, according to
+              their status file, first. Scripts without a previous run are started before them,
+              as their duration is unknown.
+            - `'round_robin'`: Alternates between the experiments, so that the first repetitions
+              of all experiments are started before the second ones.
+            - callable: Key function that gets the path of a script and returns its priority.
+              Scripts with lower keys are started first, as with `sorted`.
+
+            Default is `'alphabetical'`.
     """
 
     if directory is None:
         directory = os.path.join('.', exputils.DEFAULT_EXPERIMENTS_DIRECTORY)
 
-    # handle number of parallel processes
+    n_parallel = _get_number_of_parallel_processes(parallel)
+
+    resource_pool = None
+    if resources is not None:
+        resource_pool = _ResourcePool(resources, is_pin_cpus=is_pin_cpus)
+
+    if is_chdir:
+        cwd = os.getcwd()
+
+    # get all scripts
+    all_scripts = get_scripts(directory=directory, start_scripts=start_scripts)
+
+    ignored_scripts = []
+    todo_scripts = _get_todo_scripts(all_scripts, ignored_scripts, write_status_files_automatically)
+    todo_scripts = _order_scripts(todo_scripts, ordering)
+
+    # start all in parallel if wanted
+    if n_parallel == np.inf:
+        n_parallel = len(todo_scripts)
+
+    # running processes and their corresponding scripts
+    running_processes = dict()
+
+    # processes are put into the queue by their waiter threads as soon as they finish, so that the next
+    # script can be started directly when a slot becomes free
+    finished_processes = queue.Queue()
+
+    waiting_scripts = list(todo_scripts)
+
+    # run as long as there is an active process or we did not finish all processes yet
+    while running_processes or waiting_scripts:
+
+        # start as many processes as parallel processes are allowed
+        waiting_script_idx = 0
+        while len(running_processes) < n_parallel and waiting_script_idx < len(waiting_scripts):
+
+            script = waiting_scripts[waiting_script_idx]
+
+            script_resources = None
+            if resource_pool is not None:
+                # skip scripts whose resources are not free, except if no other script is running
+                script_resources = get_script_resources(script)
+                if running_processes and not resource_pool.is_free(script_resources):
+                    waiting_script_idx += 1
+                    continue
+
+            del waiting_scripts[waiting_script_idx]
+
+            # lock processing of the script, so that no other running experimentstarter is starting it in parallel
+            with _get_script_lock(script):
+
+                # check the script status, only start if needed
+                status = get_script_status(script)
+                if _is_to_start_status(status):
+
+                    if write_status_files_automatically:
+                        _update_script_status(script, 'running')
+
+                    # start
+                    script_directory = os.path.dirname(script)
+                    script_path_in_its_working_directory = os.path.join('.', os.path.basename(script))
+
+                    print('{} start {!r} (previous status: {}) ...'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S"), script, status))
+
+                    process_environ = {
+                        **os.environ,
+                        "EU_STATUS_FILE": script_path_in_its_working_directory + STATUS_FILE_EXTENSION,
+                    }
+
+                    allocation = None
+                    pinning_context = contextlib.nullcontext()
+                    if resource_pool is not None:
+                        allocation = resource_pool.allocate(script_resources)
+                        # pin the process before its command is executed, so that all its workers are pinned as well
+                        pinning_context = resource_pool.pinned_cpus(allocation)
+
+                    with pinning_context:
+                        if is_chdir:
+                            os.chdir(script_directory)
+                            process = subprocess.Popen(start_command.format(script_path_in_its_working_directory).split(), env=process_environ)
+                            os.chdir(cwd)
+                        else:
+                            process = subprocess.Popen(start_command.format(script).split(), cwd=script_directory, env=process_environ)
+
+                    running_processes[process] = (script, allocation, time.time())
+                    threading.Thread(target=_wait_for_process, args=(process, finished_processes), daemon=True).start()
+
+                    if post_start_wait_time > 0:
+                        time.sleep(post_start_wait_time)
+
+                else:
+                    # do not start
+                    ignored_scripts.append((script, status))
+
+        if running_processes:
+            # block until the next process finished
+            process, rusage = finished_processes.get()
+            end_time = time.time()
+            script, allocation, start_time = running_processes.pop(process)
+            if allocation is not None:
+                resource_pool.release(allocation)
+
+            if process.returncode == 0:
+                status = 'finished'
+            else:
+                status = 'error'
+
+            if write_status_files_automatically:
+                _update_script_status(script, status)
+                _write_script_runtime(script, _get_runtime_record(start_time, end_time, process.returncode, status, rusage))
+
+            print('{} finished {!r} (status: {})'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S"), script, status))
+
+    if verbose:
+        if ignored_scripts:
+            print('Ignored scripts:')
+            for (script_path, status) in ignored_scripts:
+                print('\t- {!r} (status: {})'.format(script_path, status))
+
+
+async def async_start_experiments(directory: Optional[str] = None,
+                                  start_scripts: Optional[str] = 'run_*.py',
+                                  start_command: Optional[str] = '{}',
+                                  parallel: Union[bool, int] = True,
+                                  is_chdir: bool = True,
+                                  verbose: bool = False,
+                                  post_start_wait_time: float = 0.,
+                                  write_status_files_automatically: bool = True,
+                                  ordering: Union[str, Callable] = 'alphabetical') -> list:
+    """
+    Coroutine version of [start_experiments][exputils.manage.experimentstarter.start_experiments]
+    that can be used within an asyncio event loop, for example of a service that orchestrates experiments.
+
+    The scripts are not started as asyncio subprocesses (`asyncio.create_subprocess_exec`), as these do
+    not report the resource usage of the processes for their runtime records. Instead, each script is
+    started with `subprocess.Popen` and waited for in its own thread.
+    Status files and locks are handled as by `start_experiments`. Their blocking io is done in the
+    default executor of the event loop.
+    The working directory of the calling process is never changed, instead the scripts are
+    started in their directory.
+    If the coroutine is cancelled, then the running scripts are terminated and their status is
+    set to `'error'`, so that they are started again by the next call.
+
+    >>> results = asyncio.run(async_start_experiments(directory='./experiments', parallel=4))
+
+    Parameters:
+        directory (str):
+            Directory in which the start scripts are searched.
+            Default is `'./experiments'`.
+        start_scripts (str):
+            Filename of the start script file that are searched under the given target directory.
+            Can include '*' to search for scripts, for example 'run_*.py'.
+            The default `'run_*'` will look for all files that start with 'run' and try to start them.
+        parallel (bool, int):
+            Defines if scripts should be started in parallel and how many are allowed to run in parallel.
+            If `False` then the scripts are started sequentially one after another.
+            If `True` then the scripts are started and executed in parallel all at once.
+            If an integer, then the number defines how many scripts can run in parallel.
+        is_chdir (bool):
+            Should the script be given to the start command with its path relative to its
+            directory, as `start_experiments` does if it changes to the directory of the script.
+        verbose (bool):
+            Should verbose output with more information given. Default is `False`.
+        post_start_wait_time (float):
+            Time waited before one process is started after another.
+        write_status_files_automatically (bool):
+            Should status files that document if scripts were started and executed be
+            written by the manager. These are important to identify if an experiment or repetition
+            did run already.
+        ordering (str, callable):
+            Order in which the scripts are started if not all can run at once:
+
+            - `'alphabetical'`: Order of their paths.
+            - `'longest_first'`: Scripts with the longest duration of their last run, according to
+              their status file, first. Scripts without a previous run are started before them,
+              as their duration is unknown.
+            - `'round_robin'`: Alternates between the experiments, so that the first repetitions
+              of all experiments are started before the second ones.
+            - callable: Key function that gets the path of a script and returns its priority.
+              Scripts with lower keys are started first, as with `sorted`.
+
+            Default is `'alphabetical'`.
+
+    Returns:
+        results (list): An AttrDict for each found script with:
+
+            - script: Path to the script.
+            - is_started: True if the script was started, False if it was ignored because of its status.
+            - status: Status after the script finished (`'finished'` or `'error'`), or the status
+                      because of which it was ignored.
+            - returncode: Return code of the process, or None if it was not started.
+            - runtime: Runtime record of the run (see [get_script_runtimes][exputils.manage.experimentstarter.get_script_runtimes]),
+                       or None if it was not started.
+    """
+
+    if directory is None:
+        directory = os.path.join('.', exputils.DEFAULT_EXPERIMENTS_DIRECTORY)
+
+    n_parallel = _get_number_of_parallel_processes(parallel)
+
+    loop = asyncio.get_running_loop()
+
+    # the scripts and their status files are read in a thread, so that their io does not block the event loop
+    all_scripts = await loop.run_in_executor(None, get_scripts, directory, start_scripts)
+
+    ignored_scripts = []
+    todo_scripts = await loop.run_in_executor(None, _get_todo_scripts, all_scripts, ignored_scripts, write_status_files_automatically)
+    todo_scripts = await loop.run_in_executor(None, _order_scripts, todo_scripts, ordering)
+
+    results = {script: exputils.AttrDict(script=script, is_started=False, status=status, returncode=None, runtime=None)
+               for script, status in ignored_scripts}
+
+    # limits the number of running scripts
+    semaphore = asyncio.Semaphore(len(todo_scripts) if n_parallel == np.inf else n_parallel)
+    # scripts are started one after another in their order
+    start_lock = asyncio.Lock()
+
+    async def run_script(script):
+
+        async with semaphore:
+
+            process = None
+            try:
+                async with start_lock:
+
+                    # the lock and status files are handled in a thread, so that their io does not block the event loop
+                    process_future = loop.create_future()
+                    start_future = loop.run_in_executor(
+                        None, _start_script_process, script, start_command, is_chdir,
+                        write_status_files_automatically, process_future, loop)
+                    try:
+                        status, process, start_time = await asyncio.shield(start_future)
+                    except asyncio.CancelledError:
+                        # the script might have been started nevertheless, so that it has to be terminated
+                        _, process, _ = await start_future
+                        raise
+
+                    if process is None:
+                        ignored_scripts.append((script, status))
+                        return exputils.AttrDict(script=script, is_started=False, status=status, returncode=None, runtime=None)
+
+                    if post_start_wait_time > 0:
+                        await asyncio.sleep(post_start_wait_time)
+
+                rusage = await asyncio.shield(process_future)
+            except asyncio.CancelledError:
+                # terminate a started script, also if it was cancelled during the wait after its start
+                if process is not None:
+                    await _terminate_process(process, process_future)
+                    if write_status_files_automatically:
+                        await loop.run_in_executor(None, _update_script_status, script, 'error')
+                raise
+
+            end_time = time.time()
+            returncode = process.returncode
+            status = 'finished' if returncode == 0 else 'error'
+            runtime = _get_runtime_record(start_time, end_time, returncode, status, rusage)
+
+            if write_status_files_automatically:
+                await loop.run_in_executor(None, _write_script_end, script, status, runtime)
+
+            print('{} finished {!r} (status: {})'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S"), script, status))
+
+            return exputils.AttrDict(script=script, is_started=True, status=status, returncode=returncode, runtime=runtime)
+
+    for result in await asyncio.gather(*(run_script(script) for script in todo_scripts)):
+        results[result.script] = result
+
+    if verbose:
+        if ignored_scripts:
+            print('Ignored scripts:')
+            for (script_path, status) in ignored_scripts:
+                print('\t- {!r} (status: {})'.format(script_path, status))
+
+    return [results[script] for script in all_scripts]
+
+
+def _start_script_process(script, start_command, is_chdir, write_status_files_automatically, process_future, loop):
+    """
+    Starts a script of async_start_experiments if its status allows it. Is called in a thread of
+    the executor of the event loop, as it does blocking io on the lock and status file of the script.
+    The process is waited for in a thread that sets its resource usage as result of the process future.
+
+    Returns the status of the script before it was started, its process (None if it was not started)
+    and its start time.
+    """
+
+    # lock processing of the script, so that no other running experimentstarter is starting it in parallel
+    with _get_script_lock(script):
+
+        # check the script status, only start if needed
+        status = get_script_status(script)
+        if not _is_to_start_status(status):
+            return status, None, None
+
+        if write_status_files_automatically:
+            _update_script_status(script, 'running')
+
+        script_directory = os.path.dirname(script)
+        script_path_in_its_working_directory = os.path.join('.', os.path.basename(script))
+
+        print('{} start {!r} (previous status: {}) ...'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S"), script, status))
+
+        process_environ = {
+            **os.environ,
+            "EU_STATUS_FILE": script_path_in_its_working_directory + STATUS_FILE_EXTENSION,
+        }
+
+        if is_chdir:
+            command = start_command.format(script_path_in_its_working_directory).split()
+        else:
+            command = start_command.format(script).split()
+
+        start_time = time.time()
+        process = subprocess.Popen(command, cwd=script_directory, env=process_environ)
+
+        # the process is waited for in a thread, as the asyncio child watchers do not report its resource usage
+        threading.Thread(target=_wait_for_process_future, args=(process, process_future, loop), daemon=True).start()
+
+    return status, process, start_time
+
+
+def _write_script_end(script, status, runtime):
+    """Writes the status and runtime record of a script of async_start_experiments after its run."""
+    _update_script_status(script, status)
+    _write_script_runtime(script, runtime)
+
+
+def get_script_duration(script_file: str) -> Optional[float]:
+    """
+    Returns the duration of the last run of a start script according to its runtime file
+    (see [get_script_runtimes][exputils.manage.experimentstarter.get_script_runtimes]) or,
+    if it has none, according to its status file, i.e. the time between its last `'running'` status and the following `'finished'` or `'error'` status.
+
+    Parameters:
+        script_file (str): Path to the script file.
+
+    Returns:
+        duration (float, None): Duration in seconds, or None if the script did not run before.
+    """
+    # the runtime records are more exact than the status file, if they exist
+    runtimes = get_script_runtimes(script_file)
+    if runtimes:
+        return runtimes[-1].duration
+
+    duration = None
+    start_time = None
+    for status_time, status in _read_script_status_history(script_file):
+        if status == 'running':
+            start_time = status_time
+        elif status in ('finished', 'error') and start_time is not None:
+            duration = (status_time - start_time).total_seconds()
+            start_time = None
+
+    return duration
+
+
+def _read_script_status_history(script_file):
+    """Returns the list of (time, status) entries of the status file of a script."""
+    status_file_path = script_file + STATUS_FILE_EXTENSION
+    if not os.path.isfile(status_file_path):
+        return []
+
+    with open(status_file_path, 'r') as f:
+        lines = f.read().splitlines()
+
+    # the status file has alternating lines of times and status
+    history = []
+    for time_str, status in zip(lines[0::2], lines[1::2]):
+        try:
+            history.append((datetime.strptime(time_str, "%Y/%m/%d %H:%M:%S"), status))
+        except ValueError:
+            continue
+    return history
+
+
+def _order_scripts(scripts, ordering):
+    """Orders the scripts according to the ordering policy, see start_experiments."""
+
+    if callable(ordering):
+        return sorted(scripts, key=ordering)
+
+    elif ordering == 'alphabetical':
+        return sorted(scripts)
+
+    elif ordering == 'longest_first':
+        durations = [get_script_duration(script) for script in scripts]
+        # scripts with unknown durations are first, sorted is stable so that ties keep their order
+        return [script for script, _ in sorted(zip(scripts, durations), key=lambda item: (item[1] is not None, -(item[1] or 0)))]
+
+    elif ordering == 'round_robin':
+        scripts_per_experiment = dict()
+        for script in scripts:
+            scripts_per_experiment.setdefault(_get_script_experiment_directory(script), []).append(script)
+
+        ordered_scripts = []
+        experiment_scripts = list(scripts_per_experiment.values())
+        for idx in range(max((len(cur_scripts) for cur_scripts in experiment_scripts), default=0)):
+            for cur_scripts in experiment_scripts:
+                if idx < len(cur_scripts):
+                    ordered_scripts.append(cur_scripts[idx])
+        return ordered_scripts
+
+    else:
+        raise ValueError('Unknown ordering {!r}! Only \'alphabetical\', \'longest_first\', \'round_robin\', or a callable are allowed.'.format(ordering))
+
+
+def _get_script_experiment_directory(script):
+    """Returns the experiment directory to which a script belongs, or the directory of the script if it is not in an experiment directory."""
+    experiment_directory_prefix = re.sub(r'\{.*\}', '', exputils.EXPERIMENT_DIRECTORY_TEMPLATE)
+
+    directory = os.path.dirname(script)
+    cur_directory = directory
+    while cur_directory:
+        if os.path.basename(cur_directory).startswith(experiment_directory_prefix):
+            return cur_directory
+        parent_directory = os.path.dirname(cur_directory)
+        if parent_directory == cur_directory:
+            # reached the root directory
+            break
+        cur_directory = parent_directory
+    return directory
+
+
+def get_script_resources(script_file: str) -> dict:
+    """
+    Returns the resources that a start script needs to run.
+
+    They are defined in a JSON file next to the script with the same name and the extension
+    `'.resources'`, for example `run_experiment.py.resources`:
+    `{"n_cpus": 4, "memory": "8G"}`.
+    Scripts without such a file need a single core and no memory.
+
+    Parameters:
+        script_file (str): Path to the script file.
+
+    Returns:
+        resources (dict): Number of cores (`n_cpus`) and memory in bytes (`memory`).
+    """
+    resources = dict(n_cpus=1, memory=0)
+
+    resources_file_path = script_file + RESOURCES_FILE_EXTENSION
+    if os.path.isfile(resources_file_path):
+        with open(resources_file_path, 'r') as fh:
+            resources.update(json.load(fh))
+
+    resources['n_cpus'] = int(resources['n_cpus'])
+    resources['memory'] = _parse_memory(resources['memory'])
+    return resources
+
+
+def _parse_memory(memory):
+    """Converts a memory size given in bytes or as a string with a unit, such as '16G', into bytes."""
+    if isinstance(memory, str):
+        memory = memory.strip().upper().rstrip('B')
+        units = dict(K=1024, M=1024 ** 2, G=1024 ** 3, T=1024 ** 4)
+        if memory and memory[-1] in units:
+            return int(float(memory[:-1]) * units[memory[-1]])
+        return int(float(memory))
+    return int(memory)
+
+
+class _ResourcePool:
+    """Cores and memory of the machine that are allocated to started scripts."""
+
+    def __init__(self, resources, is_pin_cpus=False):
+
+        if hasattr(os, 'sched_getaffinity'):
+            cpu_ids = sorted(os.sched_getaffinity(0))
+        else:
+            cpu_ids = list(range(os.cpu_count() or 1))
+
+        if resources == 'auto':
+            resources = dict(n_cpus=len(cpu_ids), memory=_get_available_memory())
+        elif not isinstance(resources, dict):
+            raise ValueError('Argument \'resources\' must be either \'auto\' or a dictionary!')
+
+        n_cpus = resources.get('n_cpus')
+        if n_cpus is None:
+            n_cpus = len(cpu_ids)
+        memory = resources.get('memory')
+
+        if is_pin_cpus and not hasattr(os, 'sched_setaffinity'):
+            raise ValueError('Pinning processes to cores is not supported on this platform!')
+
+        self.is_pin_cpus = is_pin_cpus
+        self.n_free_cpus = n_cpus
+        self.free_memory = np.inf if memory is None else _parse_memory(memory)
+        # cores are handed out in order, if there are more cores than the process can use they are reused
+        self.free_cpu_ids = [cpu_ids[idx % len(cpu_ids)] for idx in range(n_cpus)]
+
+
+    def is_free(self, script_resources):
+        return script_resources['n_cpus'] <= self.n_free_cpus and script_resources['memory'] <= self.free_memory
+
+
+    def allocate(self, script_resources):
+        """Allocates the resources of a script. Scripts that need more than is free get the rest."""
+        n_cpus = max(0, min(script_resources['n_cpus'], self.n_free_cpus))
+        memory = min(script_resources['memory'], self.free_memory)
+
+        cpu_ids = self.free_cpu_ids[:n_cpus]
+        del self.free_cpu_ids[:n_cpus]
+        self.n_free_cpus -= n_cpus
+        self.free_memory -= memory
+
+        return (n_cpus, memory, cpu_ids)
+
+
+    @contextlib.contextmanager
+    def pinned_cpus(self, allocation):
+        """
+        Context in which the calling thread is pinned to the cores of an allocation. Processes that are
+        started in the context inherit the pinning, so that all their workers are pinned as well.
+        The previous cores of the thread are restored afterwards. Does nothing if processes are not pinned.
+
+        The pinning is not done in the child via a preexec_fn, as this is not safe if other threads are running.
+        """
+        cpu_ids = set(allocation[2])
+        if not self.is_pin_cpus or not cpu_ids:
+            yield
+            return
+
+        # on linux, sched_setaffinity for pid 0 only changes the mask of the calling thread
+        previous_cpu_ids = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, cpu_ids)
+        try:
+            yield
+        finally:
+            os.sched_setaffinity(0, previous_cpu_ids)
+
+
+    def release(self, allocation):
+        n_cpus, memory, cpu_ids = allocation
+        self.n_free_cpus += n_cpus
+        self.free_memory += memory
+        self.free_cpu_ids.extend(cpu_ids)
+
+
+def _get_available_memory():
+    """Returns the currently available memory of the machine in bytes, or None if it can not be identified."""
+
+    # on linux, the available memory includes the page cache that can be freed, in contrast to the free memory
+    try:
+        with open('/proc/meminfo', 'r') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    # given in kB
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _get_number_of_parallel_processes(parallel):
+    """Returns the number of scripts that are allowed to run in parallel, np.inf if all."""
     if isinstance(parallel, bool):
         if parallel:
             n_parallel = np.inf
@@ -104,14 +708,14 @@ def start_experiments(directory: Optional[str] = None,
             n_parallel = parallel
     else:
         raise ValueError('Argument \'parallel\' must be either a bool or an integer number!')
+    return n_parallel
 
-    if is_chdir:
-        cwd = os.getcwd()
-
-    # get all scripts
-    all_scripts = get_scripts(directory=directory, start_scripts=start_scripts)
 
-    ignored_scripts = []
+def _get_todo_scripts(all_scripts, ignored_scripts, write_status_files_automatically):
+    """
+    Returns the scripts that have to be executed according to their initial status and writes a status for them.
+    Scripts that are already finished are added to the ignored scripts.
+    """
     todo_scripts = []
     # check their initial status and write one for the scripts that will be started
     for script in all_scripts:
@@ -132,96 +736,132 @@ def start_experiments(directory: Optional[str] = None,
             else:
                 ignored_scripts.append((script, status))
 
-    # start all in parallel if wanted
-    if n_parallel == np.inf:
-        n_parallel = len(todo_scripts)
-
-    # started process and their corresponding scripts
-    started_processes = []
-    started_scripts = []
-    finished_processes_idxs = []
+    return todo_scripts
 
-    next_todo_script_idx = 0
-    n_active_processes = 0
 
-    # run as long as there is an active process or we did not finish all processes yet
-    while n_active_processes > 0 or next_todo_script_idx < len(todo_scripts):
+def _wait_for_process(process, finished_processes):
+    """Waits until the process finished and puts it with its resource usage into the queue of finished processes."""
+    rusage = _wait_for_process_rusage(process)
+    finished_processes.put((process, rusage))
 
-        # start as many processes as parallel processes are allowed
-        for i in range(n_parallel - n_active_processes):
 
-            # stop starting processes when all scripts are started
-            if next_todo_script_idx < len(todo_scripts):
+def _wait_for_process_future(process, future, loop):
+    """Waits until the process finished and sets its resource usage as result of the future of the given event loop."""
+    rusage = _wait_for_process_rusage(process)
+    try:
+        loop.call_soon_threadsafe(lambda: future.done() or future.set_result(rusage))
+    except RuntimeError:
+        # the event loop was already closed
+        pass
 
-                script = todo_scripts[next_todo_script_idx]
-                next_todo_script_idx += 1
 
-                # lock processing of the script, so that no other running experimentstarter is starting it in parallel
-                with _get_script_lock(script):
-
-                    # check the script status, only start if needed
-                    status = get_script_status(script)
-                    if _is_to_start_status(status):
+async def _terminate_process(process, process_future, timeout=5.):
+    """
+    Terminates a process of async_start_experiments and waits until it is reaped by its waiter thread.
+    The process is killed if it did not end after the timeout.
+    """
+    if process.returncode is None:
+        process.terminate()
+    try:
+        await asyncio.wait_for(asyncio.shield(process_future), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await asyncio.shield(process_future)
 
-                        if write_status_files_automatically:
-                            _update_script_status(script, 'running')
 
-                        # start
-                        script_directory = os.path.dirname(script)
-                        script_path_in_its_working_directory = os.path.join('.', os.path.basename(script))
+def _wait_for_process_rusage(process):
+    """
+    Waits until the process finished and sets its returncode.
+    Returns its resource usage (see `os.wait4`), or None if it is not available on the system.
+    """
+    if not hasattr(os, 'wait4'):
+        process.wait()
+        return None
+
+    try:
+        _, wait_status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # the process was already reaped by someone else
+        process.wait()
+        return None
+
+    process.returncode = os.waitstatus_to_exitcode(wait_status)
+    return rusage
+
+
+def _get_runtime_record(start_time, end_time, returncode, status, rusage):
+    """Returns the runtime record of a finished script that is written to its runtime file."""
+    record = exputils.AttrDict(
+        start_time=start_time,
+        end_time=end_time,
+        duration=end_time - start_time,
+        returncode=returncode,
+        status=status,
+        user_cpu_time=None,
+        system_cpu_time=None,
+        max_rss=None,
+        starter_max_rss=None,
+    )
+    if rusage is not None:
+        record['user_cpu_time'] = rusage.ru_utime
+        record['system_cpu_time'] = rusage.ru_stime
+        # the peak memory of the process includes the memory of the starter that was forked to start it
+        # the peak memory of the starter is recorded to identify if the value is the one of the script
+        record['max_rss'] = _get_max_rss_bytes(rusage)
+        record['starter_max_rss'] = _get_max_rss_bytes(resource.getrusage(resource.RUSAGE_SELF))
+    return record
 
-                        print('{} start {!r} (previous status: {}) ...'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S"), script, status))
 
-                        process_environ = {
-                            **os.environ,
-                            "EU_STATUS_FILE": script_path_in_its_working_directory + STATUS_FILE_EXTENSION,
-                        }
+def _get_max_rss_bytes(rusage):
+    """Returns the peak resident set size of a resource usage in bytes."""
+    # ru_maxrss is in kilobytes on linux, but in bytes on macOS
+    return rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
 
-                        if is_chdir:
-                            os.chdir(script_directory)
-                            process = subprocess.Popen(start_command.format(script_path_in_its_working_directory).split(), env=process_environ)
-                            os.chdir(cwd)
-                        else:
-                            process = subprocess.Popen(start_command.format(script).split(), cwd=script_directory, env=process_environ)
 
-                        started_processes.append(process)
-                        started_scripts.append(script)
+def _write_script_runtime(script, record):
+    """Appends a runtime record as a json line to the runtime file of the script."""
+    with open(script + RUNTIME_FILE_EXTENSION, 'a') as file:
+        file.write(json.dumps(record) + '\n')
 
-                        if post_start_wait_time > 0:
-                            time.sleep(post_start_wait_time)
 
-                    else:
-                        # do not start
-                        ignored_scripts.append((script, status))
+def get_script_runtimes(script_file: str) -> list:
+    """
+    Returns the runtime records of all runs of a start script that were started by
+    [start_experiments][exputils.manage.experimentstarter.start_experiments] or
+    [async_start_experiments][exputils.manage.experimentstarter.async_start_experiments].
 
-        # check the activity of the started processes
-        n_active_processes = 0
-        for p_idx, process in enumerate(started_processes):
+    The records are stored as json lines in the runtime file of the script (`<script>.runtime`).
+    Each record has the properties:
 
-            if p_idx not in finished_processes_idxs:
+    - `start_time`, `end_time`: Unix timestamps of the start and end of the script.
+    - `duration`: Wall clock time of the run in seconds.
+    - `returncode`: Exit code of the process.
+    - `status`: Status of the script after the run (`'finished'` or `'error'`).
+    - `user_cpu_time`, `system_cpu_time`: CPU time of the process in seconds.
+    - `max_rss`: Peak resident set size of the process and its children in bytes. The process is
+      forked from the starter, so that this is max(RSS of the starter, peak RSS of the script). It is
+      only an upper bound of the peak memory of the script if it is not above `starter_max_rss`.
+    - `starter_max_rss`: Peak resident set size of the starter process in bytes at the end of the run.
 
-                if process.poll() is None:
-                    n_active_processes += 1
-                else:
-                    finished_processes_idxs.append(p_idx)
-                    if process.returncode == 0:
-                        status = 'finished'
-                    else:
-                        status = 'error'
+    The CPU times and peak memories are None on systems that do not provide `os.wait4`.
 
-                    if write_status_files_automatically:
-                        _update_script_status(started_scripts[p_idx], status)
+    Parameters:
+        script_file (str): Path to the script file.
 
-                    print('{} finished {!r} (status: {})'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S"), started_scripts[p_idx], status))
+    Returns:
+        runtimes (list): List with an AttrDict per run, ordered from the first to the last run.
+    """
+    runtime_file_path = script_file + RUNTIME_FILE_EXTENSION
+    if not os.path.isfile(runtime_file_path):
+        return []
 
-        if n_active_processes > 0:
-            time.sleep(0.5) # sleep half a second before checking again
-
-    if verbose:
-        if ignored_scripts:
-            print('Ignored scripts:')
-            for (script_path, status) in ignored_scripts:
-                print('\t- {!r} (status: {})'.format(script_path, status))
+    runtimes = []
+    with open(runtime_file_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                runtimes.append(exputils.AttrDict(json.loads(line)))
+    return runtimes
 
 
 def _is_to_start_status(status):
@@ -322,6 +962,8 @@ def get_number_of_scripts_to_execute(directory: Optional[str] = None,
 
     Returns:
         n_scripts (int): Number of scripts that have to be executed.
+            See [get_experiments_progress][exputils.manage.experimentstarter.get_experiments_progress]
+            for a report that includes the estimated remaining time.
     """
 
     scripts = get_scripts(directory=directory, start_scripts=start_scripts)
@@ -335,6 +977,125 @@ def get_number_of_scripts_to_execute(directory: Optional[str] = None,
     return n
 
 
+def get_experiments_progress(directory: Optional[str] = None,
+                             start_scripts: str = 'run_*.py',
+                             parallel: Optional[Union[bool, int]] = None) -> dict:
+    """
+    Reports the progress of the scripts in the experiments directory and estimates the time until
+    all of them are executed.
+
+    The expected duration of a script is the duration of its last run (see
+    [get_script_duration][exputils.manage.experimentstarter.get_script_duration]), or the mean
+    duration of the finished scripts if it did not run before.
+    The remaining time is the sum of the expected durations of the scripts that have to be
+    executed and of the expected remaining durations of the running scripts.
+    The estimated time of arrival (ETA) assumes that this time is shared by the parallel processes.
+
+    Parameters:
+        directory (str):
+            Directory in which the start scripts are searched.
+            Default is `'./experiments'`.
+        start_scripts (str):
+            Filename of the start script file that are searched under the given target directory.
+            Can include '*' to search for scripts, for example 'run_*.py'.
+            The default `'run_*'` will look for all files that start with 'run' and try to start them.
+        parallel (bool, int):
+            Number of parallel processes that execute the scripts as for `start_experiments`.
+            Default is `None`, which uses the number of currently running scripts.
+
+    Returns:
+        progress (AttrDict): Progress report with:
+
+            - n_scripts: Number of all scripts.
+            - n_finished: Number of finished scripts.
+            - n_running: Number of running scripts, i.e. scripts whose status is neither finished nor one
+                         that has to be executed, such as statuses that the scripts write themselves.
+            - n_to_execute: Number of scripts that have to be executed
+                            (see [get_number_of_scripts_to_execute][exputils.manage.experimentstarter.get_number_of_scripts_to_execute]).
+            - n_error: Number of scripts whose last run had an error. They are included in `n_to_execute`.
+            - mean_duration: Mean duration of the finished scripts in seconds, or None if it is unknown.
+            - total_cpu_time: Summed CPU time of all recorded runs in seconds
+                              (see [get_script_runtimes][exputils.manage.experimentstarter.get_script_runtimes]).
+            - max_rss: Largest peak memory of all recorded runs in bytes, or None if it is unknown.
+                       It includes the memory of the starter process that started the scripts
+                       (see [get_script_runtimes][exputils.manage.experimentstarter.get_script_runtimes]).
+            - remaining_time: Summed expected time of the remaining work in seconds, or None if it is unknown.
+            - eta: Estimated time in seconds until all scripts are executed, or None if it is unknown.
+    """
+
+    scripts = get_scripts(directory=directory, start_scripts=start_scripts)
+
+    progress = exputils.AttrDict(
+        n_scripts=len(scripts),
+        n_finished=0,
+        n_running=0,
+        n_to_execute=0,
+        n_error=0,
+        mean_duration=None,
+        total_cpu_time=0.,
+        max_rss=None,
+        remaining_time=None,
+        eta=None,
+    )
+
+    finished_durations = []
+    running_scripts = []  # list of (expected duration, elapsed time)
+    todo_durations = []
+    for script in scripts:
+        status = get_script_status(script)
+        duration = get_script_duration(script)
+
+        for runtime in get_script_runtimes(script):
+            if runtime.user_cpu_time is not None:
+                progress.total_cpu_time += runtime.user_cpu_time + runtime.system_cpu_time
+            if runtime.max_rss is not None:
+                progress.max_rss = max(progress.max_rss or 0, runtime.max_rss)
+
+        if status is not None and status.lower() == 'finished':
+            progress.n_finished += 1
+            if duration is not None:
+                finished_durations.append(duration)
+
+        elif _is_to_start_status(status):
+            progress.n_to_execute += 1
+            if status is not None and status.lower().startswith('error'):
+                progress.n_error += 1
+            todo_durations.append(duration)
+
+        else:
+            # scripts can write their own status while they run, see exputils.misc.update_status
+            progress.n_running += 1
+            history = _read_script_status_history(script)
+            start_times = [status_time for status_time, cur_status in history if cur_status == 'running']
+            elapsed = (datetime.now() - start_times[-1]).total_seconds() if start_times else 0.
+            running_scripts.append((duration, elapsed))
+
+    if finished_durations:
+        progress.mean_duration = float(np.mean(finished_durations))
+
+    # scripts without a previous run are expected to take the mean duration
+    expected_durations = []
+    for duration in todo_durations:
+        expected_durations.append(progress.mean_duration if duration is None else duration)
+    for duration, elapsed in running_scripts:
+        if duration is None:
+            duration = progress.mean_duration
+        expected_durations.append(None if duration is None else max(duration - elapsed, 0.))
+
+    if None not in expected_durations:
+        progress.remaining_time = float(np.sum(expected_durations))
+
+        if parallel is None:
+            n_parallel = max(progress.n_running, 1)
+        else:
+            n_parallel = _get_number_of_parallel_processes(parallel)
+
+        # a single script can not be split between several processes
+        progress.eta = max(progress.remaining_time / n_parallel, max(expected_durations, default=0.))
+
+    return progress
+
+
 def get_number_of_scripts(directory: Optional[str] = None,
                           start_scripts: str = 'run_*.py'):
     """
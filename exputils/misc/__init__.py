@@ -10,7 +10,11 @@
 from exputils.misc.misc import numpy_vstack_2d_default
 from exputils.misc.misc import replace_str_from_dict
 from exputils.misc.misc import do_subdict_boolean_filtering
+from exputils.misc.misc import compile_subdict_boolean_filter
+from exputils.misc.misc import SubdictBooleanFilter
 from exputils.misc.misc import get_dict_variable
+from exputils.misc.misc import compile_dict_variable
+from exputils.misc.misc import DictVariableGetter
 from exputils.misc.misc import str_to_slices
 from exputils.misc.misc import list_equal
 from exputils.misc.misc import dict_equal
@@ -19,6 +23,7 @@ from exputils.misc.misc import call_function_from_config
 from exputils.misc.misc import create_object_from_config
 from exputils.misc.misc import seed
 from exputils.misc.misc import is_allowed
+from exputils.misc.misc import create_executor
 from exputils.misc.misc import str_to_list
 from exputils.misc.misc import get_experiment_name
 from exputils.misc.misc import get_repetition_name
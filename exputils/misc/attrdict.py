@@ -32,7 +32,7 @@
 import exputils
 import yaml
 from collections import defaultdict
-from collections.abc import Mapping
+from collections.abc import Mapping, ItemsView, ValuesView
 from six import iteritems, iterkeys  # pylint: disable=unused-import
 from copy import deepcopy
 try:
@@ -305,6 +305,68 @@ class AttrDict(dict):
         return dict_to_attrdict(loaded_dict, cls)
 
 
+class LazyValue:
+    """
+    Placeholder for a value of a [LazyAttrDict][exputils.misc.attrdict.LazyAttrDict] that is only
+    loaded when it is accessed. Subclasses implement `load` which returns the value.
+    """
+
+    def load(self):
+        raise NotImplementedError()
+
+
+class LazyAttrDict(AttrDict):
+    """
+    A AttrDict whose values can be placeholders (see [LazyValue][exputils.misc.attrdict.LazyValue])
+    that are loaded when they are accessed.
+    The placeholders stay in the dictionary, so that it is up to them if the loaded value is kept
+    in memory.
+    Conversions to other dictionaries, such as `dict(lazy_dict)` or `{**lazy_dict}`, load the values.
+    """
+
+    def __iter__(self):
+        # dict() and {**d} only copy the stored values of dictionaries that do not override __iter__,
+        # otherwise they access the values via __getitem__ which loads the placeholders
+        return dict.__iter__(self)
+
+
+    def __getitem__(self, k):
+        value = dict.__getitem__(self, k)
+        if isinstance(value, LazyValue):
+            value = value.load()
+        return value
+
+
+    def get(self, k, default=None):
+        if k in self:
+            return self[k]
+        return default
+
+
+    def items(self):
+        return ItemsView(self)
+
+
+    def values(self):
+        return ValuesView(self)
+
+
+    def copy(self):
+        """Copies the dictionary without loading the values of its placeholders."""
+        return type(self)((k, v if isinstance(v, LazyValue) else dict_to_attrdict(v, AttrDict))
+                          for k, v in dict.items(self))
+
+
+    def __getstate__(self):
+        """ Keeps placeholders when pickled instead of loading their values."""
+        return dict(dict.items(self))
+
+
+    def is_loaded(self, k):
+        """Returns True if the value of the key is not a placeholder that has to be loaded."""
+        return not isinstance(dict.__getitem__(self, k), LazyValue)
+
+
 class AutoAttrDict(AttrDict):
     def __setattr__(self, k, v):
         """ Works the same as AttrDict.__setattr__ but if you supply
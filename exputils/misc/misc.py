@@ -8,6 +8,8 @@
 ## exputils is provided under GPL-3.0-or-later
 ##
 import warnings
+import functools
+import operator
 from typing import Optional, Union
 
 import numpy as np
@@ -16,6 +18,7 @@ import re
 import os
 import copy
 import random
+import concurrent.futures
 import scipy.stats
 from datetime import datetime
 from exputils.misc.attrdict import combine_dicts
@@ -218,42 +221,80 @@ def get_dict_variable(base_dict, variable_str):
     >>> print(get_dict_variable(d, 'sub_dict_1.item_list[0]'))
     >>> print(get_dict_variable(d, 'sub_dict_1.item_list[-1]'))
 
+    The variable string is parsed only once, see `compile_dict_variable`.
+
     :param base_dict: Dictionary with sub-dictionaries.
     :param variable_str: Path to item. Uses '.' to split sub dictionary keys and the item key.
     :return: Item value.
     """
+    return compile_dict_variable(variable_str)(base_dict)
 
-    # TODO: Feature - allow lists of lists, e.g. 'sub_var.var[:][1]'
 
-    # get the string describing the first sub element in the given variable string
-    variable_subelement_strings = variable_str.split('.')
-    cur_subelement_str = variable_subelement_strings[0]
+@functools.lru_cache(maxsize=1024)
+def compile_dict_variable(variable_str):
+    """
+    Parses a variable string for `get_dict_variable` into a getter that can be reused for several dictionaries.
+    Getters are cached, so that each variable string is only parsed once.
 
-    # check if the sub element string contains slices:
-    if '[' in cur_subelement_str:
-        slice_start = cur_subelement_str.find('[')
+    >>> getter = compile_dict_variable('sub_dict_1.item_list[-1]')
+    >>> print(getter({'sub_dict_1': {'item_list': ['a', 'b', 'c']}}))
 
-        sub_var_name = cur_subelement_str[:slice_start]
-        slices = str_to_slices(cur_subelement_str[slice_start:])
+    :param variable_str: Path to item. Uses '.' to split sub dictionary keys and the item key.
+    :return: DictVariableGetter that is called with the base dictionary and returns the item value.
+    """
+    return DictVariableGetter(variable_str)
 
-        cur_value = base_dict[sub_var_name]
 
-        if isinstance(cur_value, np.ndarray):
-            cur_value = cur_value[tuple(slices)]
-        else:
-            for slice_obj in slices:
-                try:
-                    cur_value = cur_value[slice_obj]
-                except TypeError:
-                    raise IndexError()
-    else:
-        cur_value = base_dict[cur_subelement_str]
+class DictVariableGetter:
+    """
+    Getter for an item in sub-dictionaries that is described by a variable string, see `get_dict_variable`.
+    The string is parsed once during the construction of the getter.
 
-    if len(variable_subelement_strings) > 1:
-        # not all sub elements processed yet
-        cur_value = get_dict_variable(cur_value, '.'.join(variable_subelement_strings[1:]))
+    :param variable_str: Path to item. Uses '.' to split sub dictionary keys and the item key.
+    """
+
+    __slots__ = ('variable_str', '_elements')
+
+    def __init__(self, variable_str):
+
+        # TODO: Feature - allow lists of lists, e.g. 'sub_var.var[:][1]'
+
+        self.variable_str = variable_str
+
+        # list of (key, slices) per sub element, where slices is None if the sub element has no slices
+        self._elements = []
+        for subelement_str in variable_str.split('.'):
+            # check if the sub element string contains slices:
+            if '[' in subelement_str:
+                slice_start = subelement_str.find('[')
+                slices = tuple(str_to_slices(subelement_str[slice_start:]))
+                self._elements.append((subelement_str[:slice_start], slices))
+            else:
+                self._elements.append((subelement_str, None))
 
-    return cur_value
+
+    def __call__(self, base_dict):
+
+        cur_value = base_dict
+        for key, slices in self._elements:
+
+            cur_value = cur_value[key]
+
+            if slices is not None:
+                if isinstance(cur_value, np.ndarray):
+                    cur_value = cur_value[slices]
+                else:
+                    for slice_obj in slices:
+                        try:
+                            cur_value = cur_value[slice_obj]
+                        except TypeError:
+                            raise IndexError()
+
+        return cur_value
+
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.variable_str)
 
 
 
@@ -265,97 +306,139 @@ def do_subdict_boolean_filtering(data, filter):
     >>> filter1 = do_subdict_boolean_filtering(d, ('x', '==', 1))
     >>> filter2 = do_subdict_boolean_filtering(d, ('x', '==', 'y'))
 
+    The filter is compiled into a SubdictBooleanFilter, see `compile_subdict_boolean_filter`.
+
     :param data: List with dictionaries.
     :param filter: Tuple with filter condition.
     :return: Boolean indices.
     """
+    return compile_subdict_boolean_filter(filter)(data)
 
-    if isinstance(filter, tuple):
-
-        if len(filter) == 3:
-
-            bool_component_1 = do_subdict_boolean_filtering(data, filter[0])
-            bool_component_2 = do_subdict_boolean_filtering(data, filter[2])
-
-            if filter[1] == 'and':
-                ret_val = bool_component_1 & bool_component_2
-            elif filter[1] == 'or':
-                ret_val = bool_component_1 | bool_component_2
-            elif filter[1] == '<':
-                ret_val = bool_component_1 < bool_component_2
-            elif filter[1] == '<=':
-                ret_val = bool_component_1 <= bool_component_2
-            elif filter[1] == '>':
-                ret_val = bool_component_1 > bool_component_2
-            elif filter[1] == '>=':
-                ret_val = bool_component_1 >= bool_component_2
-            elif filter[1] == '==':
-                ret_val = bool_component_1 == bool_component_2
-            elif filter[1] == '!=':
-                ret_val = bool_component_1 != bool_component_2
-            elif filter[1] == '+':
-                ret_val = bool_component_1 + bool_component_2
-            elif filter[1] == '-':
-                ret_val = bool_component_1 - bool_component_2
-            elif filter[1] == '*':
-                ret_val = bool_component_1 * bool_component_2
-            elif filter[1] == '/':
-                ret_val = bool_component_1 / bool_component_2
-            elif filter[1] == '%':
-                ret_val = bool_component_1 % bool_component_2
-            else:
-                raise ValueError('Unknown operator {!r}!'.format(filter[1]))
 
-        elif len(filter) == 2:
+def compile_subdict_boolean_filter(filter):
+    """
+    Compiles a filter condition for `do_subdict_boolean_filtering` into a SubdictBooleanFilter that
+    can be applied to several lists of dictionaries.
 
-            val_component_1 = do_subdict_boolean_filtering(data, filter[1])
+    >>> is_small_x = compile_subdict_boolean_filter(('x', '<', 3))
+    >>> filter1 = is_small_x([dict(x=1, y=1), dict(x=2, y=3), dict(x=3, y=9)])
+
+    :param filter: Tuple with filter condition.
+    :return: SubdictBooleanFilter that is called with the data and returns the boolean indices.
+    """
+    return SubdictBooleanFilter(filter)
+
+
+_SUBDICT_FILTER_BINARY_OPERATORS = {
+    'and': operator.and_,
+    'or': operator.or_,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+}
+
+_SUBDICT_FILTER_UNARY_OPERATORS = {
+    'sum': np.sum,
+    'cumsum': np.cumsum,
+    'max': np.max,
+    'min': np.min,
+}
+
+
+class SubdictBooleanFilter:
+    """
+    Filter condition for lists of dictionaries, see `do_subdict_boolean_filtering`.
+
+    The filter tuple is parsed once into a plan of numpy operations.
+    When the filter is applied, each variable that the filter uses is extracted once as a numpy
+    array over all dictionaries and the plan is evaluated on these arrays.
+
+    :param filter: Tuple with filter condition.
+    """
+
+    def __init__(self, filter):
+        self.filter = filter
+        self._variable_strs = []  # strings in the filter that could be variables of the data
+        self._plan = self._compile(filter)
+
+
+    def _compile(self, filter):
+
+        if isinstance(filter, tuple):
+
+            if len(filter) == 3:
+                if filter[1] not in _SUBDICT_FILTER_BINARY_OPERATORS:
+                    raise ValueError('Unknown operator {!r}!'.format(filter[1]))
+                return ('binary', _SUBDICT_FILTER_BINARY_OPERATORS[filter[1]], self._compile(filter[0]), self._compile(filter[2]))
+
+            elif len(filter) == 2:
+                if filter[0] not in _SUBDICT_FILTER_UNARY_OPERATORS:
+                    raise ValueError('Unknown operator {!r}!'.format(filter[0]))
+                return ('unary', _SUBDICT_FILTER_UNARY_OPERATORS[filter[0]], self._compile(filter[1]))
 
-            if filter[0] == 'sum':
-                ret_val = np.sum(val_component_1)
-            elif filter[0] == 'cumsum':
-                ret_val = np.cumsum(val_component_1)
-            elif filter[0] == 'max':
-                ret_val = np.max(val_component_1)
-            elif filter[0] == 'min':
-                ret_val = np.min(val_component_1)
             else:
-                raise ValueError('Unknown operator {!r}!'.format(filter[0]))
+                raise ValueError('Unknown filter command {!r}!'.format(filter))
+
+        elif isinstance(filter, str):
+            # if the string is a variable or a value can only be decided for the given data
+            if filter not in self._variable_strs:
+                self._variable_strs.append(filter)
+            return ('variable', filter)
 
         else:
-            raise ValueError('Unknown filter command {!r}!'.format(filter))
+            return ('value', filter)
 
-    else:
 
-        is_var = False
-        if isinstance(filter, str):
-
-            # check if string is a variable in the data
-            is_var = True
-            try:
-                # try if the string can be used to find a variable in the data
-                # if yes --> the string is a variable
-                # if no, these expressions will result in an error and the string is not a variable but some value
-                if isinstance(data, list) or isinstance(data, np.ndarray):
-                    get_dict_variable(data[0], filter)
-                else:
-                    # check first item if the data object has a __iter__ method such as the explorationdatahandler
-                    for item in data:
-                        get_dict_variable(item, filter)
-                        break
+    def __call__(self, data):
 
-            except KeyError:
-                is_var = False
+        # get the data of each variable over all dictionaries
+        columns = dict()
+        for variable_str in self._variable_strs:
+            if _is_subdict_variable(data, variable_str):
+                getter = compile_dict_variable(variable_str)
+                columns[variable_str] = np.fromiter((getter(cur_data) for cur_data in data), dtype=float, count=len(data))
 
-        if is_var:
-            # if the string is a variable then get the data of the variable:
-            ret_val = np.zeros(len(data))
+        return self._evaluate(self._plan, columns)
 
-            for data_idx, cur_data in enumerate(data):
-                ret_val[data_idx] = get_dict_variable(cur_data, filter)
+
+    def _evaluate(self, plan, columns):
+
+        if plan[0] == 'binary':
+            return plan[1](self._evaluate(plan[2], columns), self._evaluate(plan[3], columns))
+        elif plan[0] == 'unary':
+            return plan[1](self._evaluate(plan[2], columns))
+        elif plan[0] == 'variable':
+            # strings that are not variables are values
+            return columns.get(plan[1], plan[1])
         else:
-            ret_val = filter
+            return plan[1]
+
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.filter)
 
-    return ret_val
+
+def _is_subdict_variable(data, variable_str):
+    """Checks if a string is a variable of the dictionaries in the data, by trying to get it from the first dictionary."""
+    try:
+        if isinstance(data, list) or isinstance(data, np.ndarray):
+            get_dict_variable(data[0], variable_str)
+        else:
+            # check first item if the data object has a __iter__ method such as the explorationdatahandler
+            for item in data:
+                get_dict_variable(item, variable_str)
+                break
+    except KeyError:
+        return False
+    return True
 
 
 def moving_average(data, n, mode='fill_start'):
@@ -529,6 +612,23 @@ def seed(seed: Optional[Union[int, dict]] = None,
     return seed
 
 
+def create_executor(executor_type, n_workers):
+    """
+    Creates a pool of workers to which tasks can be submitted, for example to load or process the data
+    of several experiments in parallel.
+
+    :param executor_type: Type of the workers: 'thread' or 'process'.
+    :param n_workers: Number of workers.
+    :return: A concurrent.futures.ThreadPoolExecutor or concurrent.futures.ProcessPoolExecutor.
+    """
+    if executor_type == 'thread':
+        return concurrent.futures.ThreadPoolExecutor(max_workers=n_workers)
+    elif executor_type == 'process':
+        return concurrent.futures.ProcessPoolExecutor(max_workers=n_workers)
+    else:
+        raise ValueError('Unknown executor type {!r}! Only \'thread\' and \'process\' are allowed.'.format(executor_type))
+
+
 def is_allowed(name, allowed_list=None, denied_list=None):
     """
     Checks if an entity (string name) is allowed based on either a list of allowed entities or denied entities.
@@ -8,9 +8,11 @@
 ## exputils is provided under GPL-3.0-or-later
 ##
 import os
+import zipfile
 import exputils as eu
 import exputils.data.logging as log
 import numpy as np
+import pytest
 
 
 def create_test_data(target_directory_path, experiment_id = '000000'):
@@ -147,6 +149,85 @@ def test_loading(tmpdir):
     # TODO: test experiment descriptions
 
 
+def test_loading_mmap_mode(tmpdir):
+
+    create_test_data(tmpdir.strpath)
+
+    data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath)
+    mmap_data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, mmap_mode='r')
+
+    assert isinstance(mmap_data['000000'].exp_data_01, np.memmap)
+    assert isinstance(mmap_data['000000'].repetition_data[1].rep_data_02, np.memmap)
+
+    for name in ['exp_data_01', 'exp_data_02']:
+        assert np.array_equal(data['000000'][name], mmap_data['000000'][name])
+    for rep_id in [0, 1]:
+        for name in ['rep_data_01', 'rep_data_02']:
+            assert np.array_equal(data['000000'].repetition_data[rep_id][name], mmap_data['000000'].repetition_data[rep_id][name])
+
+    # arrays of objects can not be memory-mapped and are loaded into memory
+    objects_array = np.empty(2, dtype=object)
+    objects_array[:] = [[1, 2], [3]]
+    np.save(os.path.join(tmpdir.strpath, 'experiment_000000', eu.DEFAULT_DATA_DIRECTORY, 'objects.npy'), objects_array)
+    mmap_data = eu.data.loading.load_single_experiment_data(os.path.join(tmpdir.strpath, 'experiment_000000'), mmap_mode='r')
+    assert isinstance(mmap_data.exp_data_01, np.memmap)
+    assert not isinstance(mmap_data.objects, np.memmap)
+    assert mmap_data.objects[0] == [1, 2]
+
+    # data of npz files is loaded into memory
+    eu.io.save_dict_to_numpy_files(dict(npz_data=np.arange(3)), os.path.join(tmpdir.strpath, 'experiment_000000', eu.DEFAULT_DATA_DIRECTORY, 'logging.npz'), 'npz')
+    mmap_data = eu.data.loading.load_single_experiment_data(os.path.join(tmpdir.strpath, 'experiment_000000'), mmap_mode='r')
+    assert not isinstance(mmap_data.npz_data, np.memmap)
+    assert np.array_equal(mmap_data.npz_data, np.arange(3))
+
+
+def test_loading_lazy(tmpdir):
+
+    create_test_data(tmpdir.strpath)
+
+    # add npz data with a segment
+    data_directory = os.path.join(tmpdir.strpath, 'experiment_000000', 'repetition_000001', eu.DEFAULT_DATA_DIRECTORY)
+    eu.io.save_dict_to_numpy_files(dict(npz_data=np.arange(3)), os.path.join(data_directory, 'logging.npz'), 'npz')
+    eu.io.save_dict_to_numpy_files(dict(npz_data=np.arange(3, 5)), os.path.join(data_directory, 'logging.000001.npz'), 'npz')
+
+    data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath)
+    lazy_data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, is_lazy=True)
+
+    # files are only read when their data is accessed
+    assert isinstance(lazy_data['000000'], eu.LazyAttrDict)
+    assert not lazy_data['000000'].is_loaded('exp_data_01')
+    assert not lazy_data['000000'].repetition_data[1].is_loaded('npz_data')
+
+    for name in ['exp_data_01', 'exp_data_02']:
+        assert np.array_equal(data['000000'][name], lazy_data['000000'][name])
+    for rep_id in [0, 1]:
+        for name in ['rep_data_01', 'rep_data_02']:
+            assert np.array_equal(data['000000'].repetition_data[rep_id][name], lazy_data['000000'].repetition_data[rep_id][name])
+    assert np.array_equal(lazy_data['000000'].repetition_data[1].npz_data, np.arange(5))
+
+    selected_data = eu.data.select_experiment_data(data, 'rep_data_01')
+    selected_lazy_data = eu.data.select_experiment_data(lazy_data, 'rep_data_01')
+    assert np.array_equal(selected_data[0][0], selected_lazy_data[0][0])
+
+    # loaded data is cached, the least recently used data is removed from a full cache
+    eu.io.numpy.clear_lazy_numpy_cache()
+    first_data = lazy_data['000000'].exp_data_01
+    assert lazy_data['000000'].exp_data_01 is first_data
+
+    eu.io.numpy.set_lazy_numpy_cache_size(first_data.nbytes)
+    lazy_data['000000'].exp_data_02
+    assert lazy_data['000000'].exp_data_01 is not first_data
+    assert np.array_equal(lazy_data['000000'].exp_data_01, first_data)
+
+    eu.io.numpy.set_lazy_numpy_cache_size(2**30)
+
+    # rewritten files are read again instead of taken from the cache
+    exp_data_01 = lazy_data['000000'].exp_data_01
+    np.save(os.path.join(tmpdir.strpath, 'experiment_000000', eu.DEFAULT_DATA_DIRECTORY, 'exp_data_01.npy'), np.arange(100, 110))
+    assert np.array_equal(lazy_data['000000'].exp_data_01, np.arange(100, 110))
+    assert not np.array_equal(exp_data_01, np.arange(100, 110))
+
+
 def test_loading_single_experiment(tmpdir):
 
     create_test_data(tmpdir.strpath, '000000')
@@ -415,6 +496,96 @@ def test_loading_on_repetition_data_loaded(tmpdir):
     assert 'mean_rep_data_01' in data['000000'].repetition_data[1]
 
 
+def test_loading_parallel(tmpdir):
+
+    create_test_data(tmpdir.strpath, '000000')
+    create_test_data(tmpdir.strpath, '000001')
+
+    # repetition without data
+    os.makedirs(os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_000002'))
+
+    def load(**kwargs):
+        loaded_ids = []
+
+        def on_repetition_data_loaded(experiment_id, repetition_id, data):
+            loaded_ids.append((experiment_id, repetition_id))
+
+        with pytest.warns(UserWarning, match='repetition 2 of experiment'):
+            data, _ = eu.data.loading.load_experiment_data(
+                experiments_directory=tmpdir.strpath,
+                on_repetition_data_loaded=[on_repetition_data_loaded],
+                **kwargs)
+
+        return data, loaded_ids
+
+    data, loaded_ids = load()
+
+    for executor_type in ['thread', 'process']:
+        parallel_data, parallel_loaded_ids = load(n_workers=4, executor_type=executor_type)
+
+        # same data and order of callbacks as for sequential loading
+        assert list(parallel_data.keys()) == list(data.keys())
+        assert parallel_loaded_ids == loaded_ids
+        assert parallel_data == data
+
+    with pytest.raises(ValueError):
+        eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, n_workers=2, executor_type='cluster')
+
+
+def test_loading_cache(tmpdir):
+
+    create_test_data(tmpdir.strpath, '000000')
+    create_test_data(tmpdir.strpath, '000001')
+
+    cache_directory = os.path.join(tmpdir.strpath, '.exputils_cache')
+
+    data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath)
+
+    # the cache is built on the first load and then used
+    cached_data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, is_use_cache=True)
+    assert cached_data == data
+    assert sorted(os.listdir(cache_directory)) == ['exp_data_01.npz', 'exp_data_02.npz', 'index.json', 'rep_data_01.npz', 'rep_data_02.npz']
+
+    cached_data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, is_use_cache=True)
+    assert cached_data == data
+
+    cached_data, _ = eu.data.loading.load_experiment_data(
+        experiments_directory=tmpdir.strpath,
+        is_use_cache=True,
+        pre_allowed_data_filter=['rep_data_01'])
+    assert list(cached_data['000001'].keys()) == ['repetition_data']
+    assert list(cached_data['000001'].repetition_data[1].keys()) == ['rep_data_01']
+
+    # changed data is updated in the cache
+    rep_data_directory = os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_000001', eu.DEFAULT_DATA_DIRECTORY)
+    os.remove(os.path.join(rep_data_directory, 'rep_data_02.npy'))
+    np.save(os.path.join(rep_data_directory, 'rep_data_01.npy'), np.arange(3))
+
+    cached_data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, is_use_cache=True)
+    assert np.array_equal(cached_data['000001'].repetition_data[1].rep_data_01, np.arange(3))
+    assert 'rep_data_02' not in cached_data['000001'].repetition_data[1]
+    assert cached_data['000000'] == data['000000']
+
+    cache = eu.data.cache.DataCache(cache_directory)
+    assert cache.is_valid(rep_data_directory)
+    assert cache.load([rep_data_directory])[rep_data_directory] == dict(rep_data_01=np.arange(3))
+
+    # updated data is appended to the datasource files, which are compacted if most of their arrays are outdated
+    def get_n_cached_arrays(datasource):
+        with zipfile.ZipFile(os.path.join(cache_directory, datasource + '.npz')) as fh:
+            return len(fh.namelist())
+
+    n_arrays = get_n_cached_arrays('rep_data_01')
+    for idx in range(n_arrays):
+        np.save(os.path.join(rep_data_directory, 'rep_data_01.npy'), np.arange(idx + 4))
+        cached_data, _ = eu.data.loading.load_experiment_data(experiments_directory=tmpdir.strpath, is_use_cache=True)
+        assert np.array_equal(cached_data['000001'].repetition_data[1].rep_data_01, np.arange(idx + 4))
+        if idx == 0:
+            assert get_n_cached_arrays('rep_data_01') == n_arrays + 1
+    assert get_n_cached_arrays('rep_data_01') < 2 * n_arrays
+    assert cached_data['000000'] == data['000000']
+
+
 def test_loading_python_module(tmpdir):
     create_test_data(tmpdir.strpath)
 
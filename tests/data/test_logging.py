@@ -9,6 +9,9 @@
 ##
 import numpy as np
 import exputils as eu
+import os
+import pytest
+import time
 
 
 def global_access_test(name, value):
@@ -129,4 +132,461 @@ def test_default_logger(tmp_path):
 
     assert isinstance(mylogger['objects'][0], TestObjClass) and mylogger['objects'][0].val == 1
     assert isinstance(mylogger['objects'][1], TestObjClass) and mylogger['objects'][1].val == 2
-    assert isinstance(mylogger['test_obj_3'], TestObjClass) and mylogger['test_obj_3'].val == 3
\ No newline at end of file
+    assert isinstance(mylogger['test_obj_3'], TestObjClass) and mylogger['test_obj_3'].val == 3
+
+def test_stream_logging(tmp_path):
+
+    directory = str(tmp_path / 'stream_logging')
+
+    mylogger = eu.data.Logger(directory=directory, numpy_log_mode='stream', numpy_stream_buffer_size=3)
+
+    for i in range(10):
+        mylogger.add_value('prop1', float(i))
+        mylogger.add_histogram('prop2', [i, i + 1])
+
+    # all full chunks are written to disk before the log is saved
+    assert np.array_equal(np.load(os.path.join(directory, 'prop1.npy')), np.arange(9))
+    assert np.load(os.path.join(directory, 'prop2.npy')).shape == (9, 2)
+
+    # only the last chunk is held in memory
+    assert len(mylogger.numpy_data['prop1']) == 1
+
+    # access gives all values
+    assert np.array_equal(mylogger['prop1'], np.arange(10))
+    assert np.array_equal(mylogger['prop2'][-1], [9, 10])
+
+    mylogger.save()
+
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop1, np.arange(10))
+    assert data.prop2.shape == (10, 2)
+
+    # clearing an entry starts a new file
+    mylogger.clear('prop1')
+    mylogger.add_value('prop1', 100.0)
+    mylogger.save()
+
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop1, [100.0])
+
+    # returned values are not changed by values that are logged afterwards
+    mylogger = eu.data.Logger(directory=str(tmp_path / 'stream_copy'), numpy_log_mode='stream', numpy_stream_buffer_size=3)
+    mylogger.add_value('prop1', 1.0)
+    values = mylogger['prop1']
+    for i in range(5):
+        mylogger.add_value('prop1', 10.0 + i)
+    assert np.array_equal(values, [1.0])
+
+
+def test_stream_logging_ragged_values(tmp_path):
+
+    directory = str(tmp_path / 'stream_logging')
+
+    mylogger = eu.data.Logger(directory=directory, numpy_log_mode='stream', numpy_stream_buffer_size=2)
+
+    mylogger.add_histogram('prop1', [1, 2])
+    mylogger.add_histogram('prop1', [3, 4])
+
+    # ragged values can not be streamed and are held in memory
+    with pytest.warns(UserWarning):
+        mylogger.add_histogram('prop1', [5, 6, 7])
+        mylogger.add_histogram('prop1', [8])
+
+    assert len(mylogger['prop1']) == 4
+    assert list(mylogger['prop1'][2]) == [5, 6, 7]
+
+
+def test_typed_value_buffers(tmp_path):
+
+    mylogger = eu.data.Logger(directory=str(tmp_path))
+
+    # scalars are stored in a typed array which grows
+    for i in range(100):
+        mylogger.add_value('int_prop', i)
+    assert isinstance(mylogger['int_prop'], np.ndarray)
+    assert mylogger['int_prop'].dtype == np.int64
+    assert np.array_equal(mylogger['int_prop'], np.arange(100))
+
+    # dtype gets promoted
+    mylogger.add_value('int_prop', 0.5)
+    assert mylogger['int_prop'].dtype == np.float64
+    assert mylogger['int_prop'][-1] == 0.5
+    assert mylogger['int_prop'][10] == 10.0
+
+    # arrays
+    mylogger.add_histogram('array_prop', [1, 2])
+    mylogger.add_histogram('array_prop', np.array([3, 4]))
+    assert np.array_equal(mylogger['array_prop'], [[1, 2], [3, 4]])
+
+    # ragged data is stored in a list
+    mylogger.add_histogram('array_prop', [5, 6, 7])
+    assert isinstance(mylogger['array_prop'], list)
+    assert len(mylogger['array_prop']) == 3
+
+    # not numeric data is stored in a list
+    mylogger.add_value('str_prop', 'a')
+    mylogger.add_value('str_prop', 'bc')
+    assert mylogger['str_prop'] == ['a', 'bc']
+
+    # pending values are flushed in bulk into the typed array
+    n_values = 2 * eu.data.logger._ValueBuffer.FLUSH_SIZE + 3
+    for i in range(n_values):
+        mylogger.add_value('flushed_prop', np.float32(i))
+    assert len(mylogger.numpy_data['flushed_prop']) == n_values
+    assert mylogger['flushed_prop'].dtype == np.float32
+    assert np.array_equal(mylogger['flushed_prop'], np.arange(n_values))
+
+    mylogger.save()
+
+    data = eu.io.load_numpy_files(str(tmp_path))
+    assert data.int_prop.dtype == np.float64 and len(data.int_prop) == 101
+    assert data.array_prop.dtype == object and list(data.array_prop[2]) == [5, 6, 7]
+    assert list(data.str_prop) == ['a', 'bc']
+
+    # loaded logs can be continued
+    mylogger = eu.data.Logger()
+    mylogger.load(str(tmp_path))
+    mylogger.add_value('int_prop', 1000)
+    assert len(mylogger['int_prop']) == 102
+    assert mylogger['int_prop'][-1] == 1000.0
+
+
+def test_add_values_and_rows(tmp_path):
+
+    import exputils.data.logging as log
+
+    log.reset()
+    log.set_directory(str(tmp_path))
+
+    log.add_values('prop1', [1.0, 2.0, 3.0])
+    log.add_values('prop1', np.array([4, 5]))
+    log.add_value('prop1', 6.0)
+    assert np.array_equal(log.get_values('prop1'), [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+    # first dimension is over the values
+    log.add_values('prop2', np.ones((3, 2)))
+    log.add_histogram('prop2', [2, 2])
+    assert np.shape(log.get_values('prop2')) == (4, 2)
+
+    log.add_row({'prop3': 1.0, 'prop4': 10})
+    log.add_row({'prop3': 2.0, 'prop4': 20})
+    assert np.array_equal(log.get_values('prop3'), [1.0, 2.0])
+    assert np.array_equal(log.get_values('prop4'), [10, 20])
+
+    log.save()
+
+    data = eu.io.load_numpy_files(str(tmp_path))
+    assert np.array_equal(data.prop1, [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    assert data.prop2.shape == (4, 2)
+    assert np.array_equal(data.prop4, [10, 20])
+
+    log.reset()
+
+
+def test_save_only_changed_entries(tmp_path):
+
+    directory = str(tmp_path)
+
+    mylogger = eu.data.Logger(directory=directory)
+    mylogger.add_value('prop1', 1.0)
+    mylogger.add_value('prop2', 2.0)
+    mylogger.save()
+
+    # change a file on disk to see if it is rewritten
+    np.save(os.path.join(directory, 'prop1.npy'), [-1.0])
+
+    mylogger.add_value('prop2', 3.0)
+    mylogger.save()
+
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop1, [-1.0])
+    assert np.array_equal(data.prop2, [2.0, 3.0])
+
+    # saving in another directory writes all entries
+    mylogger.save(os.path.join(directory, 'other'))
+    data = eu.io.load_numpy_files(os.path.join(directory, 'other'))
+    assert np.array_equal(data.prop1, [1.0])
+    assert np.array_equal(data.prop2, [2.0, 3.0])
+
+
+def test_save_only_new_values(tmp_path):
+
+    # npy files are appended with the values that were added since the last save
+    directory = os.path.join(str(tmp_path), 'npy')
+
+    mylogger = eu.data.Logger(directory=directory)
+    mylogger.add_value('prop1', 1.0)
+    mylogger.save()
+
+    # change the file on disk to see if it is appended and not rewritten
+    eu.io.append_to_numpy_file(os.path.join(directory, 'prop1.npy'), [-1.0], is_overwrite=True)
+
+    mylogger.add_value('prop1', 2.0)
+    mylogger.save()
+    assert np.array_equal(eu.io.load_numpy_files(directory).prop1, [-1.0, 2.0])
+
+    # npz files get segments with the new values
+    for mode in ['npz', 'cnpz']:
+        directory = os.path.join(str(tmp_path), mode)
+
+        mylogger = eu.data.Logger(directory=directory, numpy_log_mode=mode, numpy_npz_max_segments=2)
+        mylogger.add_value('prop1', 1)
+        mylogger.add_value('prop2', [1, 2])
+        mylogger.save()
+
+        mylogger.add_value('prop1', 2)
+        mylogger.save()
+        mylogger.add_value('prop1', 3)
+        mylogger.add_value('prop3', 1.5)
+        mylogger.save()
+        assert sorted(os.listdir(directory)) == ['logging.000001.npz', 'logging.000002.npz', 'logging.npz']
+
+        mylogger2 = eu.data.Logger()
+        mylogger2.load(directory)
+        assert np.array_equal(mylogger2['prop1'], [1, 2, 3])
+        assert np.array_equal(mylogger2['prop2'], [[1, 2]])
+        assert np.array_equal(mylogger2['prop3'], [1.5])
+
+        # the container is rewritten after the maximum number of segments
+        mylogger.add_value('prop1', 4)
+        mylogger.save()
+        assert os.listdir(directory) == ['logging.npz']
+
+        mylogger2.load(directory)
+        assert np.array_equal(mylogger2['prop1'], [1, 2, 3, 4])
+
+        # the container is rewritten if values can not be appended
+        mylogger.add_value('prop1', 5)
+        mylogger.save()
+        mylogger.add_value('prop2', [3])
+        mylogger.save()
+        assert os.listdir(directory) == ['logging.npz']
+
+        mylogger2.load(directory)
+        assert np.array_equal(mylogger2['prop1'], [1, 2, 3, 4, 5])
+        assert len(mylogger2['prop2']) == 2
+
+        # ragged values are never appended as a segment
+        directory = os.path.join(str(tmp_path), mode + '_ragged')
+
+        mylogger = eu.data.Logger(directory=directory, numpy_log_mode=mode)
+        mylogger.add_value('h', [1, 2])
+        mylogger.add_value('h', [1, 2, 3])
+        mylogger.save()
+        mylogger.add_value('h', [4, 5])
+        mylogger.save()
+        assert os.listdir(directory) == ['logging.npz']
+
+        data = eu.io.load_numpy_files(directory)
+        assert [list(v) for v in data.logging.h] == [[1, 2], [1, 2, 3], [4, 5]]
+
+        mylogger2 = eu.data.Logger()
+        mylogger2.load(directory)
+        assert len(mylogger2['h']) == 3
+
+
+def test_object_copy_modes(tmp_path):
+
+    directory = str(tmp_path)
+
+    mylogger = eu.data.Logger(directory=directory)
+
+    obj = dict(a=1)
+    mylogger.add_object('copied', obj)
+    mylogger.add_object('not_copied', obj, copy_mode='none')
+    mylogger.add_object('serialized', obj, copy_mode='serialize-now')
+    obj['a'] = 2
+
+    assert mylogger['copied'] == [dict(a=1)]
+    assert mylogger['not_copied'] == [dict(a=2)]
+    assert mylogger['serialized'] == [dict(a=1)]
+
+    # serialized objects are appended to a stream file and not held in memory
+    mylogger.add_object('serialized', obj)
+    assert 'serialized' not in mylogger.object_data
+    assert eu.io.load_dill_stream(os.path.join(directory, 'serialized')) == [dict(a=1), dict(a=2)]
+
+    # entries with objects in memory start streaming them
+    mylogger.add_object('copied', obj, copy_mode='serialize-now')
+    assert 'copied' not in mylogger.object_data
+    assert mylogger['copied'] == [dict(a=1), dict(a=2)]
+
+    with pytest.raises(ValueError):
+        mylogger.add_object('obj', obj, copy_mode='shallow')
+
+    mylogger.save()
+    mylogger.save(os.path.join(directory, 'other'))
+
+    for load_directory in [directory, os.path.join(directory, 'other')]:
+        data = eu.io.load_dill_files(load_directory)
+        assert data.copied == [dict(a=1), dict(a=2)]
+        assert data.not_copied == [dict(a=2)]
+        assert data.serialized == [dict(a=1), dict(a=2)]
+
+    mylogger.clear('serialized')
+    assert 'serialized' not in mylogger
+    mylogger.clear('not_copied')
+    assert 'not_copied' not in mylogger
+
+    # the stream file of a cleared entry is removed, so that a later save of the entry is loaded
+    assert not os.path.exists(os.path.join(directory, 'serialized.dillstream'))
+    mylogger.add_object('serialized', dict(b=1))
+    mylogger.save()
+    assert eu.io.load_dill_files(directory).serialized == [dict(b=1)]
+
+    # a stale stream file in the directory is replaced by saved objects
+    mylogger2 = eu.data.Logger(directory=os.path.join(directory, 'other'))
+    mylogger2.add_object('copied', dict(c=1))
+    mylogger2.save()
+    assert eu.io.load_dill_files(os.path.join(directory, 'other')).copied == [dict(c=1)]
+
+    # an incomplete object at the end of a stream is ignored
+    file_path = os.path.join(directory, 'other', 'serialized.dillstream')
+    with open(file_path, 'ab') as fh:
+        fh.write(b'\x80\x04\x95')
+    assert eu.io.load_dill_stream(file_path) == [dict(a=1), dict(a=2)]
+
+
+class _RecordingWriter:
+    """Records the values that a tensorboard writer receives."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.records = []
+        self.n_flushes = 0
+
+    def add_scalar(self, tag, scalar_value, global_step=None, walltime=None):
+        time.sleep(self.delay)
+        self.records.append((tag, scalar_value, global_step, walltime))
+
+    def add_histogram(self, tag, values, global_step=None, walltime=None):
+        self.records.append((tag, list(values), global_step, walltime))
+
+    def flush(self):
+        self.n_flushes += 1
+
+
+def test_tensorboard_forwarder():
+
+    from exputils.data.logger import _TensorboardForwarder
+
+    writer = _RecordingWriter()
+    forwarder = _TensorboardForwarder(writer)
+
+    start_time = time.time()
+    for step in range(100):
+        forwarder.add_scalar('val', step, global_step=step)
+    forwarder.add_histogram('hist', np.array([1, 2]), global_step=3, walltime=10.0)
+    forwarder.flush()
+
+    # values are forwarded in order with the walltime at which they were added
+    assert [record[1] for record in writer.records[:100]] == list(range(100))
+    assert all(start_time <= record[3] <= time.time() for record in writer.records[:100])
+    assert writer.records[100] == ('hist', [1, 2], 3, 10.0)
+    assert writer.n_flushes == 1
+
+    forwarder.close()
+
+    # values are dropped if the buffer is full
+    writer = _RecordingWriter(delay=0.01)
+    forwarder = _TensorboardForwarder(writer, buffer_size=5, full_buffer_policy='drop')
+    with pytest.warns(UserWarning):
+        for step in range(50):
+            forwarder.add_scalar('val', step)
+    forwarder.close()
+    assert forwarder.n_dropped > 0
+    assert len(writer.records) + forwarder.n_dropped == 50
+
+    # or the logging process waits until there is space
+    writer = _RecordingWriter(delay=0.001)
+    forwarder = _TensorboardForwarder(writer, buffer_size=5, full_buffer_policy='block')
+    for step in range(50):
+        forwarder.add_scalar('val', step)
+    forwarder.close()
+    assert forwarder.n_dropped == 0
+    assert [record[1] for record in writer.records] == list(range(50))
+
+    with pytest.raises(ValueError):
+        _TensorboardForwarder(writer, full_buffer_policy='wait')
+
+
+def test_autosave(tmp_path):
+
+    directory = str(tmp_path)
+
+    # autosave after a number of values
+    mylogger = eu.data.Logger(directory=directory, autosave=dict(n_values=5))
+    for i in range(12):
+        mylogger.add_value('prop1', i)
+        # wait for the background thread, otherwise autosaves are skipped while it is writing
+        mylogger._wait_for_autosave()
+
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop1, np.arange(10))
+
+    # autosave in the logging process after a time interval
+    mylogger = eu.data.Logger(directory=directory, autosave=dict(interval=0.0, is_background=False))
+    mylogger.add_value('prop2', 1)
+    mylogger.add_object('obj', dict(a=1))
+
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop2, [1])
+    assert eu.io.load_dill(os.path.join(directory, 'obj')) == [dict(a=1)]
+
+    # entries of a failed background write are saved by the next save
+    directory = str(tmp_path / 'failed')
+    mylogger = eu.data.Logger(directory=directory, autosave=dict(n_values=2))
+    mylogger.add_value('prop1', 0)
+    mylogger.add_value('prop1', 1)
+    mylogger._wait_for_autosave()
+
+    # a directory in place of the file lets the next write fail
+    os.remove(os.path.join(directory, 'prop1.npy'))
+    os.makedirs(os.path.join(directory, 'prop1.npy'))
+    mylogger.add_value('prop1', 2)
+    with pytest.warns(UserWarning, match='Autosave'):
+        mylogger.add_value('prop1', 3)
+        mylogger._wait_for_autosave()
+    os.rmdir(os.path.join(directory, 'prop1.npy'))
+
+    mylogger.save()
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop1, np.arange(4))
+
+    # in place changes of the config take effect with the next save
+    directory = str(tmp_path / 'in_place')
+    mylogger = eu.data.Logger(directory=directory)
+    mylogger.config.autosave.n_values = 2
+    mylogger.config.autosave.is_background = False
+    mylogger.add_value('prop1', 0)
+    mylogger.add_value('prop1', 1)
+    assert not os.path.exists(os.path.join(directory, 'prop1.npy'))
+
+    mylogger.save()
+    mylogger.add_value('prop1', 2)
+    mylogger.add_value('prop1', 3)
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.prop1, np.arange(4))
+
+
+def _create_autosave_at_exit_test_code(path, directory):
+    f = open(path, 'w')
+    f.writelines([
+        'import exputils.data.logging as log', '\n',
+        'log.set_directory({!r})'.format(directory), '\n',
+        'log.set_config(autosave=dict(at_exit=True))', '\n',
+        'log.add_value(\'val\', 100)', '\n',
+    ])
+    f.close()
+
+
+def test_autosave_at_exit(tmp_path):
+    import subprocess
+
+    directory = os.path.join(str(tmp_path), 'data')
+    code_path = os.path.join(str(tmp_path), 'write_log.py')
+    _create_autosave_at_exit_test_code(code_path, directory)
+    subprocess.check_output(['python', code_path])
+
+    data = eu.io.load_numpy_files(directory)
+    assert np.array_equal(data.val, [100])
@@ -9,6 +9,7 @@
 ##
 import numpy as np
 import exputils as eu
+import pytest
 
 
 def create_test_data():
@@ -396,7 +397,205 @@ def test_incomplete_repetition_data():
     assert eu.misc.list_equal(data, target_data)
 
 
+def test_stacked_repetition_data():
+
+    experiment_data, experiment_descriptions = create_test_data()
+
+    stacked_experiment_data, _ = create_test_data()
+    for exp_data in stacked_experiment_data.values():
+        exp_data[eu.STACKED_REPETITION_DATA_KEY] = eu.data.stack_repetition_data(exp_data['repetition_data'])
+
+    stacked_data = stacked_experiment_data['exp1'][eu.STACKED_REPETITION_DATA_KEY]
+    # arrays with a single element are not stacked, as the selection handles them as scalars
+    assert list(stacked_data.keys()) == ['rep_values', 'rep_values_1', 'rep_values_3']
+    assert np.array_equal(stacked_data.rep_values_1.data, [[62, 53, 45], [86, np.nan, np.nan]], equal_nan=True)
+    assert np.array_equal(stacked_data.rep_values_1.mask, [[True, True, True], [True, False, False]])
+
+    # selections give the same data as without stacking
+    for datasource in ['rep_values', 'rep_values_1', 'rep_values_3', 'rep_values_1\'']:
+        for repetition_ids in ['all', [0], [1, 0]]:
+            data, labels = eu.data.select_experiment_data(
+                experiment_data,
+                datasources=datasource,
+                repetition_ids=repetition_ids,
+                experiment_descriptions=experiment_descriptions)
+
+            stacked_data, stacked_labels = eu.data.select_experiment_data(
+                stacked_experiment_data,
+                datasources=datasource,
+                repetition_ids=repetition_ids,
+                experiment_descriptions=experiment_descriptions)
+
+            assert eu.misc.list_equal(data, stacked_data)
+            assert labels == stacked_labels
+
+    # stacked data is used without copying it
+    data, _ = eu.data.select_experiment_data(stacked_experiment_data, datasources='rep_values_1')
+    assert data[0][1] is stacked_experiment_data['exp1'][eu.STACKED_REPETITION_DATA_KEY].rep_values_1.data
+
+    # repetitions with missing data are not stacked
+    experiment_data['exp0']['repetition_data'][0] = eu.AttrDict()
+    assert 'rep_values' not in eu.data.stack_repetition_data(experiment_data['exp0']['repetition_data'])
+
+
 def test_data_filter():
 
-    pass
+    experiment_data, experiment_descriptions = create_test_data()
+
+    # filter over the repetition data
+    data, labels = eu.data.select_experiment_data(
+        experiment_data,
+        datasources=['rep_values_3', 'rep_values', 'sub_dict_1.values'],
+        data_filter=('rep_values_3', '>', 700),
+        experiment_descriptions=experiment_descriptions)
+
+    assert eu.misc.list_equal(data[0], [np.array([753]), np.array([754])])
+    assert eu.misc.list_equal(data[1], [np.array([[78, 79, 80]]), np.array([[56, 57, 58]])])
+    assert eu.misc.list_equal(data[2], [np.array([[20, 21, 22, 23]]), np.array([[120, 121, 122, 123]])])
+    assert labels[0][1][0] == ('Experiment 0', ['e0 - 1'])
+
+    # filter indices are combined with the requested repetitions
+    data, _ = eu.data.select_experiment_data(
+        experiment_data,
+        datasources='rep_values_3',
+        repetition_ids=[1, 0],
+        data_filter_inds={'exp0': [True, False]})
+
+    assert eu.misc.list_equal(data[0], [np.array([456]), np.array([754, 657])])
+
+    # filter and filter indices together
+    data, _ = eu.data.select_experiment_data(
+        experiment_data,
+        datasources='rep_values_3',
+        data_filter=('rep_values_3', '>', 700),
+        data_filter_inds={'exp0': [True, False], 'exp1': [True, True]})
+
+    assert data[0][0] is None
+    assert np.array_equal(data[0][1], [754])
+
+    with pytest.raises(ValueError):
+        eu.data.select_experiment_data(
+            experiment_data,
+            datasources='rep_values_3',
+            data_filter=('rep_values_3', '>', 700),
+            data_filter_inds={'exp0': [True]})
+
+    # repetitions that were not loaded leave gaps in the repetition ids
+    experiment_data = {
+        'exp0': {'repetition_data': {0: {'reward': np.array([1, 2]), 'loss': np.array([0.5, -1.0])},
+                                     2: {'reward': np.array([3, 4]), 'loss': np.array([0.5, 0.2])},
+                                     3: {'reward': np.array([5, 6]), 'loss': np.array([0.5, 0.1])}}}}
+
+    data, _ = eu.data.select_experiment_data(experiment_data, 'reward', data_filter=('loss[-1]', '>', 0))
+    assert np.array_equal(data[0][0], [[3, 4], [5, 6]])
+
+    data, _ = eu.data.select_experiment_data(experiment_data, 'reward', data_filter_inds={'exp0': [True, False, True]})
+    assert np.array_equal(data[0][0], [[1, 2], [5, 6]])
+
+    data, _ = eu.data.select_experiment_data(experiment_data, 'reward', repetition_ids=[2, 3], data_filter_inds={'exp0': [True, False, True]})
+    assert np.array_equal(data[0][0], [[5, 6]])
+
+
+def test_selection_cache():
+
+    experiment_data, experiment_descriptions = create_test_data()
+
+    n_calls = 0
+    def select_experiment_data(*args, **kwargs):
+        nonlocal n_calls
+        n_calls += 1
+        return eu.data.select_experiment_data(*args, **kwargs)
+
+    selection_cache = eu.data.SelectionCache(select_experiment_data, max_size=2)
+
+    data, labels = selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    target_data, target_labels = eu.data.select_experiment_data(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert eu.misc.list_equal(data, target_data)
+    assert labels == target_labels
+    assert n_calls == 1
+
+    # same selection is taken from the cache
+    cached_data, _ = selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert eu.misc.list_equal(cached_data, target_data)
+    assert n_calls == 1
+
+    # results are copies, so that their changes do not affect later calls
+    assert cached_data is not data
+    cached_data[0] = None
+    cached_data, _ = selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert eu.misc.list_equal(cached_data, target_data)
+    assert n_calls == 1
+
+    # other selections are collected
+    selection_cache(experiment_data, 'rep_values', experiment_ids=['exp1'], experiment_descriptions=experiment_descriptions)
+    selection_cache(experiment_data, 'rep_values', data_filter_inds={'exp0': np.array([True, False])})
+    assert n_calls == 3
+    assert len(selection_cache) == 2
+
+    # oldest selection was removed
+    selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert n_calls == 4
+
+    # other experiment data
+    other_experiment_data, _ = create_test_data()
+    selection_cache(other_experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert n_calls == 5
+
+    selection_cache.clear()
+    assert len(selection_cache) == 0
+    selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert n_calls == 6
+
+    # results of another selection function are not taken from the cache
+    n_other_calls = 0
+    def other_select_experiment_data(*args, **kwargs):
+        nonlocal n_other_calls
+        n_other_calls += 1
+        return eu.data.select_experiment_data(*args, **kwargs)
+
+    selection_cache.select_experiment_data_func = other_select_experiment_data
+    selection_cache(experiment_data, 'rep_values', experiment_ids=['exp0'], experiment_descriptions=experiment_descriptions)
+    assert n_calls == 6
+    assert n_other_calls == 1
+
+
+def test_to_columnar():
+
+    experiment_data, experiment_descriptions = create_test_data()
+
+    data, labels = eu.data.select_experiment_data(
+        experiment_data,
+        datasources=['rep_values_1', 'rep_values_3'],
+        experiment_descriptions=experiment_descriptions)
+
+    columns = eu.data.to_columnar(data, labels)
+
+    # padding of the repetitions is removed
+    assert len(columns.value) == (2 + 3 + 3 + 1) + 4
+    for name in ['datasource_idx', 'experiment_idx', 'repetition_idx', 'step', 'value']:
+        assert columns[name].ndim == 1 and len(columns[name]) == len(columns.value)
+
+    # exp0, rep 1 of rep_values_1
+    inds = (columns.datasource_idx == 0) & (columns.experiment_idx == 0) & (columns.repetition_idx == 1)
+    assert np.array_equal(columns.step[inds], [0, 1, 2])
+    assert np.array_equal(columns.value[inds], [75, 15, 56])
+
+    # scalar data per repetition has a single step
+    inds = columns.datasource_idx == 1
+    assert np.array_equal(columns.step[inds], [0, 0, 0, 0])
+    assert np.array_equal(columns.value[inds], [456, 753, 657, 754])
+
+    assert columns.datasource_labels == ['rep_values_1', 'rep_values_3']
+    assert columns.experiment_labels == [['Experiment 0', 'Experiment 1'], ['Experiment 0', 'Experiment 1']]
+
+    # aggregations are numpy calls, e.g. the mean per datasource and experiment
+    group_inds = columns.datasource_idx * 2 + columns.experiment_idx
+    means = np.bincount(group_inds, weights=columns.value) / np.bincount(group_inds)
+    assert np.allclose(means, [np.mean([62, 53, 75, 15, 56]), np.mean([62, 53, 45, 86]), np.mean([456, 753]), np.mean([657, 754])])
+
+    columns = eu.data.to_columnar(data, is_drop_nan=False)
+    assert len(columns.value) == 2 * 3 * 2 + 4
+    assert 'datasource_labels' not in columns
 
+    with pytest.raises(ValueError):
+        eu.data.to_columnar([[['a', 'b']]])
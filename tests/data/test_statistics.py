@@ -0,0 +1,234 @@
+##
+## This file is part of the exputils package.
+##
+## Copyright: INRIA
+## Year: 2022, 2023
+## Contact: chris.reinke@inria.fr
+##
+## exputils is provided under GPL-3.0-or-later
+##
+import os
+import exputils as eu
+import numpy as np
+import pytest
+
+
+def create_test_data(target_directory_path, n_repetitions=3):
+
+    for rep_id in range(n_repetitions):
+        data_path = os.path.join(target_directory_path, 'experiment_000001', 'repetition_{:06d}'.format(rep_id), 'data')
+        os.makedirs(data_path)
+        np.save(os.path.join(data_path, 'reward.npy'), np.arange(rep_id + 1))
+
+
+def load_data(repetition_folder):
+    return eu.io.load_numpy_files(os.path.join(repetition_folder, 'data'))
+
+
+def calc_sum_reward(statistic_name, data):
+    return np.sum(data['reward'])
+
+
+def calc_max_reward(statistic_name, data):
+    if len(data['reward']) == 2:
+        raise ValueError('failing statistic')
+    return np.max(data['reward'])
+
+
+def test_calc_repetition_statistics(tmpdir):
+
+    create_test_data(tmpdir.strpath)
+
+    eu.data.calc_repetition_statistics(
+        [('sum_reward', calc_sum_reward)],
+        load_data,
+        tmpdir.strpath)
+
+    for rep_id in range(3):
+        sum_reward = np.load(os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_{:06d}'.format(rep_id), 'data', 'sum_reward.npy'))
+        assert sum_reward == np.sum(np.arange(rep_id + 1))
+
+
+@pytest.mark.parametrize('executor_type', ['thread', 'process'])
+def test_calc_repetition_statistics_parallel(tmpdir, executor_type):
+
+    create_test_data(tmpdir.strpath)
+
+    # the failing repetition does not stop the calculation of the other ones
+    with pytest.warns(UserWarning, match='repetition_000001'):
+        errors = eu.data.calc_repetition_statistics(
+            [('sum_reward', calc_sum_reward), ('max_reward', calc_max_reward)],
+            load_data,
+            tmpdir.strpath,
+            n_workers=2,
+            executor_type=executor_type)
+
+    assert list(errors.keys()) == [os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_000001')]
+    assert isinstance(errors[os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_000001')], ValueError)
+
+    for rep_id in range(3):
+        data_path = os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_{:06d}'.format(rep_id), 'data')
+        assert np.load(os.path.join(data_path, 'sum_reward.npy')) == np.sum(np.arange(rep_id + 1))
+        assert os.path.isfile(os.path.join(data_path, 'max_reward.npy')) == (rep_id != 1)
+
+    # existing statistics are not recalculated, only the failed one is tried again
+    os.remove(os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_000000', 'data', 'sum_reward.npy'))
+    with pytest.warns(UserWarning, match='repetition_000001'):
+        errors = eu.data.calc_repetition_statistics(
+            [('sum_reward', calc_sum_reward), ('max_reward', calc_max_reward)],
+            load_data,
+            tmpdir.strpath,
+            n_workers=2,
+            executor_type=executor_type)
+    assert len(errors) == 1
+    assert os.path.isfile(os.path.join(tmpdir.strpath, 'experiment_000001', 'repetition_000000', 'data', 'sum_reward.npy'))
+
+
+def test_recalculate_changed_statistics(tmpdir):
+
+    create_test_data(tmpdir.strpath, n_repetitions=2)
+
+    experiment_path = os.path.join(tmpdir.strpath, 'experiment_000001')
+    def get_mtimes(statistic_name):
+        return [os.stat(os.path.join(experiment_path, 'repetition_{:06d}'.format(rep_id), 'data', statistic_name + '.npy')).st_mtime_ns
+                for rep_id in range(len(os.listdir(experiment_path)) - 1)]
+
+    eu.data.calc_repetition_statistics([('sum_reward', calc_sum_reward)], load_data, tmpdir.strpath, recalculate_statistics='changed')
+    eu.data.calc_statistics_over_repetitions([('mean_sum_reward', calc_mean_sum_reward)], tmpdir.strpath, recalculate_statistics='changed')
+    mtimes = get_mtimes('sum_reward')
+    mean_sum_reward_path = os.path.join(experiment_path, 'data', 'mean_sum_reward.npy')
+    assert np.load(mean_sum_reward_path) == np.mean([0, 1])
+
+    # nothing changed
+    eu.data.calc_repetition_statistics([('sum_reward', calc_sum_reward)], load_data, tmpdir.strpath, recalculate_statistics='changed')
+    assert get_mtimes('sum_reward') == mtimes
+
+    # a new repetition is added and the data of a repetition changed
+    os.makedirs(os.path.join(experiment_path, 'repetition_000002', 'data'))
+    np.save(os.path.join(experiment_path, 'repetition_000002', 'data', 'reward.npy'), np.arange(3))
+    np.save(os.path.join(experiment_path, 'repetition_000001', 'data', 'reward.npy'), np.array([10, 20]))
+    os.utime(os.path.join(experiment_path, 'repetition_000001', 'data', 'reward.npy'), ns=(1, 1))
+
+    eu.data.calc_repetition_statistics([('sum_reward', calc_sum_reward)], load_data, experiment_path, recalculate_statistics='changed')
+    new_mtimes = get_mtimes('sum_reward')
+    assert new_mtimes[0] == mtimes[0]
+    assert new_mtimes[1] != mtimes[1]
+    assert np.load(os.path.join(experiment_path, 'repetition_000001', 'data', 'sum_reward.npy')) == 30
+    assert np.load(os.path.join(experiment_path, 'repetition_000002', 'data', 'sum_reward.npy')) == 3
+
+    # statistics over repetitions are recalculated if repetitions are added
+    eu.data.calc_statistics_over_repetitions([('mean_sum_reward', calc_mean_sum_reward)], tmpdir.strpath, recalculate_statistics='changed')
+    assert np.load(mean_sum_reward_path) == np.mean([0, 30, 3])
+
+    # a changed statistic function is recalculated
+    eu.data.calc_repetition_statistics([('sum_reward', calc_max_reward_times_ten)], load_data, experiment_path, recalculate_statistics='changed')
+    assert np.load(os.path.join(experiment_path, 'repetition_000001', 'data', 'sum_reward.npy')) == 200
+
+
+def test_recalculate_changed_statistics_of_separate_calls(tmpdir):
+
+    create_test_data(tmpdir.strpath, n_repetitions=2)
+
+    experiment_path = os.path.join(tmpdir.strpath, 'experiment_000001')
+    def get_mtimes(statistic_name):
+        return [os.stat(os.path.join(experiment_path, 'repetition_{:06d}'.format(rep_id), 'data', statistic_name + '.npy')).st_mtime_ns
+                for rep_id in range(2)]
+
+    eu.data.calc_repetition_statistics([('sum_reward', calc_sum_reward)], load_data, tmpdir.strpath, recalculate_statistics='changed')
+    eu.data.calc_repetition_statistics([('max_reward_times_ten', calc_max_reward_times_ten)], load_data, tmpdir.strpath, recalculate_statistics='changed')
+    sum_reward_mtimes = get_mtimes('sum_reward')
+    max_reward_mtimes = get_mtimes('max_reward_times_ten')
+
+    # the outputs of the other call are not inputs of the statistics
+    for _ in range(2):
+        eu.data.calc_repetition_statistics([('sum_reward', calc_sum_reward)], load_data, tmpdir.strpath, recalculate_statistics='changed')
+        eu.data.calc_repetition_statistics([('max_reward_times_ten', calc_max_reward_times_ten)], load_data, tmpdir.strpath, recalculate_statistics='changed')
+    assert get_mtimes('sum_reward') == sum_reward_mtimes
+    assert get_mtimes('max_reward_times_ten') == max_reward_mtimes
+
+
+def calc_mean_sum_reward(statistic_name, data):
+    return np.mean([rep_data['sum_reward'] for rep_data in data.values()])
+
+
+def calc_max_reward_times_ten(statistic_name, data):
+    return np.max(data['reward']) * 10
+
+
+def test_online_statistics_over_repetitions(tmpdir):
+
+    create_test_data(tmpdir.strpath, n_repetitions=4)
+
+    statistics = [
+        ('reward_mean_var', eu.data.OnlineMeanVar('reward'), 'online'),
+        ('reward_min_max', eu.data.OnlineMinMax('reward'), 'online'),
+        ('reward_quantiles', eu.data.OnlineQuantiles('reward', q=[0.0, 0.5, 1.0]), 'online'),
+        ('reward_histogram', eu.data.OnlineHistogram('reward', bins=[0, 1, 2, 4]), 'online'),
+        ('mean_reward', calc_mean_final_reward),
+    ]
+
+    loaded_directories = []
+    def load_repetition_data(repetition_directory):
+        loaded_directories.append(repetition_directory)
+        return eu.data.statistics.load_data_from_repetition(repetition_directory)
+
+    eu.data.calc_statistics_over_repetitions(statistics, tmpdir.strpath, load_repetition_data_func=load_repetition_data)
+
+    # all online statistics are calculated in one pass over the repetitions
+    assert len(loaded_directories) == 4
+
+    # rewards of the repetitions: [0], [0, 1], [0, 1, 2], [0, 1, 2, 3]
+    rewards = np.full((4, 4), np.nan)
+    for rep_id in range(4):
+        rewards[rep_id, :rep_id + 1] = np.arange(rep_id + 1)
+
+    statistics_path = os.path.join(tmpdir.strpath, 'experiment_000001', 'data')
+    mean_var = np.load(os.path.join(statistics_path, 'reward_mean_var.npz'))
+    assert np.allclose(mean_var['mean'], np.nanmean(rewards, axis=0))
+    assert np.allclose(mean_var['var'], np.nanvar(rewards, axis=0))
+    assert np.array_equal(mean_var['n'], [4, 3, 2, 1])
+
+    min_max = np.load(os.path.join(statistics_path, 'reward_min_max.npz'))
+    assert np.array_equal(min_max['min'], np.nanmin(rewards, axis=0))
+    assert np.array_equal(min_max['max'], np.nanmax(rewards, axis=0))
+
+    quantiles = np.load(os.path.join(statistics_path, 'reward_quantiles.npz'))
+    assert np.allclose(quantiles['quantiles'], np.nanquantile(rewards, [0.0, 0.5, 1.0], axis=0))
+
+    histogram = np.load(os.path.join(statistics_path, 'reward_histogram.npz'))
+    assert np.array_equal(histogram['counts'], [4, 3, 3])
+
+    assert np.load(os.path.join(statistics_path, 'mean_reward.npy')) == 1.5
+
+
+def test_online_quantiles_sampling():
+
+    quantiles = eu.data.OnlineQuantiles('x', q=[0.5], sample_size=200, seed=1)
+    for x in np.random.default_rng(0).normal(size=5000):
+        quantiles.add(dict(x=x))
+
+    result = quantiles.result()
+    assert result['quantiles'].shape == (1,)
+    assert abs(result['quantiles'][0]) < 0.2
+
+    with pytest.raises(ValueError):
+        eu.data.OnlineHistogram('x', bins=10)
+
+
+def test_online_statistics_missing_data():
+
+    # repetitions without data for the datasource are skipped
+    mean_var = eu.data.OnlineMeanVar('sub.x[1]')
+    mean_var.add(dict(sub=dict(x=[0, 1])))
+    mean_var.add(dict(sub=dict(y=[0, 1])))
+    mean_var.add(dict(sub=dict(x=[0])))
+    mean_var.add(dict(sub=dict(x=[0, 3])))
+
+    result = mean_var.result()
+    assert result['mean'] == 2.0
+    assert result['n'] == 2
+    assert mean_var.n_missing == 2
+
+
+def calc_mean_final_reward(statistic_name, data):
+    return np.mean([rep_data['reward'][-1] for rep_data in data.values()])
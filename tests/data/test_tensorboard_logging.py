@@ -72,6 +72,22 @@ def _create_extra_tb_logging_test_code(path):
     f.close()
 
 
+def _create_async_tb_logging_test_code(path):
+    f = open(path, 'a')
+    f.writelines([
+        'import exputils.data.logging as log', '\n',
+        '', '\n',
+        'if __name__ == \'__main__\':', '\n',
+        '   log.set_config(tensorboard_async=dict(is_active=True))', '\n',
+        '   log.activate_tensorboard()', '\n',
+        '   log.add_value(\'val\', 100)', '\n',
+        '   log.add_values(\'vals\', [100, 200])', '\n',
+        '   log.add_histogram(\'hist1\', [100, 100])', '\n',
+        '   log.save()' '\n',
+    ])
+    f.close()
+
+
 def test_tensorboard_logging(tmp_path):
     """
     Creates an experiments folder structure:
@@ -86,6 +102,7 @@ def test_tensorboard_logging(tmp_path):
         repetition_000001 - no active logging to tb
         repetition_000002 - active logging to tb
         repetition_000003 - extra logging to tb without logging to exputils log
+        repetition_000004 - active logging to tb in a background thread
 
     Checks if tb log gets created and filled if automatic logging is active.
     """
@@ -157,4 +174,21 @@ def test_tensorboard_logging(tmp_path):
     assert len(tblog_files) == 1
     nonempty_tblog_file_size = os.path.getsize(tblog_files[0])
 
-    assert nonempty_tblog_file_size > empty_tblog_file_size
\ No newline at end of file
+    assert nonempty_tblog_file_size > empty_tblog_file_size
+
+    ###############################
+    # repetition with tb with automatic logging in a background thread
+    repetition_4_dir = experiment_dir / eu.REPETITION_DIRECTORY_TEMPLATE.format(4)
+    repetition_4_dir.mkdir()
+    _create_async_tb_logging_test_code(os.path.join(str(repetition_4_dir), 'write_log.py'))
+    os.chdir(str(repetition_4_dir))
+    subprocess.check_output(['python', 'write_log.py'])
+
+    tensorboard_log_repetition_4_dir = tensorboard_log_dir / 'exp_1' / 'rep_4'
+
+    assert os.path.exists(str(tensorboard_log_repetition_4_dir))
+    tblog_files = glob.glob(os.path.join(str(tensorboard_log_repetition_4_dir), '*/*.tblog'))
+    assert len(tblog_files) == 1
+    nonempty_tblog_file_size = os.path.getsize(tblog_files[0])
+
+    assert nonempty_tblog_file_size > empty_tblog_file_size
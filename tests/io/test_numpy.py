@@ -0,0 +1,74 @@
+##
+## This file is part of the exputils package.
+##
+## Copyright: INRIA
+## Year: 2022, 2023
+## Contact: chris.reinke@inria.fr
+##
+## exputils is provided under GPL-3.0-or-later
+##
+import exputils as eu
+import numpy as np
+import os
+import pytest
+
+
+def test_append_to_numpy_file(tmp_path):
+
+    file_path = os.path.join(str(tmp_path), 'values.npy')
+
+    # create and append
+    eu.io.append_to_numpy_file(file_path, [1.0, 2.0])
+    eu.io.append_to_numpy_file(file_path, np.arange(1000))
+    values = np.load(file_path)
+    assert values.dtype == np.float64
+    assert values.shape == (1002,)
+    assert np.array_equal(values[:4], [1.0, 2.0, 0.0, 1.0])
+
+    # overwrite
+    eu.io.append_to_numpy_file(file_path, [[1, 2], [3, 4]], is_overwrite=True)
+    eu.io.append_to_numpy_file(file_path, [[5, 6]])
+    assert np.array_equal(np.load(file_path), [[1, 2], [3, 4], [5, 6]])
+
+    # values with a different shape can not be appended
+    with pytest.raises(ValueError):
+        eu.io.append_to_numpy_file(file_path, [[7, 8, 9]])
+
+    # objects can not be appended
+    with pytest.raises(ValueError):
+        eu.io.append_to_numpy_file(file_path, np.array([dict()]))
+
+
+def test_append_to_saved_numpy_file(tmp_path):
+
+    # files written by numpy.save can be appended and their dtype is promoted if needed
+    file_path = os.path.join(str(tmp_path), 'values.npy')
+    np.save(file_path, np.arange(3))
+
+    eu.io.append_to_numpy_file(file_path, [2.5])
+    eu.io.append_to_numpy_file(file_path, [3.5])
+
+    values = eu.io.load_numpy_files(str(tmp_path))['values']
+    assert values.dtype == np.float64
+    assert np.array_equal(values, [0.0, 1.0, 2.0, 2.5, 3.5])
+
+
+def test_load_numpy_segment_files(tmp_path):
+
+    directory = str(tmp_path)
+    container_path = os.path.join(directory, 'logging.npz')
+
+    eu.io.save_dict_to_numpy_files(dict(a=[1, 2], b=[[1, 2]]), container_path, 'npz')
+    eu.io.save_dict_to_numpy_files(dict(a=[3]), eu.io.numpy.get_numpy_segment_file_path(container_path, 1), 'npz')
+    eu.io.save_dict_to_numpy_files(dict(a=[4], b=[[3, 4]], c=[1.5]), eu.io.numpy.get_numpy_segment_file_path(container_path, 2), 'cnpz')
+
+    assert eu.io.numpy.get_numpy_segment_file_paths(container_path) == [
+        os.path.join(directory, 'logging.000001.npz'),
+        os.path.join(directory, 'logging.000002.npz')]
+
+    # segments are appended to their container
+    data = eu.io.load_numpy_files(directory)
+    assert list(data.keys()) == ['logging']
+    assert np.array_equal(data.logging.a, [1, 2, 3, 4])
+    assert np.array_equal(data.logging.b, [[1, 2], [3, 4]])
+    assert np.array_equal(data.logging.c, [1.5])
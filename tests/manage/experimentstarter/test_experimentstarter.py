@@ -10,6 +10,12 @@
 import os
 import exputils as eu
 import shutil
+import subprocess
+import json
+import asyncio
+import pytest
+import time
+from datetime import datetime
 
 
 def test_experimentstarter(tmpdir):
@@ -206,3 +212,307 @@ def test_status_file_writing_off(tmpdir):
     assert n_running_messages == 0
     assert n_custom_messages == 1
     assert n_finished_messages == 0
+
+
+def test_start_next_script_when_slot_is_free(tmpdir):
+
+    # short scripts, of which the next one should be started directly after one finished
+    n_scripts = 20
+    for idx in range(n_scripts):
+        script_directory = os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx))
+        os.makedirs(script_directory)
+        script_path = os.path.join(script_directory, 'start.sh')
+        with open(script_path, 'w') as fh:
+            fh.write('#!/bin/bash\necho done > done.txt\n')
+        os.chmod(script_path, 0o755)
+
+    start_time = time.time()
+    eu.manage.start_experiments(start_scripts='*.sh', directory=tmpdir.strpath, parallel=2)
+    duration = time.time() - start_time
+
+    for idx in range(n_scripts):
+        script_path = os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx), 'start.sh')
+        assert os.path.isfile(os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx), 'done.txt'))
+        assert eu.manage.experimentstarter.get_script_status(script_path) == 'finished'
+
+    # polling every 0.5 seconds would need at least 5 seconds
+    assert duration < 4
+
+
+def test_async_start_experiments(tmpdir):
+
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+
+    directory = os.path.join(tmpdir.strpath, 'test_async_start_experiments')
+    shutil.copytree(os.path.join(dir_path, 'start_scripts'), directory)
+
+    async def orchestrate():
+        # other tasks of the event loop keep running while the experiments are executed
+        n_ticks = 0
+        async def tick():
+            nonlocal n_ticks
+            while True:
+                n_ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(tick())
+        results = await eu.manage.async_start_experiments(start_scripts='*.sh', directory=directory, parallel=2)
+        tick_task.cancel()
+        return results, n_ticks
+
+    cwd = os.getcwd()
+    results, n_ticks = asyncio.run(orchestrate())
+    assert os.getcwd() == cwd
+    assert n_ticks > 0
+
+    assert os.path.isfile(os.path.join(directory, 'job04.txt'))
+    assert os.path.isfile(os.path.join(directory, 'job01/job01.txt'))
+    assert os.path.isfile(os.path.join(directory, 'job02/job02.txt'))
+    assert not os.path.isfile(os.path.join(directory, 'job03/job03.txt'))
+
+    results = {os.path.relpath(result.script, directory): result for result in results}
+    assert list(results.keys()) == ['job01/start.sh', 'job02/start.sh', 'job03/start.sh', 'job04/start.sh', 'start.sh']
+    assert results['job01/start.sh'].is_started and results['job01/start.sh'].status == 'finished'
+    assert results['job01/start.sh'].returncode == 0
+    assert not results['job03/start.sh'].is_started
+
+    # finished scripts are not started again
+    results = asyncio.run(eu.manage.async_start_experiments(start_scripts='*.sh', directory=directory))
+    assert results[0].status == 'finished' and not results[0].is_started
+
+
+def test_async_start_experiments_cancel(tmpdir):
+
+    script_directory = os.path.join(tmpdir.strpath, 'job01')
+    os.makedirs(script_directory)
+    script_path = os.path.join(script_directory, 'start.sh')
+    with open(script_path, 'w') as fh:
+        fh.write('#!/bin/bash\necho $$ > pid.txt\nsleep 60\n')
+    os.chmod(script_path, 0o755)
+
+    # cancel while waiting for the script and while waiting after its start
+    for post_start_wait_time in [0., 2.]:
+
+        if os.path.isfile(script_path + eu.manage.experimentstarter.STATUS_FILE_EXTENSION):
+            os.remove(script_path + eu.manage.experimentstarter.STATUS_FILE_EXTENSION)
+
+        async def start_and_cancel():
+            task = asyncio.create_task(eu.manage.async_start_experiments(
+                start_scripts='*.sh', directory=tmpdir.strpath, post_start_wait_time=post_start_wait_time))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start_time = time.time()
+        asyncio.run(start_and_cancel())
+        assert time.time() - start_time < 10
+
+        # cancelled scripts are started again by the next call
+        assert eu.manage.experimentstarter.get_script_status(script_path) == 'error'
+
+        # the process was terminated and reaped
+        with open(os.path.join(script_directory, 'pid.txt')) as fh:
+            pid = int(fh.read())
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+
+
+def test_resource_aware_scheduling(tmpdir):
+
+    # scripts with their needed resources
+    script_resources = [dict(n_cpus=3), dict(n_cpus=2, memory='1G'), None, dict(n_cpus=1, memory='8G')]
+    for idx, resources in enumerate(script_resources):
+        script_directory = os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx))
+        os.makedirs(script_directory)
+        script_path = os.path.join(script_directory, 'start.sh')
+        with open(script_path, 'w') as fh:
+            fh.write('#!/bin/bash\n'
+                     'date +%s.%N > start.txt\n'
+                     'sleep 0.5\n'
+                     'grep Cpus_allowed_list /proc/$$/status > cpus.txt\n'
+                     'date +%s.%N > end.txt\n')
+        os.chmod(script_path, 0o755)
+        if resources is not None:
+            with open(script_path + eu.manage.experimentstarter.RESOURCES_FILE_EXTENSION, 'w') as fh:
+                json.dump(resources, fh)
+
+    assert eu.manage.experimentstarter.get_script_resources(os.path.join(tmpdir.strpath, 'job01', 'start.sh')) == dict(n_cpus=2, memory=1024 ** 3)
+    assert eu.manage.experimentstarter.get_script_resources(os.path.join(tmpdir.strpath, 'job02', 'start.sh')) == dict(n_cpus=1, memory=0)
+
+    eu.manage.start_experiments(start_scripts='*.sh', directory=tmpdir.strpath, resources=dict(n_cpus=3, memory='4G'), is_pin_cpus=True)
+
+    def read_times(idx):
+        times = []
+        for filename in ['start.txt', 'end.txt']:
+            with open(os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx), filename)) as fh:
+                times.append(float(fh.read()))
+        return times
+
+    times = [read_times(idx) for idx in range(4)]
+
+    # job00 needs all cores, job01 and job02 run together afterwards
+    assert times[1][0] >= times[0][1] and times[2][0] >= times[0][1]
+    assert times[2][0] < times[1][1]
+
+    # job03 needs more memory than the machine has, thus it runs alone
+    for idx in range(3):
+        assert times[3][0] >= times[idx][1]
+
+    # processes are pinned to the cores of the process
+    allowed_cpus = os.sched_getaffinity(0)
+    for idx in range(4):
+        with open(os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx), 'cpus.txt')) as fh:
+            cpus_str = fh.read().split(':')[1].strip()
+        cpus = set()
+        for part in cpus_str.split(','):
+            bounds = [int(b) for b in part.split('-')]
+            cpus.update(range(bounds[0], bounds[-1] + 1))
+        assert cpus <= allowed_cpus
+
+    # processes are pinned before their command is executed
+    resource_pool = eu.manage.experimentstarter._ResourcePool(dict(n_cpus=1), is_pin_cpus=True)
+    allocation = resource_pool.allocate(dict(n_cpus=1, memory=0))
+    with resource_pool.pinned_cpus(resource_pool.allocate(dict(n_cpus=1, memory=0))):
+        assert os.sched_getaffinity(0) == allowed_cpus
+    with resource_pool.pinned_cpus(allocation):
+        output = subprocess.check_output(['grep', 'Cpus_allowed_list', '/proc/self/status'])
+    assert output.decode().split(':')[1].strip() == str(allocation[2][0])
+    # the cores of the starter are restored
+    assert os.sched_getaffinity(0) == allowed_cpus
+
+    # the available memory includes the memory that can be freed
+    if os.path.isfile('/proc/meminfo'):
+        with open('/proc/meminfo') as fh:
+            mem_available = [int(line.split()[1]) * 1024 for line in fh if line.startswith('MemAvailable:')]
+        if mem_available:
+            assert abs(eu.manage.experimentstarter._get_available_memory() - mem_available[0]) < 256 * 1024 ** 2
+
+    with pytest.raises(ValueError):
+        eu.manage.start_experiments(start_scripts='*.sh', directory=tmpdir.strpath, resources=4)
+
+
+def test_script_ordering(tmpdir):
+
+    def create_script(path, status_lines=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fh:
+            fh.write('#!/bin/bash\n')
+        os.chmod(path, 0o755)
+        if status_lines is not None:
+            with open(path + eu.manage.experimentstarter.STATUS_FILE_EXTENSION, 'w') as fh:
+                fh.write('\n'.join(status_lines) + '\n')
+
+    # durations of previous runs
+    create_script(os.path.join(tmpdir.strpath, 'job_a', 'start.sh'), ['2023/01/01 10:00:00', 'running', '2023/01/01 10:00:10', 'error'])
+    create_script(os.path.join(tmpdir.strpath, 'job_b', 'start.sh'), ['2023/01/01 10:00:00', 'running', '2023/01/01 10:01:00', 'error'])
+    create_script(os.path.join(tmpdir.strpath, 'job_c', 'start.sh'))
+
+    assert eu.manage.experimentstarter.get_script_duration(os.path.join(tmpdir.strpath, 'job_a', 'start.sh')) == 10
+    assert eu.manage.experimentstarter.get_script_duration(os.path.join(tmpdir.strpath, 'job_b', 'start.sh')) == 60
+    assert eu.manage.experimentstarter.get_script_duration(os.path.join(tmpdir.strpath, 'job_c', 'start.sh')) is None
+
+    scripts = eu.manage.get_scripts(directory=tmpdir.strpath, start_scripts='*.sh')
+    names = lambda ordered: [os.path.basename(os.path.dirname(s)) for s in ordered]
+
+    assert names(eu.manage.experimentstarter._order_scripts(scripts, 'alphabetical')) == ['job_a', 'job_b', 'job_c']
+    assert names(eu.manage.experimentstarter._order_scripts(scripts, 'longest_first')) == ['job_c', 'job_b', 'job_a']
+    priorities = dict(job_a=2, job_b=0, job_c=1)
+    assert names(eu.manage.experimentstarter._order_scripts(scripts, lambda s: priorities[os.path.basename(os.path.dirname(s))])) == ['job_b', 'job_c', 'job_a']
+
+    with pytest.raises(ValueError):
+        eu.manage.experimentstarter._order_scripts(scripts, 'unknown')
+
+    # round robin over the repetitions of experiments
+    rr_dir = os.path.join(tmpdir.strpath, 'rr')
+    for exp_id, n_reps in [(1, 3), (2, 1), (3, 2)]:
+        for rep_id in range(n_reps):
+            create_script(os.path.join(rr_dir, 'experiment_{:06d}'.format(exp_id), 'repetition_{:06d}'.format(rep_id), 'start.sh'))
+    scripts = eu.manage.get_scripts(directory=rr_dir, start_scripts='*.sh')
+    ordered = [os.path.relpath(os.path.dirname(s), rr_dir) for s in eu.manage.experimentstarter._order_scripts(scripts, 'round_robin')]
+    assert ordered == [
+        'experiment_000001/repetition_000000',
+        'experiment_000002/repetition_000000',
+        'experiment_000003/repetition_000000',
+        'experiment_000001/repetition_000001',
+        'experiment_000003/repetition_000001',
+        'experiment_000001/repetition_000002',
+    ]
+
+    # scripts that are not in experiment directories are grouped by their directory
+    get_experiment_directory = eu.manage.experimentstarter._get_script_experiment_directory
+    assert get_experiment_directory('/tmp/jobs/job01/start.sh') == '/tmp/jobs/job01'
+    assert get_experiment_directory('/start.sh') == '/'
+    assert get_experiment_directory('start.sh') == ''
+    assert get_experiment_directory('experiment_000001/repetition_000000/start.sh') == 'experiment_000001'
+    assert get_experiment_directory('/tmp/experiment_000002/repetition_000000/start.sh') == '/tmp/experiment_000002'
+
+    scripts = eu.manage.get_scripts(directory=tmpdir.strpath, start_scripts='*.sh')
+    jobs_scripts = [s for s in scripts if not s.startswith(rr_dir)]
+    assert names(eu.manage.experimentstarter._order_scripts(jobs_scripts, 'round_robin')) == ['job_a', 'job_b', 'job_c']
+
+    # scripts are started in the given order
+    scripts = eu.manage.get_scripts(directory=rr_dir, start_scripts='*.sh')
+    eu.manage.start_experiments(directory=rr_dir, start_scripts='*.sh', parallel=1, ordering='round_robin')
+    for script in scripts:
+        assert eu.manage.experimentstarter.get_script_status(script) == 'finished'
+
+
+def test_runtime_records_and_progress(tmpdir):
+
+    for idx, exit_code in enumerate([0, 0, 3]):
+        os.makedirs(os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx)))
+        script_path = os.path.join(tmpdir.strpath, 'job{:02d}'.format(idx), 'start.sh')
+        with open(script_path, 'w') as fh:
+            fh.write('#!/bin/bash\nsleep 0.2\nexit {}\n'.format(exit_code))
+        os.chmod(script_path, 0o755)
+
+    scripts = eu.manage.get_scripts(directory=tmpdir.strpath, start_scripts='*.sh')
+
+    progress = eu.manage.get_experiments_progress(directory=tmpdir.strpath, start_scripts='*.sh')
+    assert progress.n_scripts == 3
+    assert progress.n_to_execute == 3
+    assert progress.n_finished == 0
+    assert progress.eta is None
+
+    eu.manage.start_experiments(directory=tmpdir.strpath, start_scripts='*.sh', parallel=2)
+
+    for script, exit_code in zip(scripts, [0, 0, 3]):
+        runtimes = eu.manage.experimentstarter.get_script_runtimes(script)
+        assert len(runtimes) == 1
+        assert runtimes[0].returncode == exit_code
+        assert runtimes[0].status == ('finished' if exit_code == 0 else 'error')
+        assert runtimes[0].end_time >= runtimes[0].start_time
+        assert runtimes[0].duration >= 0.2
+        assert runtimes[0].user_cpu_time >= 0
+        assert runtimes[0].system_cpu_time >= 0
+        assert runtimes[0].max_rss > 0
+        assert runtimes[0].starter_max_rss > 0
+        assert eu.manage.experimentstarter.get_script_duration(script) == runtimes[0].duration
+
+    progress = eu.manage.get_experiments_progress(directory=tmpdir.strpath, start_scripts='*.sh', parallel=2)
+    assert progress.n_finished == 2
+    assert progress.n_to_execute == 1
+    assert progress.n_error == 1
+    assert progress.n_running == 0
+    assert progress.mean_duration >= 0.2
+    assert progress.max_rss > 0
+    assert progress.remaining_time == eu.manage.experimentstarter.get_script_duration(scripts[2])
+    assert progress.eta == progress.remaining_time
+
+    # scripts that write their own status are running
+    with open(scripts[2] + eu.manage.experimentstarter.STATUS_FILE_EXTENSION, 'a') as fh:
+        fh.write('{}\nrunning\n'.format(datetime.now().strftime("%Y/%m/%d %H:%M:%S")))
+    eu.misc.update_status('epoch 3', status_file=scripts[2] + eu.manage.experimentstarter.STATUS_FILE_EXTENSION)
+    progress = eu.manage.get_experiments_progress(directory=tmpdir.strpath, start_scripts='*.sh', parallel=2)
+    assert progress.n_running == 1
+    assert progress.n_to_execute == 0
+    assert 0 <= progress.remaining_time <= eu.manage.experimentstarter.get_script_duration(scripts[2])
+    eu.manage.experimentstarter._update_script_status(scripts[2], 'error')
+
+    # the async starter records the runtimes as well
+    results = asyncio.run(eu.manage.async_start_experiments(directory=tmpdir.strpath, start_scripts='*.sh'))
+    results = {result.script: result for result in results}
+    assert results[scripts[0]].runtime is None
+    assert results[scripts[2]].runtime.returncode == 3
+    assert len(eu.manage.experimentstarter.get_script_runtimes(scripts[2])) == 2
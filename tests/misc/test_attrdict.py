@@ -117,3 +117,41 @@ def test_combine_dicts():
 
     assert new_dict == def_dict
 
+
+
+def test_lazy_attrdict():
+
+    class CountingLazyValue(eu.misc.attrdict.LazyValue):
+        def __init__(self, value):
+            self.value = value
+            self.n_loads = 0
+
+        def load(self):
+            self.n_loads += 1
+            return self.value
+
+    lazy_value = CountingLazyValue(1)
+    attrdict = eu.LazyAttrDict(a=lazy_value, b=2)
+
+    assert lazy_value.n_loads == 0
+    assert not attrdict.is_loaded('a')
+    assert attrdict.is_loaded('b')
+
+    assert attrdict.a == 1
+    assert attrdict['a'] == 1
+    assert attrdict.get('a') == 1
+    assert attrdict.get('c', 3) == 3
+    assert dict(attrdict.items()) == dict(a=1, b=2)
+    assert list(attrdict.values()) == [1, 2]
+    assert lazy_value.n_loads == 5
+
+    # conversions load the placeholders, copies keep them
+    assert dict(attrdict) == dict(a=1, b=2)
+    assert {**attrdict} == dict(a=1, b=2)
+    assert dict.__getitem__(eu.AttrDict(attrdict), 'a') == 1
+    assert lazy_value.n_loads == 8
+
+    attrdict_copy = attrdict.copy()
+    assert isinstance(attrdict_copy, eu.LazyAttrDict)
+    assert not attrdict_copy.is_loaded('a')
+    assert lazy_value.n_loads == 8
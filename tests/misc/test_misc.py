@@ -9,6 +9,7 @@
 ##
 import exputils as eu
 import numpy as np
+import pytest
 
 
 def test_dict_equal():
@@ -134,6 +135,14 @@ def test_boolean_filtering():
     filtered = eu.misc.do_subdict_boolean_filtering(data, ('min', 'x'))
     assert np.all(2 == filtered)
 
+    # compiled filters can be reused for several data lists
+    is_small_x = eu.misc.compile_subdict_boolean_filter((('x', '+', 'y'), '<', 5))
+    assert np.all(np.array([True, False, False]) == is_small_x(data))
+    assert np.all(np.array([False, True]) == is_small_x([dict(x=3, y=3), dict(x=1, y=1)]))
+
+    with pytest.raises(ValueError):
+        eu.misc.compile_subdict_boolean_filter(('x', '<>', 4))
+
 
 def test_list_equal():
 
@@ -211,6 +220,31 @@ def test_get_sub_dictionary_variable():
 
 
 
+def test_compile_dict_variable():
+
+    test_dict = dict(var_a = 1,
+                     sub_dict_1 = dict(var_b = np.array([[1, 2, 3], [4, 5, 6]])),
+                     sub_list = [dict(var_d=6), dict(var_d=7)]
+                     )
+
+    getter = eu.misc.compile_dict_variable('sub_dict_1.var_b[:, -1]')
+    assert np.array_equal(getter(test_dict), [3, 6])
+
+    # getters are cached per variable string
+    assert eu.misc.compile_dict_variable('sub_dict_1.var_b[:, -1]') is getter
+
+    # a getter can be reused for several dictionaries
+    getter = eu.misc.compile_dict_variable('sub_list[1].var_d')
+    assert getter(test_dict) == 7
+    assert getter(dict(sub_list=[None, dict(var_d=8)])) == 8
+
+    with pytest.raises(KeyError):
+        getter(dict(var_a=1))
+
+    with pytest.raises(IndexError):
+        getter(dict(sub_list=[dict(var_d=6)]))
+
+
 def test_str_to_slices():
 
     assert eu.misc.str_to_slices('[0]') == [0]